@@ -15,19 +15,15 @@ model_grid_name = "Nine-bus System"
 
 #out of step detection name
 OOSFrmName = "OOSFrm" 
+#path of powerfactory.pyd
+PFPath = "C:\\Program Files\\DIgSILENT\\PowerFactory 2024 Preview\\Python\\3.12"
 #--------------------------------------------------------------------------------------------------
 ## start power factory application
 
-# Add powerfactory.pyd path to python path
-import sys
-sys.path.append("C:\\Program Files\\DIgSILENT\\PowerFactory 2024 Preview\\Python\\3.12")
-
-# import PowerFactory module
-import powerfactory as pf
-
-# start powerfactory in non-interactive mode
-
-app = pf.GetApplicationExt()
+# the session starts powerfactory in non-interactive mode on first use and keeps it running (and the project active) for
+# the next analyses in the same python process
+import OOSSession
+session = OOSSession.PFSession(prj, model_grid_name, PFPath=PFPath)
 
 #-------------------------------------------------------------------------------------------------
 ## code
@@ -35,31 +31,22 @@ app = pf.GetApplicationExt()
 # activate pf project
 print('---------------------------------------------------------------')
 print('activating project')
-prj = app.ActivateProject(prj)
-if prj == 1:
-    raise Exception("No project activated. Python Script stopped.")
-else:
-    print('project sucefully activated')
+session = OOSSession.OpenSession(session)
+print('project sucefully activated')
+app = session.app
 
 # get dynamic models library
-dyn_folder = app.GetProjectFolder("blk")
+dyn_folder = session.dyn_folder
 
 #get grid to implement frame
-net_data = app.GetProjectFolder("netdat")
-for i in net_data.GetContents():
-    if i.loc_name == model_grid_name:
-        model_grid = i
+model_grid = session.grid
 
 #get list of all active generators
 sAllGen = app.GetCalcRelevantObjects("*.ElmSym",includeOutOfService = 0)
 
 #create list of Frames that calculate absolute angles, and list used to detect critical generator
-sGenAng = []
-sAng = []
-for i in sAllGen:
-    currComAngFrm = OutOfStep.CreateComAng("AngleAdder"+str(i.loc_name), dyn_folder, model_grid, i)
-    sAng.append(currComAngFrm)
-    sGenAng.append([i,currComAngFrm])
+sGenAng = OutOfStep.CreateComAngBatch(list(sAllGen), dyn_folder, model_grid, iprint=True)
+sAng = [i[1] for i in sGenAng]
 
 #Check if out of step detection exists
 OutOfStep.CheckIfElmExists(OOSFrmName,model_grid,True)
@@ -71,8 +58,8 @@ OutOfStep.CreateOOSDet(OOSFrmName,dyn_folder,model_grid,sAng)
 OutOfStep.EnableComElm(OOSFrmName,model_grid)
 
 #Get comands for initialising and running RMS simulation
-oComInc = app.GetFromStudyCase("ComInc")
-oComSim = app.GetFromStudyCase("ComSim")
+oComInc = session.oComInc
+oComSim = session.oComSim
 
 #Execute initialisation and RMS simulation commands
 oComInc.Execute()
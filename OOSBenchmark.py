@@ -0,0 +1,105 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Scaling benchmark of the OutOfStep model construction functions on the in-memory powerfactory stand-in
+(OOSFakePF). For every number of machines it reports the wall time, the number of API calls and the number of created objects
+of each function, so that regressions show up in numbers.
+
+usage: python OOSBenchmark.py [--n 3 10 100 1000 5000] [--latency 0] [--json results.json]
+'''
+
+import argparse
+import json
+import time
+
+import OutOfStep
+import OOSFakePF
+
+DefaultN = [3, 10, 30, 100, 300, 1000, 3000, 5000]
+
+def Measure(app, name: str, n: int, func, *args):
+    '''This function runs func(*args) and returns its result and a dictionary with the wall time, API calls and created
+       objects of the run.'''
+
+    app.ResetCounters()
+    start = time.perf_counter()
+    result = func(*args)
+    wall = time.perf_counter()-start
+
+    return result,{"function": name,
+                   "n": n,
+                   "wall_time": wall,
+                   "api_calls": app.CallCount(),
+                   "calls": dict(app.calls),
+                   "objects": sum(app.created.values()),
+                   "created": dict(app.created)}
+
+def BenchmarkN(n: int, latency: float = 0.0):
+    '''This function builds the angle adders and out-of-step detectors for n machines on a fresh fake application and returns
+       the measurements of every construction function.'''
+
+    rows = []
+
+    #angle adders one by one, as in the original example
+    app = OOSFakePF.FakeApp(latency)
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    OutOfStep.InvalidateCaches()
+    def ComAngLoop():
+        return([OutOfStep.CreateComAng("AngleAdder"+i.loc_name, TypFolder, grid, i) for i in sGens])
+    sAng,row = Measure(app, "CreateComAng", n, ComAngLoop)
+    rows.append(row)
+
+    #angle adders in one batch
+    app = OOSFakePF.FakeApp(latency)
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    OutOfStep.InvalidateCaches()
+    sGenAng,row = Measure(app, "CreateComAngBatch", n, OutOfStep.CreateComAngBatch, sGens, TypFolder, grid)
+    rows.append(row)
+    sAng = [i[1] for i in sGenAng]
+
+    for topology in ["chain","tree","single"]:
+        _,row = Measure(app, "CreateOOSDetFrameTyp["+topology+"]", n, OutOfStep.CreateOOSDetFrameTyp,
+                        "BenchFrmTyp_"+topology, "BenchBlkTyp_"+topology, TypFolder, n, topology)
+        rows.append(row)
+
+        _,row = Measure(app, "CreateOOSDet["+topology+"]", n, OutOfStep.CreateOOSDet,
+                        "OOSFrm_"+topology, TypFolder, grid, sAng, topology)
+        row["depth"] = OutOfStep.OOSDetTopologyInfo(n, topology)["depth"]
+        rows.append(row)
+
+        #a second detector of the same size reuses the types of the first one
+        _,row = Measure(app, "CreateOOSDet["+topology+",reuse]", n, OutOfStep.CreateOOSDet,
+                        "OOSFrm_"+topology+"_2", TypFolder, grid, sAng, topology)
+        row["depth"] = OutOfStep.OOSDetTopologyInfo(n, topology)["depth"]
+        rows.append(row)
+
+    return(rows)
+
+def PrintRows(rows: list):
+    '''This function prints the measurements as a table.'''
+
+    print("{:<28} {:>6} {:>10} {:>10} {:>9} {:>6}".format("function","n","time [s]","API calls","objects","depth"))
+    for i in rows:
+        print("{:<28} {:>6} {:>10.4f} {:>10} {:>9} {:>6}".format(i["function"], i["n"], i["wall_time"], i["api_calls"],
+                                                                i["objects"], i.get("depth","")))
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the OutOfStep model construction functions.")
+    parser.add_argument("--n", type=int, nargs="+", default=DefaultN, help="numbers of machines to benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of every API call in seconds")
+    parser.add_argument("--json", type=str, default=None, help="file to write the measurements to")
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.n:
+        rows.extend(BenchmarkN(n, args.latency))
+
+    PrintRows(rows)
+
+    if args.json is not None:
+        with open(args.json,"w") as f:
+            json.dump(rows, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Critical clearing time (CCT) search with the out of step detection of the OutOfStep module. For every fault the
+time of the clearing event is bisected, the EvtStop of the out-of-step detection block (a tripped case) is used as the
+instability oracle. The simulations are kept short: a case is stopped as soon as the detector trips, and the end time of the
+stable cases is cut to a window after the clearance, which is only extended if the first swing hasn't passed yet. If several
+sessions are available, several clearing times of every bracket (and of all faults) are evaluated at once.
+
+usage:
+    faults = [{"name": "Bus7", "events": {"Short-Circuit": {"time": 0.1}}}]
+    with OOSScreening.ScreeningPool(backend, workers=4) as pool:
+        results = OOSCCT.CCTSearch(faults, pool, "Clear Short-Circuit", 0.1, 0.6)
+'''
+
+import OOSScreening
+
+#fault clearing time resolution of the search [s]
+DefaultTolerance = 0.005
+
+#time simulated after the clearance before stability is checked for the first time [s]
+DefaultWindow = 1.0
+
+#drop of the angle difference from its peak, after which the first swing is treated as passed [deg]
+DefaultMargin = 10.0
+
+#support functions
+
+def ClearingCase(fault: dict, ClearEvent: str, ClearTime: float, tstop: float, ClearAttr: str = "time"):
+    '''This function returns the contingency of the given fault with the clearing event at ClearTime and the given end time.'''
+
+    events = {k: dict(v) for k,v in fault.get("events",{}).items()}
+    events.setdefault(ClearEvent,{})[ClearAttr] = ClearTime
+    return({"name": fault["name"]+"@"+str(round(ClearTime,6)), "events": events, "tstop": tstop})
+
+def IsEvident(row: dict, margin: float = DefaultMargin):
+    '''This function returns whether the outcome of a case is evident: it tripped (unstable), or the angle difference fell by
+       more than margin degrees from its peak before the simulation stopped (the first swing passed, stable).'''
+
+    if row["error"] is not None or not row["stable"]:
+        return(True)
+    return(row["diff_end"] < row["diff_peak"]-margin)
+
+def SearchPoints(lo: float, hi: float, k: int):
+    '''This function returns k clearing times that split the bracket (lo, hi) into k+1 equal parts.'''
+
+    return([lo+(hi-lo)*(j+1)/(k+1) for j in range(k)])
+
+#main functions
+
+def CCTSearch(faults: list, pool, ClearEvent: str, tmin: float, tmax: float, tol: float = DefaultTolerance,
+              window: float = DefaultWindow, MaxTstop: float = 10.0, margin: float = DefaultMargin, ClearAttr: str = "time",
+              FaultTime: float = None, points: int = None):
+    '''This function searches the critical clearing time of every fault between tmin and tmax. A fault is a contingency (see
+       OOSScreening) with the fault events, the clearing event ClearEvent (attribute ClearAttr) is set by the search. pool is
+       an OOSScreening.ScreeningPool, with points clearing times evaluated per fault and round (the number of workers of the
+       pool by default, at least 1). Every case is first simulated until window seconds after the clearance, if its outcome
+       isn't evident yet (see IsEvident) the window is doubled, up to MaxTstop. The search of a fault ends, when its bracket is
+       narrower than tol. It returns one dictionary per fault with:
+       name - the name of the fault,
+       cct - the longest stable clearing time found (minus FaultTime if it is given), None if the fault is unstable at tmin,
+       stable, unstable - the bracket of the clearing time, unstable is None if the fault is stable at tmax,
+       crit_gen - the critical generator at the shortest unstable clearing time,
+       runs - the number of simulations, sim_time - the simulated time of all of them, error - the first error, if any.'''
+
+    assert type(faults) == list, "faults should be list not "+str(type(faults))
+    assert tmin < tmax, "tmin should be smaller than tmax."
+    assert tol > 0, "tol should be bigger than 0."
+    if points is None:
+        points = pool.workers
+    points = max(1,points)
+
+    #state of the search of every fault
+    states = []
+    for i,fault in enumerate(faults):
+        fault = dict(fault, name=fault.get("name","fault"+str(i+1)))
+        states.append({"fault": fault, "lo": None, "hi": None, "todo": [tmin,tmax], "window": window,
+                       "crit_gen": None, "runs": 0, "sim_time": 0.0, "error": None, "done": False})
+
+    while True:
+        #clearing times of all faults to evaluate in this round, structure of each entry: (state, clearing time)
+        batch = [(s,i) for s in states if not s["done"] for i in s["todo"]]
+        if len(batch) == 0:
+            break
+
+        #a clearing time is simulated again with a longer window, until its outcome is evident
+        outcomes = {}
+        while len(batch) > 0:
+            rows = pool.Run([ClearingCase(s["fault"], ClearEvent, i, min(i+s["window"],MaxTstop), ClearAttr) for s,i in batch])
+            retry = []
+            for (s,i),row in zip(batch,rows):
+                s["runs"] += 1
+                s["sim_time"] += row["stop_time"] or 0.0
+                if IsEvident(row, margin) or i+s["window"] >= MaxTstop:
+                    outcomes[(id(s),i)] = row
+                else:
+                    retry.append((s,i))
+            for s in {id(s): s for s,i in retry}.values():
+                s["window"] *= 2
+            batch = retry
+
+        for s in states:
+            if s["done"]:
+                continue
+            for i in sorted(s["todo"]):
+                row = outcomes[(id(s),i)]
+                if row["error"] is not None:
+                    s["error"] = row["error"]
+                    s["done"] = True
+                    break
+                if row["stable"]:
+                    if s["hi"] is None or i < s["hi"]:
+                        s["lo"] = i if s["lo"] is None else max(s["lo"],i)
+                elif s["hi"] is None or i < s["hi"]:
+                    s["hi"] = i
+                    s["crit_gen"] = row["crit_gen"]
+            s["todo"] = []
+            if s["done"]:
+                continue
+            if s["lo"] is None or s["hi"] is None or s["hi"]-s["lo"] <= tol:
+                s["done"] = True
+            else:
+                k = min(points,max(1,int(round((s["hi"]-s["lo"])/tol))-1))
+                s["todo"] = SearchPoints(s["lo"], s["hi"], k)
+
+    results = []
+    for s in states:
+        cct = s["lo"]
+        if cct is not None and FaultTime is not None:
+            cct = cct-FaultTime
+        results.append({"name": s["fault"]["name"],
+                        "cct": cct,
+                        "stable": s["lo"],
+                        "unstable": s["hi"],
+                        "crit_gen": s["crit_gen"],
+                        "runs": s["runs"],
+                        "sim_time": s["sim_time"],
+                        "error": s["error"]})
+    return(results)
+
+def RunCCTSearch(faults: list, backend, ClearEvent: str, tmin: float, tmax: float, workers: int = None, **kwargs):
+    '''This function runs CCTSearch on a new ScreeningPool of the given backend (see OOSScreening.ScreeningPool for workers).'''
+
+    with OOSScreening.ScreeningPool(backend, workers) as pool:
+        return(CCTSearch(faults, pool, ClearEvent, tmin, tmax, **kwargs))
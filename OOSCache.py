@@ -0,0 +1,230 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Persistent on-disk cache of the outcomes of simulated contingencies, so that repeated study sessions don't rerun
+identical cases. A case is keyed by the hash of everything its outcome depends on: the in-service machines and the parameters
+of their types, the configuration of the detector and the event definitions of the case. Every entry holds the outcome (a row
+of the screening table) and the compact (float32) comulative angle trajectory. The cache is bounded in size, the least
+recently used entries are evicted first. Every entry is a separate file, written atomically, so several worker processes can
+share one cache directory. Requires numpy.
+
+usage:
+    backend = OOSCache.CachedBackend(OOSScreening.PowerFactoryBackend(...), "oos_cache", MaxBytes=2e9)
+    rows = OOSScreening.RunScreening(cases, backend, workers=4)
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+#default size bound of the cache [bytes]
+DefaultMaxBytes = 1e9
+#share of MaxBytes the cache is evicted down to, so that the cache directory isn't scanned again on every following entry
+EvictRatio = 0.9
+
+#support functions
+
+def JSONDefault(value):
+    '''This function converts the values that json can't serialize: numpy arrays to lists, numpy scalars to python values and
+       other objects (e.g. powerfactory objects) to strings.'''
+
+    if isinstance(value, np.ndarray):
+        return(value.tolist())
+    if isinstance(value, np.generic):
+        return(value.item())
+    return(str(value))
+
+def CacheKey(*parts):
+    '''This function returns the hash of the given parts, which should be json serializable (see JSONDefault).'''
+
+    content = json.dumps(parts, sort_keys=True, default=JSONDefault)
+    return(hashlib.sha1(content.encode()).hexdigest())
+
+def CaseKey(case: dict):
+    '''This function returns the part of a contingency that its outcome depends on (everything but its name).'''
+
+    return({k: v for k,v in case.items() if k != "name"})
+
+#main functions
+
+class ResultCache:
+    '''Cache directory with one .npz file per entry. The access time of an entry is its modification time, which is renewed
+       on every hit, so the oldest files are the least recently used ones. The access times and sizes of the entries are kept
+       in an in-memory index, which is read from the directory the first time it is needed and then kept up to date by this
+       object. The entries of other processes sharing the directory are found, when the directory is scanned again before
+       an eviction.'''
+
+    def __init__(self, path: str, MaxBytes: float = DefaultMaxBytes):
+        assert MaxBytes > 0, "MaxBytes should be bigger than 0."
+
+        self.path = path
+        self.MaxBytes = MaxBytes
+        self.hits = 0
+        self.misses = 0
+        #structure of each index entry: path: (access time, size)
+        self.index = None
+        self.size = 0
+        os.makedirs(path, exist_ok=True)
+
+    def File(self, key: str):
+        return(os.path.join(self.path,key+".npz"))
+
+    def Get(self, key: str):
+        '''This function returns the stored outcome (with the trajectory t and angles, if they were stored) of the given key,
+           or None if it isn't in the cache.'''
+
+        path = self.File(key)
+        try:
+            with np.load(path) as data:
+                outcome = json.loads(str(data["outcome"]))
+                if "angles" in data:
+                    outcome["t"] = data["t"]
+                    outcome["angles"] = data["angles"]
+            now = time.time()
+            os.utime(path, (now,now))
+            self.Track(path, now, self.Index()[path][1] if path in self.Index() else os.path.getsize(path))
+        except (OSError, ValueError, KeyError):
+            self.Untrack(path)
+            self.misses += 1
+            return(None)
+        self.hits += 1
+        return(outcome)
+
+    def Put(self, key: str, outcome: dict):
+        '''This function stores the outcome of the given key, its trajectory (t and angles), if given, is stored as float32.
+           The least recently used entries are evicted, if the cache grows above MaxBytes.'''
+
+        outcome = dict(outcome)
+        arrays = {}
+        if outcome.get("angles") is not None:
+            arrays["t"] = np.asarray(outcome.pop("t"), dtype=np.float32)
+            arrays["angles"] = np.asarray(outcome.pop("angles"), dtype=np.float32)
+        outcome.pop("t", None)
+        outcome.pop("angles", None)
+
+        #the entry is written to a temporary file first, so other processes never read a partly written entry
+        fd,tmp = tempfile.mkstemp(suffix=".npz", dir=self.path)
+        try:
+            with os.fdopen(fd,"wb") as f:
+                np.savez_compressed(f, outcome=json.dumps(outcome, default=JSONDefault), **arrays)
+            os.replace(tmp, self.File(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        stat = os.stat(self.File(key))
+        self.Track(self.File(key), stat.st_mtime, stat.st_size)
+        self.Evict()
+
+    def Entries(self):
+        '''This function scans the cache directory and returns the (access time, size, path) of every entry, from the least
+           recently used one on.'''
+
+        entries = []
+        for i in os.scandir(self.path):
+            if i.name.endswith(".npz") and not i.name.startswith("tmp"):
+                try:
+                    stat = i.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime,stat.st_size,i.path))
+        return(sorted(entries))
+
+    def Index(self):
+        '''This function returns the index of the entries, it is read from the cache directory if it wasn't yet.'''
+
+        if self.index is None:
+            self.index = {i[2]: (i[0],i[1]) for i in self.Entries()}
+            self.size = sum([i[1] for i in self.index.values()])
+        return(self.index)
+
+    def Track(self, path: str, mtime: float, nbytes: int):
+        '''This function adds the entry with the given access time and size to the index, or updates it.'''
+
+        index = self.Index()
+        if path in index:
+            self.size -= index[path][1]
+        index[path] = (mtime,nbytes)
+        self.size += nbytes
+
+    def Untrack(self, path: str):
+        '''This function removes the entry from the index.'''
+
+        entry = self.Index().pop(path, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def Size(self):
+        '''This function returns the total size of the indexed entries in bytes.'''
+
+        self.Index()
+        return(self.size)
+
+    def Evict(self):
+        '''This function deletes the least recently used entries, if the cache is bigger than MaxBytes, until it is not bigger
+           than EvictRatio*MaxBytes. The directory is only scanned again (for the entries that other processes added or
+           evicted) when the index grew above MaxBytes.'''
+
+        if self.Size() <= self.MaxBytes:
+            return
+        self.index = None
+        for mtime,nbytes,path in sorted([(v[0],v[1],k) for k,v in self.Index().items()]):
+            if self.size <= self.MaxBytes*EvictRatio:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.Untrack(path)
+
+    def Clear(self):
+        '''This function deletes all entries of the cache.'''
+
+        for i in self.Entries():
+            try:
+                os.remove(i[2])
+            except OSError:
+                pass
+        self.index = {}
+        self.size = 0
+
+class CachedBackend:
+    '''Screening backend (see OOSScreening) that takes the outcomes of the cases from a ResultCache and only runs the cases
+       that aren't in it on the given backend. The key of a case is the hash of the ModelKey() of the backend (after its
+       Setup) and the case without its name. If trajectories is False, only the outcomes are stored.'''
+
+    def __init__(self, backend, path: str, MaxBytes: float = DefaultMaxBytes, trajectories: bool = True):
+        self.backend = backend
+        self.path = path
+        self.MaxBytes = MaxBytes
+        self.trajectories = trajectories
+        self.cache = None
+        self.model = None
+
+    def Setup(self):
+        self.backend.Setup()
+        self.cache = ResultCache(self.path, self.MaxBytes)
+        self.model = CacheKey(self.backend.ModelKey())
+
+    def Run(self, case: dict):
+        key = CacheKey(self.model, CaseKey(case))
+        outcome = self.cache.Get(key)
+        if outcome is not None:
+            outcome["cached"] = True
+            return(outcome)
+
+        outcome = dict(self.backend.Run(case), cached=False)
+        stored = outcome if self.trajectories else {k: v for k,v in outcome.items() if k not in ["t","angles"]}
+        self.cache.Put(key, stored)
+        return(outcome)
+
+    def ModelKey(self):
+        return(self.backend.ModelKey())
+
+    def Close(self):
+        self.backend.Close()
@@ -0,0 +1,216 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: This module provides an in-memory stand-in for the parts of the powerfactory API that the OutOfStep module uses.
+It makes it possible to run and measure the OutOfStep functions without powerfactory. Every API call is counted and can be
+delayed by a configurable latency, to imitate the round-trips to a real powerfactory application.
+'''
+
+import time
+
+class FakeApp:
+    '''Stand-in for the powerfactory application. It holds the project folders and counts the API calls of all its objects.'''
+
+    def __init__(self, latency: float = 0.0):
+        assert latency >= 0, "latency should not be negative."
+
+        self.latency = latency
+        self.calls = {}
+        self.created = {}
+        self.project = FakeDataObject(self, "IntPrj", "Project", None)
+        self.folders = {"blk": self.project.CreateObject("IntPrjfolder","Dynamic Models"),
+                        "netdat": self.project.CreateObject("IntPrjfolder","Network Data"),
+                        "study": self.project.CreateObject("IntPrjfolder","Study Cases")}
+        self.study_case = self.folders["study"].CreateObject("IntCase","Study Case")
+        self.ResetCounters()
+
+    def Call(self, method: str):
+        '''This function counts one API call and waits for the configured latency.'''
+
+        self.calls[method] = self.calls.get(method,0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def ResetCounters(self):
+        '''This function resets the API call and created object counters.'''
+
+        self.calls = {}
+        self.created = {}
+
+    def CallCount(self):
+        '''This function returns the total number of API calls since the last reset.'''
+
+        return(sum(self.calls.values()))
+
+    def ActivateProject(self, name: str):
+        self.Call("ActivateProject")
+        return(0)
+
+    def GetActiveProject(self):
+        self.Call("GetActiveProject")
+        return(self.project)
+
+    def GetActiveStudyCase(self):
+        self.Call("GetActiveStudyCase")
+        return(self.study_case)
+
+    def GetProjectFolder(self, name: str):
+        self.Call("GetProjectFolder")
+        return(self.folders.get(name))
+
+    def GetCalcRelevantObjects(self, pattern: str = "*", includeOutOfService: int = 1):
+        self.Call("GetCalcRelevantObjects")
+        ClassName = pattern.split(".")[-1]
+        objs = []
+        for i in self.folders["netdat"].AllContents():
+            if i.cls == ClassName and (includeOutOfService or not i.attrs.get("outserv",0)):
+                objs.append(i)
+        return(objs)
+
+    def GetFromStudyCase(self, ClassName: str):
+        self.Call("GetFromStudyCase")
+        for i in self.study_case.children:
+            if i.cls == ClassName:
+                return(i)
+        return(self.study_case.CreateObject(ClassName,ClassName))
+
+class FakeDataObject:
+    '''Stand-in for a powerfactory DataObject. Attributes are kept in a dictionary, objects that are not set return 0.'''
+
+    def __init__(self, app: FakeApp, ClassName: str, name: str, parent):
+        self.__dict__["app"] = app
+        self.__dict__["cls"] = ClassName
+        self.__dict__["parent"] = parent
+        self.__dict__["children"] = []
+        self.__dict__["attrs"] = {"loc_name": name}
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        self.app.Call("getattr")
+        return(self.attrs.get(name,0))
+
+    def __setattr__(self, name: str, value):
+        self.app.Call("setattr")
+        self.attrs[name] = value
+
+    def __repr__(self):
+        return(self.attrs["loc_name"]+"."+self.cls)
+
+    def AllContents(self):
+        '''This function returns all objects below this one, without counting any API calls.'''
+
+        objs = []
+        for i in self.children:
+            objs.append(i)
+            objs.extend(i.AllContents())
+        return(objs)
+
+    def GetClassName(self):
+        self.app.Call("GetClassName")
+        return(self.cls)
+
+    def GetFullName(self):
+        self.app.Call("GetFullName")
+        obj = self
+        names = []
+        while obj is not None:
+            names.append(obj.attrs["loc_name"]+"."+obj.cls)
+            obj = obj.parent
+        return("\\".join(reversed(names)))
+
+    def GetParent(self):
+        self.app.Call("GetParent")
+        return(self.parent)
+
+    def GetContents(self, pattern: str = "*", recursive: int = 0):
+        self.app.Call("GetContents")
+        objs = self.AllContents() if recursive else list(self.children)
+        if pattern != "*":
+            name,_,ClassName = pattern.partition(".")
+            objs = [i for i in objs if (name in ["*",i.attrs["loc_name"]]) and (ClassName in ["","*",i.cls])]
+        return(objs)
+
+    def CreateObject(self, ClassName: str, name: str):
+        self.app.Call("CreateObject")
+        self.app.created[ClassName] = self.app.created.get(ClassName,0) + 1
+        obj = FakeDataObject(self.app, ClassName, name, self)
+        self.children.append(obj)
+        return(obj)
+
+    def AddCopy(self, obj, name: str):
+        self.app.Call("AddCopy")
+        copies = {}
+        copy = obj.CopyTree(self, copies)
+        copy.attrs["loc_name"] = name
+        for i in copies.values():
+            for key,value in i.attrs.items():
+                if isinstance(value, list):
+                    i.attrs[key] = [copies.get(id(j),j) for j in value]
+                else:
+                    i.attrs[key] = copies.get(id(value),value)
+        self.children.append(copy)
+        return(copy)
+
+    def CopyTree(self, parent, copies: dict):
+        '''This function copies this object and all objects below it under parent, without counting any API calls. The copies
+           are added to copies by the id of the original object.'''
+
+        self.app.created[self.cls] = self.app.created.get(self.cls,0) + 1
+        copy = FakeDataObject(self.app, self.cls, self.attrs["loc_name"], parent)
+        copy.attrs.update(self.attrs)
+        copies[id(self)] = copy
+        for i in self.children:
+            copy.children.append(i.CopyTree(copy, copies))
+        return(copy)
+
+    def Delete(self):
+        self.app.Call("Delete")
+        if self.parent is not None:
+            self.parent.children.remove(self)
+        return(0)
+
+    def SetAttribute(self, name: str, value):
+        self.app.Call("SetAttribute")
+        self.attrs[name] = value
+
+    def GetAttribute(self, name: str):
+        self.app.Call("GetAttribute")
+        return(self.attrs.get(name,0))
+
+    def Execute(self):
+        self.app.Call("Execute")
+        return(0)
+
+    def Activate(self):
+        self.app.Call("Activate")
+        if self.cls == "IntCase":
+            self.app.study_case = self
+        return(0)
+
+def CreateFakeGrid(app: FakeApp, n: int, GridName: str = "Grid"):
+    '''This function creates a grid with n in-service synchronous machines (G1...Gn) and their machine types in the given
+       fake application and returns the grid, the dynamic model folder and the list of machines. The API calls made while
+       building the grid are not counted.'''
+
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+
+    latency = app.latency
+    app.latency = 0.0
+
+    grid = app.folders["netdat"].CreateObject("ElmNet",GridName)
+    TypFolder = app.folders["netdat"].CreateObject("IntPrjfolder","Types "+GridName)
+    sGens = []
+    for i in range(1,n+1):
+        Typ = TypFolder.CreateObject("TypSym","TypG"+str(i))
+        Typ.SetAttribute("h",2.0+(i%7))
+        Typ.SetAttribute("sgn",100.0+10*(i%13))
+        Gen = grid.CreateObject("ElmSym","G"+str(i))
+        Gen.SetAttribute("typ_id",Typ)
+        Gen.SetAttribute("outserv",0)
+        sGens.append(Gen)
+
+    app.latency = latency
+    app.ResetCounters()
+    return grid,app.folders["blk"],sGens
@@ -0,0 +1,354 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Serializable plans of the out of step instrumentation of a model. A plan is the declarative list of all objects
+that CreateComAngBatch and CreateOOSDet create (the BlkDef types, their slots and signals, the angle adder and detector
+Frames with their blocks and pelm lists), with their attributes, and references between them. It is computed offline, by
+running the OutOfStep functions on the in-memory stand-in OOSFakePF, so it needs no powerfactory, and can be saved as JSON. A
+plan can be diffed against a live project, and applied in one ordered pass that only creates the missing objects and sets
+the attributes that differ. A dry run reports the numbers of the objects and API calls, without changing the project.
+
+usage:
+    plan = OOSPlan.BuildPlan(["G1","G2","G3"], "OOSFrm", topology="tree")
+    OOSPlan.SavePlan(plan, "oos_plan.json")
+    ...
+    plan = OOSPlan.LoadPlan("oos_plan.json")
+    print(OOSPlan.ApplyPlan(plan, app, dyn_folder, grid, dry_run=True))
+    OOSPlan.ApplyPlan(plan, app, dyn_folder, grid)
+'''
+
+import json
+
+import OOSFakePF
+import OutOfStep
+
+#format version of the plans
+PlanVersion = 1
+
+#ids of the objects the plans are built on (anchors), the machines are referenced as "gen\\name.ElmSym"
+Anchors = ["blk","grid","gen"]
+
+#support functions
+
+def ObjId(parent: str, name: str, ClassName: str):
+    '''This function returns the id of a plan object, which is its path from the anchor, like the full name in powerfactory.'''
+
+    return(parent+"\\"+name+"."+ClassName)
+
+def IsRef(value):
+    return(type(value) == dict and "ref" in value)
+
+def Refs(value):
+    '''This function returns the ids of the objects the given attribute value of a plan object refers to.'''
+
+    if IsRef(value):
+        return([value["ref"]])
+    if type(value) == list:
+        return([i["ref"] for i in value if IsRef(i)])
+    return([])
+
+def EncodeValue(value, ids: dict):
+    '''This function returns the JSON form of an attribute value of a stand-in object: objects are replaced by references
+       {"ref": id}, the ids are taken from ids (by the id() of the object).'''
+
+    if type(value) in [list,tuple]:
+        return([EncodeValue(i, ids) for i in value])
+    if isinstance(value, OOSFakePF.FakeDataObject):
+        return({"ref": ids[id(value)]})
+    return(value)
+
+def DecodeValue(value, live: dict):
+    '''This function returns the attribute value of a plan object with the references replaced by the objects in live.'''
+
+    if IsRef(value):
+        return(live[value["ref"]])
+    if type(value) == list:
+        return([DecodeValue(i, live) for i in value])
+    return(value)
+
+def SameValue(current, value):
+    '''This function compares the current value of an attribute with the decoded plan value.'''
+
+    if type(value) == list:
+        current = list(current) if isinstance(current, (list,tuple)) else [current]
+        return(len(current) == len(value) and all([SameValue(i,j) for i,j in zip(current,value)]))
+    return(current == value)
+
+def OrderObjects(objects: list):
+    '''This function sorts the plan objects so that every object comes after its parent and after the objects its
+       attributes refer to, except its own descendants (e.g. the blocks in the pelm list of a Frame), otherwise the order
+       is kept.'''
+
+    byid = {i["id"]: i for i in objects}
+    ordered = []
+    visited = set()
+
+    def visit(obj):
+        if obj["id"] in visited:
+            return
+        visited.add(obj["id"])
+        deps = [obj["parent"]]
+        for value in obj["attrs"].values():
+            deps = deps + [i for i in Refs(value) if not i.startswith(obj["id"]+"\\")]
+        for i in deps:
+            if i in byid:
+                visit(byid[i])
+        ordered.append(obj)
+
+    for obj in objects:
+        visit(obj)
+    return(ordered)
+
+def SnapshotCaches():
+    '''This function returns copies of the caches of the OutOfStep module and clears them.'''
+
+    caches = [OutOfStep.NameIndex, OutOfStep.TemplateRegistry, OutOfStep.OOSDetLayoutCache, OutOfStep.TypDataCache]
+    snapshot = [dict(i) for i in caches]
+    for i in caches:
+        i.clear()
+    return(snapshot)
+
+def RestoreCaches(snapshot: list):
+    caches = [OutOfStep.NameIndex, OutOfStep.TemplateRegistry, OutOfStep.OOSDetLayoutCache, OutOfStep.TypDataCache]
+    for cache,saved in zip(caches,snapshot):
+        cache.clear()
+        cache.update(saved)
+
+def GetLiveMachines(app, plan: dict):
+    '''This function returns the machines the plan refers to by their ids, with one GetCalcRelevantObjects call.'''
+
+    needed = set()
+    for obj in plan["objects"]:
+        for value in obj["attrs"].values():
+            needed.update([i for i in Refs(value) if i.startswith("gen\\")])
+    if not needed:
+        return({})
+
+    live = {}
+    for Gen in app.GetCalcRelevantObjects("*.ElmSym",includeOutOfService = 1):
+        key = ObjId("gen", Gen.loc_name, "ElmSym")
+        if key in needed:
+            live.setdefault(key, Gen)
+    missing = sorted(needed-set(live))
+    if missing:
+        raise Exception("Machines "+", ".join([i[4:-7] for i in missing])+" of the plan don't exist in the project.")
+    return(live)
+
+#main functions
+
+def BuildPlan(sGens, OOSFrmName: str = "OOSFrm", topology: str = "chain", TripAngle: float = 180, AlarmAngle: float = None,
+              horizon: float = 0, method: str = "delay", FrmPrefix: str = "AngleAdder"):
+    '''This function computes the plan of the angle adders (see CreateComAngBatch) of the given machines and of the
+       out-of-step detector OOSFrmName (see CreateOOSDet) over them, without powerfactory. sGens are the names of the
+       machines, a list of machines or a GeneratorRegistry (see OOSRegistry), the machines are referenced by their names.
+       The objects are created by the OutOfStep functions in the stand-in OOSFakePF, so the plan holds exactly the objects
+       that the functions would create in an empty project. The caches of the OutOfStep module are left as they were.'''
+
+    if hasattr(sGens,"InService"):
+        sGens = list(sGens.names[sGens.InService()])
+    assert type(sGens) == list, "sGens should be list not "+str(type(sGens))
+    names = [i if type(i) == str else i.loc_name for i in sGens]
+    assert len(set(names)) == len(names), "The names of the machines should be unique."
+
+    snapshot = SnapshotCaches()
+    try:
+        app = OOSFakePF.FakeApp()
+        grid = app.folders["netdat"].CreateObject("ElmNet","Grid")
+        TypFolder = app.folders["blk"]
+        sFakeGens = [grid.CreateObject("ElmSym",i) for i in names]
+
+        sGenAng = OutOfStep.CreateComAngBatch(sFakeGens, TypFolder, grid, FrmPrefix, method)
+        OutOfStep.CreateOOSDet(OOSFrmName, TypFolder, grid, [i[1] for i in sGenAng], topology, False, TripAngle,
+                               AlarmAngle, horizon)
+    finally:
+        RestoreCaches(snapshot)
+
+    #ids of all stand-in objects
+    ids = {id(TypFolder): "blk", id(grid): "grid"}
+    for Gen in sFakeGens:
+        ids[id(Gen)] = ObjId("gen", Gen.attrs["loc_name"], "ElmSym")
+    sObjs = []
+    for anchor,root in [("blk",TypFolder),("grid",grid)]:
+        stack = [(anchor,i) for i in root.children if id(i) not in ids]
+        while stack:
+            parent,obj = stack.pop(0)
+            ids[id(obj)] = ObjId(parent, obj.attrs["loc_name"], obj.cls)
+            sObjs.append((parent,obj))
+            stack = [(ids[id(obj)],i) for i in obj.children] + stack
+
+    objects = []
+    for parent,obj in sObjs:
+        attrs = {k: EncodeValue(v, ids) for k,v in obj.attrs.items() if k != "loc_name"}
+        objects.append({"id": ids[id(obj)], "parent": parent, "class": obj.cls, "name": obj.attrs["loc_name"], "attrs": attrs})
+
+    return({"version": PlanVersion,
+            "config": {"machines": names, "OOSFrmName": OOSFrmName, "topology": topology, "TripAngle": TripAngle,
+                       "AlarmAngle": AlarmAngle, "horizon": horizon, "method": method, "FrmPrefix": FrmPrefix},
+            "objects": OrderObjects(objects)})
+
+def SavePlan(plan: dict, path: str):
+    '''This function saves the plan as a JSON file.'''
+
+    with open(path,"w") as f:
+        json.dump(plan, f, indent=1)
+
+def LoadPlan(path: str):
+    '''This function loads a plan from a JSON file.'''
+
+    with open(path) as f:
+        plan = json.load(f)
+    assert plan.get("version") == PlanVersion, "Plan version "+str(plan.get("version"))+" is not supported."
+    return(plan)
+
+def PlanSummary(plan: dict):
+    '''This function returns the number of objects of every class in the plan, and the number of API calls needed to build
+       it in an empty project (one CreateObject per object and one SetAttribute per attribute).'''
+
+    classes = {}
+    nattrs = 0
+    for obj in plan["objects"]:
+        classes[obj["class"]] = classes.get(obj["class"],0) + 1
+        nattrs += len(obj["attrs"])
+    return({"objects": len(plan["objects"]), "classes": classes,
+            "calls": {"CreateObject": len(plan["objects"]), "SetAttribute": nattrs}})
+
+def DiffPlan(plan: dict, app, TypFolder, grid):
+    '''This function compares the plan with the live project, with TypFolder and grid as the anchors "blk" and "grid" of
+       the plan. Every object is looked up by its name and class in its parent, the objects under a missing parent are
+       missing without being looked up. It returns a dictionary with:
+       create - the ids of the missing objects,
+       update - the ids of the existing objects with the names of their attributes that differ from the plan,
+       equal - the ids of the existing objects that are the same as in the plan,
+       delete - the ids of the blocks inside the updated Frames (ElmComp) that aren't in the plan,
+       live - the live objects by their ids (including the anchors and the machines),
+       reads - the number of API calls made by the diff, by API method.'''
+
+    assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+
+    reads = {"GetCalcRelevantObjects": 0, "GetContents": 0, "GetAttribute": 0}
+    live = GetLiveMachines(app, plan)
+    reads["GetCalcRelevantObjects"] = 1 if live else 0
+    live.update({"blk": TypFolder, "grid": grid})
+
+    create = []
+    update = {}
+    equal = []
+    #attributes that refer to objects after their object in the plan, they are compared after the first pass
+    later = []
+    for obj in plan["objects"]:
+        parent = live.get(obj["parent"])
+        current = None
+        if parent is not None:
+            found = parent.GetContents(obj["name"]+"."+obj["class"])
+            reads["GetContents"] += 1
+            if len(found) > 0:
+                current = found[0]
+        if current is None:
+            create.append(obj["id"])
+            continue
+
+        live[obj["id"]] = current
+        for attr,value in obj["attrs"].items():
+            if any([i not in live for i in Refs(value)]):
+                later.append((obj,attr))
+                continue
+            reads["GetAttribute"] += 1
+            if not SameValue(current.GetAttribute(attr), DecodeValue(value, live)):
+                update.setdefault(obj["id"],[]).append(attr)
+
+    for obj,attr in later:
+        value = obj["attrs"][attr]
+        if any([i not in live for i in Refs(value)]):
+            update.setdefault(obj["id"],[]).append(attr)
+            continue
+        reads["GetAttribute"] += 1
+        if not SameValue(live[obj["id"]].GetAttribute(attr), DecodeValue(value, live)):
+            update.setdefault(obj["id"],[]).append(attr)
+
+    equal = [i for i in plan["objects"] if i["id"] in live and i["id"] not in update]
+    equal = [i["id"] for i in equal]
+
+    #blocks of a Frame that was changed, which the plan doesn't have anymore (e.g. after the number of angles changed)
+    ids = set([i["id"] for i in plan["objects"]])
+    delete = []
+    for obj in plan["objects"]:
+        if obj["class"] == "ElmComp" and obj["id"] in update:
+            reads["GetContents"] += 1
+            for i in live[obj["id"]].GetContents():
+                key = ObjId(obj["id"], i.loc_name, i.GetClassName())
+                if key not in ids:
+                    live[key] = i
+                    delete.append(key)
+
+    return({"create": create, "update": update, "equal": equal, "delete": delete, "live": live, "reads": reads})
+
+def ApplyPlan(plan: dict, app, TypFolder, grid, dry_run: bool = False):
+    '''This function brings the live project to the state of the plan in one ordered pass (see DiffPlan): the missing
+       objects are created, and only the attributes that differ from the plan are set. Attributes that refer to objects
+       created later in the pass (e.g. the pelm list of a Frame) are set at the end of the pass. The blocks of the changed
+       Frames that aren't in the plan are deleted, other objects that aren't in the plan are not changed. Existing objects
+       with the names of the plan objects are changed to the plan (e.g. the equations of a BlockTyp). With dry_run the
+       project is not changed. It returns a dictionary with:
+       objects - the number of objects in the plan, created - the number of created objects by class,
+       updated - the number of updated objects, equal - the number of objects that were already as in the plan,
+       deleted - the number of deleted blocks,
+       calls - the number of API calls by API method (reads of the diff, CreateObject, SetAttribute and Delete).'''
+
+    diff = DiffPlan(plan, app, TypFolder, grid)
+    live = diff["live"]
+    create = set(diff["create"])
+    known = set(live)
+
+    created = {}
+    writes = {"CreateObject": 0, "SetAttribute": 0, "Delete": 0}
+    pending = []
+
+    for i in diff["delete"]:
+        writes["Delete"] += 1
+        if not dry_run:
+            OutOfStep.DeleteIndexedObject(live[i.rsplit("\\",1)[0]], live.pop(i))
+
+    def SetAttrs(obj, attrs: list):
+        for attr in attrs:
+            value = obj["attrs"][attr]
+            if any([i not in known for i in Refs(value)]):
+                pending.append((obj,attr))
+                continue
+            writes["SetAttribute"] += 1
+            if not dry_run:
+                live[obj["id"]].SetAttribute(attr, DecodeValue(value, live))
+
+    for obj in plan["objects"]:
+        if obj["id"] in create:
+            writes["CreateObject"] += 1
+            created[obj["class"]] = created.get(obj["class"],0) + 1
+            if not dry_run:
+                parent = live[obj["parent"]]
+                if obj["parent"] in Anchors:
+                    live[obj["id"]] = OutOfStep.CreateIndexedObject(parent, obj["class"], obj["name"])
+                else:
+                    live[obj["id"]] = parent.CreateObject(obj["class"], obj["name"])
+            known.add(obj["id"])
+            SetAttrs(obj, list(obj["attrs"]))
+        else:
+            SetAttrs(obj, diff["update"].get(obj["id"],[]))
+
+    for obj,attr in pending:
+        writes["SetAttribute"] += 1
+        if not dry_run:
+            live[obj["id"]].SetAttribute(attr, DecodeValue(obj["attrs"][attr], live))
+
+    if not dry_run and (create or diff["update"] or diff["delete"]):
+        OutOfStep.InvalidateTemplateRegistry(TypFolder)
+        OutOfStep.InvalidateOOSDetLayout()
+
+    calls = dict(diff["reads"])
+    calls.update(writes)
+    return({"objects": len(plan["objects"]),
+            "created": created,
+            "updated": len(diff["update"]),
+            "equal": len(diff["equal"]),
+            "deleted": len(diff["delete"]),
+            "calls": calls})
@@ -0,0 +1,226 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: This module provides opt-in profiling of the powerfactory API calls made by the OutOfStep module. The objects given
+to the OutOfStep functions are wrapped, so that every API call is counted and timed per API method and per OutOfStep function
+that made it. The results are returned as a dictionary (or JSON), which shows where the construction and post-processing time
+of a model goes.
+
+usage:
+    profiler = OOSProfile.APIProfiler()
+    profiler.Install()                      #profile the OutOfStep entry points
+    ... run OutOfStep functions ...
+    profiler.Uninstall()
+    print(profiler.ToJSON())
+'''
+
+import json
+import sys
+import time
+
+import OutOfStep
+
+#OutOfStep functions that wrap their arguments when the profiler is installed
+EntryPoints = ["CreateOOSDet",
+               "CreateOOSDetHierarchical",
+               "UpdateOOSArea",
+               "CreateComAng",
+               "CreateComAngBatch",
+               "EnableComElm",
+               "DisableComElm",
+               "DetectCritGenerator",
+               "DetectCritGeneratorTrajectory",
+               "DetectCoherentGroups",
+               "AddComAngToRes"]
+
+#code objects of comprehensions and generator expressions, the calls made in them are recorded for the enclosing function
+Comprehensions = ["<listcomp>","<dictcomp>","<setcomp>","<genexpr>"]
+
+class APIProfiler:
+    '''Collects the number of calls and the cumulative time of every API method, per OutOfStep function that made the call.'''
+
+    def __init__(self):
+        #structure of each entry: (function, method): [calls, time]
+        self.stats = {}
+        self.proxies = {}
+        self.originals = {}
+        #number of profiled functions on the stack, see Call
+        self.depth = 0
+
+    def Reset(self):
+        '''This function clears the collected statistics and the proxies.'''
+
+        self.stats = {}
+        self.proxies = {}
+
+    def Record(self, method: str, duration: float):
+        '''This function records one API call, the calling function is the innermost OutOfStep function on the stack
+           (comprehensions and generator expressions are skipped).'''
+
+        frame = sys._getframe(2)
+        caller = "<user>"
+        while frame is not None:
+            if frame.f_globals.get("__name__") == "OutOfStep" and frame.f_code.co_name not in Comprehensions:
+                caller = frame.f_code.co_name
+                break
+            frame = frame.f_back
+
+        entry = self.stats.setdefault((caller,method),[0,0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    def Wrap(self, value):
+        '''This function returns the profiled proxy of the given DataObject (lists and tuples are wrapped element by element),
+           other values are returned unchanged. Every DataObject gets the same proxy until the profiler is reset or
+           uninstalled.'''
+
+        if isinstance(value, ProfiledObject):
+            return(value)
+        if isinstance(value, list):
+            return([self.Wrap(i) for i in value])
+        if isinstance(value, tuple):
+            return(tuple(self.Wrap(i) for i in value))
+        if isinstance(value, dict):
+            return({k: self.Wrap(v) for k,v in value.items()})
+        if hasattr(type(value),"GetClassName"):
+            proxy = self.proxies.get(id(value))
+            if proxy is None:
+                proxy = ProfiledObject(value, self)
+                self.proxies[id(value)] = proxy
+            return(proxy)
+        return(value)
+
+    def Call(self, func, *args, **kwargs):
+        '''This function calls func with profiled arguments. Its result is returned with the proxies unwrapped again, if func
+           was called from outside of the profiled functions, otherwise (e.g. CreateOOSDet called by UpdateOOSDet) it is
+           returned profiled, so that the calls made on it by the calling function are recorded too.'''
+
+        self.depth += 1
+        try:
+            result = func(*self.Wrap(list(args)), **{k: self.Wrap(v) for k,v in kwargs.items()})
+        finally:
+            self.depth -= 1
+        if self.depth > 0:
+            return(self.Wrap(result))
+        return(Unwrap(result))
+
+    def Install(self):
+        '''This function replaces the OutOfStep entry points with versions that profile their arguments.'''
+
+        for name in EntryPoints:
+            if name in self.originals:
+                continue
+            func = getattr(OutOfStep, name)
+            self.originals[name] = func
+            setattr(OutOfStep, name, self.Profiled(func))
+        #the caches should hold the profiled objects while profiling and the original ones afterwards
+        OutOfStep.InvalidateCaches()
+
+    def Uninstall(self):
+        '''This function restores the original OutOfStep entry points.'''
+
+        for name,func in self.originals.items():
+            setattr(OutOfStep, name, func)
+        self.originals = {}
+        self.proxies = {}
+        OutOfStep.InvalidateCaches()
+
+    def Profiled(self, func):
+        '''This function returns func with profiled arguments.'''
+
+        def profiled(*args, **kwargs):
+            return(self.Call(func, *args, **kwargs))
+        profiled.__name__ = func.__name__
+        profiled.__doc__ = func.__doc__
+        return(profiled)
+
+    def Summary(self):
+        '''This function returns the collected statistics as a dictionary with the totals, the statistics per API method and
+           the statistics per OutOfStep function (with its API methods).'''
+
+        summary = {"total": {"calls": 0, "time": 0.0}, "methods": {}, "functions": {}}
+        for (caller,method),(calls,duration) in sorted(self.stats.items()):
+            summary["total"]["calls"] += calls
+            summary["total"]["time"] += duration
+
+            m = summary["methods"].setdefault(method,{"calls": 0, "time": 0.0})
+            m["calls"] += calls
+            m["time"] += duration
+
+            f = summary["functions"].setdefault(caller,{"calls": 0, "time": 0.0, "methods": {}})
+            f["calls"] += calls
+            f["time"] += duration
+            f["methods"][method] = {"calls": calls, "time": duration}
+        return(summary)
+
+    def ToJSON(self, path: str = None):
+        '''This function returns the summary as a JSON string and writes it to path, if it is given.'''
+
+        text = json.dumps(self.Summary(), indent=1)
+        if path is not None:
+            with open(path,"w") as f:
+                f.write(text)
+        return(text)
+
+class ProfiledObject:
+    '''Proxy of a powerfactory DataObject, that records every API call made through it. It compares equal to (and has the
+       hash of) its DataObject, so comparisons of the objects in the OutOfStep functions don't depend on the proxies.'''
+
+    def __init__(self, obj, profiler: APIProfiler):
+        self.__dict__["_obj"] = obj
+        self.__dict__["_profiler"] = profiler
+
+    def __getattr__(self, name: str):
+        start = time.perf_counter()
+        value = getattr(self._obj, name)
+        if callable(value):
+            return(ProfiledMethod(value, name, self._profiler))
+        self._profiler.Record("getattr", time.perf_counter()-start)
+        return(self._profiler.Wrap(value))
+
+    def __setattr__(self, name: str, value):
+        start = time.perf_counter()
+        setattr(self._obj, name, Unwrap(value))
+        self._profiler.Record("setattr", time.perf_counter()-start)
+
+    def __repr__(self):
+        return(repr(self._obj))
+
+    def __eq__(self, other):
+        return(self._obj == Unwrap(other))
+
+    def __ne__(self, other):
+        return(self._obj != Unwrap(other))
+
+    def __hash__(self):
+        return(hash(self._obj))
+
+class ProfiledMethod:
+    '''A method of a profiled DataObject, the arguments are unwrapped and the results wrapped.'''
+
+    def __init__(self, method, name: str, profiler: APIProfiler):
+        self.method = method
+        self.name = name
+        self.profiler = profiler
+
+    def __call__(self, *args, **kwargs):
+        args = [Unwrap(i) for i in args]
+        kwargs = {k: Unwrap(v) for k,v in kwargs.items()}
+        start = time.perf_counter()
+        value = self.method(*args, **kwargs)
+        self.profiler.Record(self.name, time.perf_counter()-start)
+        return(self.profiler.Wrap(value))
+
+def Unwrap(value):
+    '''This function returns the original DataObject of a profiled proxy (lists and tuples are unwrapped element by element).'''
+
+    if isinstance(value, ProfiledObject):
+        return(value._obj)
+    if isinstance(value, list):
+        return([Unwrap(i) for i in value])
+    if isinstance(value, tuple):
+        return(tuple(Unwrap(i) for i in value))
+    if isinstance(value, dict):
+        return({k: Unwrap(v) for k,v in value.items()})
+    return(value)
@@ -0,0 +1,194 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Array-backed registry of the synchronous machines of the active study case. It is built from a single
+GetCalcRelevantObjects call and holds numpy columns with the name, the inertia constant H, the rated power Sn, the inertia
+weight H*Sn/Sb, the grid (area), the service state and the handles of the machine, of its comulative angle adder Frame and of
+the adder block. The construction functions of the OutOfStep module (CreateComAngBatch, CreateOOSDet, UpdateOOSDet,
+AreasByGrid, CreateOOSDetHierarchical) and the centre of inertia computations (DetectCritGenerator,
+DetectCritGeneratorTrajectory, DetectCoherentGroups, AddComAngToRes) take the registry instead of the [Generator, Frame] lists
+and use its columns instead of reading the machines and their types through the powerfactory API. Refresh updates only the
+machines that were added, or went out of or back into service. Requires numpy.
+
+usage:
+    registry = OOSRegistry.GeneratorRegistry(app)
+    OutOfStep.CreateComAngBatch(registry, dyn_folder, grid)
+    OutOfStep.CreateOOSDet("OOSFrm", dyn_folder, grid, registry)
+    ... RMS simulation ...
+    max_dist_gen = OutOfStep.DetectCritGenerator(registry)
+'''
+
+import numpy as np
+
+import OutOfStep
+
+#support functions
+
+def ObjectArray(values: list):
+    '''This function returns a numpy array of the given objects (e.g. powerfactory objects), without numpy looking into them.'''
+
+    arr = np.empty(len(values), dtype=object)
+    for i,value in enumerate(values):
+        arr[i] = value
+    return(arr)
+
+#main functions
+
+class GeneratorRegistry:
+    '''Registry of the synchronous machines of the active study case. Every machine that was ever in service has one entry
+       (row), the entries are never removed, so their indices stay valid. The columns are numpy arrays:
+       names - the names of the machines,
+       H, Sn - the inertia constants and the rated powers of their types, weights - H*Sn/Sb,
+       grids - the grids of the machines, area - the index of the grid in sGrids,
+       in_service - whether the machine was in service at the last Refresh,
+       gens, frames, blocks - the handles of the machines, of their angle adder Frames and of the adder blocks (None if the
+       machine has no angle adder, see CreateComAngBatch).'''
+
+    def __init__(self, app, Sb: float = 100):
+        assert Sb > 0, "Sb should be bigger than 0."
+
+        self.app = app
+        self.Sb = Sb
+        self.index = {}
+        self.sGrids = []
+        self.names = np.empty(0, dtype=object)
+        self.H = np.empty(0)
+        self.Sn = np.empty(0)
+        self.weights = np.empty(0)
+        self.grids = np.empty(0, dtype=object)
+        self.area = np.empty(0, dtype=int)
+        self.in_service = np.empty(0, dtype=bool)
+        self.gens = np.empty(0, dtype=object)
+        self.frames = np.empty(0, dtype=object)
+        self.blocks = np.empty(0, dtype=object)
+        self.Refresh()
+
+    def __len__(self):
+        return(int(self.in_service.sum()))
+
+    def Refresh(self, types: bool = False):
+        '''This function updates the registry to the in-service machines of the active study case, with a single
+           GetCalcRelevantObjects call. Only the entries of the machines that were added, or went out of or back into service
+           are read. If types is True, the data of the machine types of all in-service machines is read again (after the
+           types were edited). It returns the indices of the changed entries.'''
+
+        sGens = list(self.app.GetCalcRelevantObjects("*.ElmSym",includeOutOfService = 0))
+        seen = np.zeros(len(self.gens), dtype=bool)
+        sNew = []
+        for Gen in sGens:
+            key = Gen.GetFullName()
+            i = self.index.get(key)
+            if i is None:
+                self.index[key] = len(self.gens)+len(sNew)
+                sNew.append(Gen)
+            else:
+                seen[i] = True
+                self.gens[i] = Gen
+
+        changed = np.flatnonzero(seen != self.in_service)
+        self.in_service = seen
+        if types:
+            OutOfStep.InvalidateTypDataCache()
+            reread = np.flatnonzero(seen)
+        else:
+            reread = changed[seen[changed]]
+        for i in reread:
+            self.H[i],self.Sn[i] = OutOfStep.GetTypData(self.gens[i])
+
+        if sNew:
+            self.Append(sNew)
+        self.weights = self.H*self.Sn/self.Sb
+
+        return(np.concatenate([changed,np.arange(len(self.gens)-len(sNew),len(self.gens))]).astype(int))
+
+    def Append(self, sGens: list):
+        '''This function adds entries for the given in-service machines.'''
+
+        n = len(sGens)
+        TypData = np.asarray([OutOfStep.GetTypData(i) for i in sGens], dtype=float).reshape(n,2)
+        sGridObjs = []
+        area = []
+        for Gen in sGens:
+            grid = Gen.GetAttribute("cpGrid") or Gen.GetParent()
+            key = grid.GetFullName()
+            for j,i in enumerate(self.sGrids):
+                if i[0] == key:
+                    break
+            else:
+                j = len(self.sGrids)
+                self.sGrids.append([key,grid])
+            sGridObjs.append(self.sGrids[j][1])
+            area.append(j)
+
+        self.names = np.concatenate([self.names,ObjectArray([i.loc_name for i in sGens])])
+        self.H = np.concatenate([self.H,TypData[:,0]])
+        self.Sn = np.concatenate([self.Sn,TypData[:,1]])
+        self.grids = np.concatenate([self.grids,ObjectArray(sGridObjs)])
+        self.area = np.concatenate([self.area,np.asarray(area, dtype=int)])
+        self.in_service = np.concatenate([self.in_service,np.ones(n, dtype=bool)])
+        self.gens = np.concatenate([self.gens,ObjectArray(sGens)])
+        self.frames = np.concatenate([self.frames,np.full(n, None, dtype=object)])
+        self.blocks = np.concatenate([self.blocks,np.full(n, None, dtype=object)])
+
+    def InService(self):
+        '''This function returns the indices of the in-service entries.'''
+
+        return(np.flatnonzero(self.in_service))
+
+    def Generators(self):
+        '''This function returns the list of the in-service machines.'''
+
+        return(list(self.gens[self.InService()]))
+
+    def SetFrames(self, sGenAng: list):
+        '''This function sets the angle adder Frames of the machines of the given [Generator, Frame] entries (see
+           CreateComAngBatch), the machines should be the ones of the registry. The machines are matched by their full names,
+           because powerfactory returns a new wrapper of the same machine on every access (and Refresh replaces them).'''
+
+        for Gen,Frm in sGenAng:
+            i = self.index.get(Gen.GetFullName())
+            assert i is not None, "Machine "+Gen.loc_name+" is not in the registry."
+            if self.frames[i] is None or self.frames[i] != Frm:
+                self.frames[i] = Frm
+                self.blocks[i] = None
+
+    def Active(self):
+        '''This function returns the indices of the in-service entries, all of which should have an angle adder.'''
+
+        idx = self.InService()
+        missing = [self.names[i] for i in idx if self.frames[i] is None]
+        assert len(missing) == 0, "Machines "+", ".join(missing)+" don't have an angle adder, see CreateComAngBatch."
+        return(idx)
+
+    def Frames(self):
+        '''This function returns the list of the angle adder Frames of the in-service machines.'''
+
+        return(list(self.frames[self.Active()]))
+
+    def GenAng(self):
+        '''This function returns the [Generator, Frame] entries of the in-service machines, as returned by
+           CreateComAngBatch.'''
+
+        idx = self.Active()
+        return([[self.gens[i],self.frames[i]] for i in idx])
+
+    def AngleData(self):
+        '''This function returns the machines, the angle adder blocks, the inertia constants and the rated powers of the
+           in-service machines. The adder blocks are looked up only once per Frame.'''
+
+        idx = self.Active()
+        for i in idx:
+            if self.blocks[i] is None:
+                self.blocks[i] = self.frames[i].GetContents()[0]
+        return(list(self.gens[idx]),list(self.blocks[idx]),self.H[idx].tolist(),self.Sn[idx].tolist())
+
+    def Areas(self):
+        '''This function returns the angle adder Frames of the in-service machines grouped by their grid, as a list of
+           [grid, Frames] entries (see AreasByGrid).'''
+
+        idx = self.Active()
+        sAreas = []
+        for j in np.unique(self.area[idx]):
+            sAreas.append([self.sGrids[j][1],list(self.frames[idx[self.area[idx] == j]])])
+        return(sAreas)
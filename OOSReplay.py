@@ -0,0 +1,261 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: This module replays the out of step detection of the OutOfStep module offline, on exported rotor angles, without
+a powerfactory license. The angles are unwrapped the same way as in the comulative angle adder DSL block, the simulation is
+tripped the same way as in the out-of-step detection DSL block and the critical generator is detected the same way as in
+DetectCritGenerator. Requires numpy.
+'''
+
+import numpy as np
+
+#parameters of the DSL blocks created by the OutOfStep module
+DelayTime = 0.01    #delay of the comulative angle adder and dtime of the EvtStop [s]
+JumpLimit = 5       #angle jump between two steps, that is treated as wrapping around [rad]
+TripAngle = 180     #angle between the max and min angle, that stops the simulation [deg]
+Sb = 100            #system base power used for the inertia weights [MVA]
+RadToDeg = 180/3.14 #conversion used in DetectCritGenerator
+
+#support functions
+
+def UnwrapAngles(angles):
+    '''This function returns the comulative angles of the given (time x generators) array of rotor angles in rad, the same
+       way as the comulative angle adder DSL block does. The angles are expected to be sampled with the delay time of the
+       block (0.01 s) and the comulative angles start at 0.'''
+
+    angles = np.asarray(angles, dtype=float)
+    assert angles.ndim == 2, "angles should be a (time x generators) array not of shape "+str(angles.shape)
+
+    diff = np.diff(angles, axis=0)
+    diff = np.where(diff > JumpLimit, diff-2*np.pi, diff)
+    diff = np.where(diff < -JumpLimit, diff+2*np.pi, diff)
+
+    com_angle = np.zeros(angles.shape)
+    np.cumsum(diff, axis=0, out=com_angle[1:])
+    return(com_angle)
+
+def SpeedAngles(t, speed, fnom: float = 50):
+    '''This function returns the comulative angles in rad of the given (time x generators) array of machine speeds in p.u.,
+       the same way as the speed integrating angle adder DSL block does (see OutOfStep.CreateComAngSpeedBlkTyp). The speed
+       deviation is integrated with the trapezoidal rule, so the time steps don't have to be equal, and the comulative
+       angles start at 0.'''
+
+    t = np.asarray(t, dtype=float)
+    speed = np.asarray(speed, dtype=float)
+    assert speed.ndim == 2, "speed should be a (time x generators) array not of shape "+str(speed.shape)
+    assert t.shape == (speed.shape[0],), "t should have "+str(speed.shape[0])+" entries not "+str(t.shape)
+
+    dw = (speed-1)*2*np.pi*fnom
+    com_angle = np.zeros(speed.shape)
+    np.cumsum((dw[1:]+dw[:-1])/2*np.diff(t)[:,None], axis=0, out=com_angle[1:])
+    return(com_angle)
+
+def AngleSpread(com_angles):
+    '''This function returns the index of the max and min angle and the difference between them in degrees for every time step,
+       the same way as the max/min blocks and the out-of-step detection DSL block do.'''
+
+    com_angles = np.asarray(com_angles, dtype=float)
+    assert com_angles.ndim == 2, "com_angles should be a (time x generators) array not of shape "+str(com_angles.shape)
+
+    rows = np.arange(com_angles.shape[0])
+    imax = np.argmax(com_angles, axis=1)
+    imin = np.argmin(com_angles, axis=1)
+    diff = (com_angles[rows,imax]-com_angles[rows,imin])*180/np.pi
+    return imax,imin,diff
+
+def InertiaWeights(H, Sn, n: int):
+    '''This function returns the inertia weights H*Sn/Sb of the generators, if H or Sn are not given all generators have the
+       same weight.'''
+
+    H = np.ones(n) if H is None else np.asarray(H, dtype=float)
+    Sn = np.full(n, float(Sb)) if Sn is None else np.asarray(Sn, dtype=float)
+    assert H.shape == (n,), "H should have "+str(n)+" entries not "+str(H.shape)
+    assert Sn.shape == (n,), "Sn should have "+str(n)+" entries not "+str(Sn.shape)
+    return(H*Sn/Sb)
+
+def DistToCOI(com_angles, weights):
+    '''This function returns the distance of every comulative angle to the centre of inertia angle in degrees, the same way
+       as DetectCritGenerator does. com_angles can be a single vector or a (time x generators) array.'''
+
+    deg = np.asarray(com_angles, dtype=float)*RadToDeg
+    del_COI = deg @ weights / weights.sum()
+    return(np.abs(deg-np.expand_dims(del_COI,-1)))
+
+def LargestGap(com_angles):
+    '''This function sorts the comulative angles of every time step and returns the order of the generators (from the
+       smallest to the biggest angle), the position of the largest gap between two neighbouring angles in that order and its
+       size in degrees. The generators above the gap are separated from the ones below it. It takes O(n log n) per time step.'''
+
+    com_angles = np.asarray(com_angles, dtype=float)
+    assert com_angles.ndim == 2, "com_angles should be a (time x generators) array not of shape "+str(com_angles.shape)
+
+    order = np.argsort(com_angles, axis=1, kind="stable")
+    gaps = np.diff(np.take_along_axis(com_angles, order, axis=1), axis=1)*180/np.pi
+    igap = np.argmax(gaps, axis=1)
+    return order,igap,gaps[np.arange(gaps.shape[0]),igap]
+
+def LoadAngles(path: str):
+    '''This function loads exported rotor angles. A .npz file should hold the arrays "t" (or "time") and "angles" and can
+       hold the generator "names". The first column of a .csv file should be the time and the rest the rotor angles, with
+       the generator names in the header. It returns the time vector, the (time x generators) angle array and the names.'''
+
+    assert type(path) == str, "path should be string not "+str(type(path))
+
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            t = data["t"] if "t" in data else data["time"]
+            angles = data["angles"]
+            names = list(data["names"]) if "names" in data else ["G"+str(i) for i in range(angles.shape[1])]
+    elif path.endswith(".csv"):
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        t = data[:,0]
+        angles = data[:,1:]
+        names = header[1:]
+    else:
+        raise ValueError("Unsupported file type of "+path+", expected .npz or .csv")
+
+    return np.asarray(t, dtype=float),np.asarray(angles, dtype=float),[str(i) for i in names]
+
+#main functions
+
+def TripSignal(diff, TripAngle: float = TripAngle, horizon: float = 0):
+    '''This function returns for every time step whether the out-of-step detection DSL block triggers, given the differences
+       between the max and min angle in degrees, sampled every 0.01 s. If horizon is bigger than 0, the difference is
+       projected horizon seconds ahead with its rate of change over the last horizon seconds (rounded to whole steps), as in
+       the predictive trip of the DSL block.'''
+
+    diff = np.asarray(diff, dtype=float)
+    if horizon > 0:
+        steps = max(1,int(round(horizon/DelayTime)))
+        d_diff = diff[np.maximum(np.arange(len(diff))-steps,0)]
+        return(diff+np.maximum(diff-d_diff,0) > TripAngle)
+    return(diff > TripAngle)
+
+def ReplayOOS(t, angles, H = None, Sn = None, names = None, unwrap: bool = True, TripAngle: float = TripAngle,
+              AlarmAngle: float = None, horizon: float = 0):
+    '''This function replays the out of step detection on a (time x generators) array of rotor angles in rad. If unwrap is
+       False the angles are taken as already comulative angles. TripAngle, AlarmAngle and horizon are the settings of the
+       out-of-step detection block (see OutOfStep.CreateOOSDetBlockTyp). It returns a dictionary with:
+       tripped - whether the detector stopped the simulation (any two angles more than TripAngle degrees apart, or projected
+       to be within the horizon),
+       trip_time - the time at which the detector triggered (None if it didn't),
+       stop_time - the time at which the simulation stops (trip_time + 0.01 s, or the last time step),
+       pair - the names of the generators with the max and min angle at the trip,
+       diff - the difference between them at the trip in degrees (the biggest difference if it didn't trip),
+       diff_end - the difference between the max and min angle when the simulation stops in degrees,
+       crit_gen - the generator furthest from the centre of inertia angle when the simulation stops,
+       crit_dist - its distance to the centre of inertia angle in degrees,
+       alarm_time - the time at which the angles were first more than AlarmAngle degrees apart (None if never or not given).'''
+
+    t = np.asarray(t, dtype=float)
+    angles = np.asarray(angles, dtype=float)
+    assert angles.ndim == 2, "angles should be a (time x generators) array not of shape "+str(angles.shape)
+    assert t.shape == (angles.shape[0],), "t should have "+str(angles.shape[0])+" entries not "+str(t.shape)
+    n = angles.shape[1]
+    assert n > 1, "There should be mroe than one generator."
+    if names is None:
+        names = ["G"+str(i) for i in range(n)]
+    assert len(names) == n, "names should have "+str(n)+" entries not "+str(len(names))
+
+    com_angles = UnwrapAngles(angles) if unwrap else angles
+    imax,imin,diff = AngleSpread(com_angles)
+
+    trig = np.flatnonzero(TripSignal(diff, TripAngle, horizon))
+    tripped = trig.size > 0
+    if tripped:
+        itrip = int(trig[0])
+        #the EvtStop is executed dtime after the trigger, the last step of the simulation is the one at the stop time
+        istop = min(int(np.searchsorted(t, t[itrip]+DelayTime-1e-9)), len(t)-1)
+    else:
+        itrip = None
+        istop = len(t)-1
+
+    dist = DistToCOI(com_angles[istop], InertiaWeights(H, Sn, n))
+    icrit = int(np.argmax(dist))
+
+    alarm = np.flatnonzero(diff[:istop+1] > AlarmAngle) if AlarmAngle is not None else []
+
+    return({"tripped": tripped,
+            "trip_time": float(t[itrip]) if tripped else None,
+            "stop_time": float(t[istop]),
+            "pair": (names[imax[itrip]],names[imin[itrip]]) if tripped else None,
+            "diff": float(diff[itrip]) if tripped else float(diff.max()),
+            "diff_end": float(diff[istop]),
+            "crit_gen": names[icrit],
+            "crit_dist": float(dist[icrit]),
+            "alarm_time": float(t[alarm[0]]) if len(alarm) > 0 else None})
+
+def CoherentGroups(com_angles, H = None, Sn = None, names = None, GapAngle: float = 90, ieval: int = None,
+                   TripAngle: float = TripAngle):
+    '''This function clusters the generators into coherent groups over the (time x generators) array of comulative angles in
+       rad. At every time step the sorted angles are split at every gap bigger than GapAngle degrees, and two generators are
+       coherent if they are never split. The critical group is the side of the largest gap at the time step ieval (the first
+       time step at which the max and min angle differ by more than TripAngle degrees, or the one with the largest gap if
+       they don't) with the smaller inertia. It takes
+       O(n log n) per time step, instead of comparing all pairs of generators. It returns a dictionary with:
+       groups - the names of the generators of every coherent group, sorted by the group centre of inertia angle at ieval,
+       from the most advanced group on,
+       labels - the index of the group of every generator,
+       critical_group - the names of the generators of the critical group,
+       ieval - the time step at which the critical group was evaluated,
+       gap - the size of the largest gap in degrees for every time step,
+       coi - the (time x groups) inertia weighted centre of inertia angles of the groups in degrees.'''
+
+    com_angles = np.asarray(com_angles, dtype=float)
+    assert com_angles.ndim == 2, "com_angles should be a (time x generators) array not of shape "+str(com_angles.shape)
+    T,n = com_angles.shape
+    assert n > 1, "There should be more than one generator."
+    if names is None:
+        names = ["G"+str(i) for i in range(n)]
+    assert len(names) == n, "names should have "+str(n)+" entries not "+str(len(names))
+    weights = InertiaWeights(H, Sn, n)
+
+    order,igap,gap = LargestGap(com_angles)
+    if ieval is None:
+        _,_,diff = AngleSpread(com_angles)
+        trig = np.flatnonzero(diff > TripAngle)
+        ieval = int(trig[0]) if trig.size > 0 else int(np.argmax(gap))
+
+    #group of every generator at every time step: the number of big gaps below it in the sorted order
+    sorted_angles = np.take_along_axis(com_angles, order, axis=1)
+    split = np.diff(sorted_angles, axis=1)*180/np.pi > GapAngle
+    step_labels = np.empty((T,n), dtype=np.int32)
+    np.put_along_axis(step_labels, order, np.concatenate([np.zeros((T,1),dtype=np.int32),
+                                                          np.cumsum(split, axis=1, dtype=np.int32)], axis=1), axis=1)
+    _,labels = np.unique(step_labels.T, axis=0, return_inverse=True)
+    labels = labels.reshape(-1)
+    G = int(labels.max())+1
+
+    member = np.zeros((n,G))
+    member[np.arange(n),labels] = weights
+    member /= member.sum(axis=0)
+    coi = com_angles @ member * 180/np.pi
+
+    rank = np.argsort(-coi[ieval], kind="stable")
+    coi = coi[:,rank]
+    labels = np.argsort(rank)[labels]
+    groups = [[names[i] for i in np.flatnonzero(labels == g)] for g in range(G)]
+
+    above = order[ieval,igap[ieval]+1:]
+    below = order[ieval,:igap[ieval]+1]
+    critical = above if weights[above].sum() <= weights[below].sum() else below
+
+    return({"groups": groups,
+            "labels": labels,
+            "critical_group": [names[i] for i in sorted(critical)],
+            "ieval": ieval,
+            "gap": gap,
+            "coi": coi})
+
+def ReplayOOSFile(path: str, H = None, Sn = None, unwrap: bool = True, TripAngle: float = TripAngle, AlarmAngle: float = None,
+                  horizon: float = 0):
+    '''This function loads the exported rotor angles from the given file (see LoadAngles) and replays the out of step
+       detection on them (see ReplayOOS).'''
+
+    t,angles,names = LoadAngles(path)
+    result = ReplayOOS(t, angles, H, Sn, names, unwrap, TripAngle, AlarmAngle, horizon)
+    result["file"] = path
+    return(result)
@@ -0,0 +1,388 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Parallel contingency screening with the out of step detection of the OutOfStep module. A list of contingencies
+is dispatched to a pool of worker processes, each of which holds its own simulation session (backend). The model is instrumented
+(angle adders and out-of-step detector) once per worker and then reused for all the contingencies the worker runs. The outcomes
+of all the contingencies are collected into one table.
+
+A contingency is a dictionary with:
+    name - the name of the case,
+    events - the settings of the simulation events, {event name: {attribute: value}}, e.g. {"Clear": {"time": 0.25}},
+    tstop - the end time of the simulation in seconds (optional).
+
+usage:
+    backend = OOSScreening.PowerFactoryBackend("Test systems\\Nine-bus System", "Nine-bus System")
+    rows = OOSScreening.RunScreening(cases, backend, workers=4)
+    OOSScreening.WriteTable(rows, "screening.csv")
+'''
+
+import concurrent.futures
+import csv
+import math
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+
+import OOSSession
+import OutOfStep
+
+#columns of the screening table
+Columns = ["case", "stable", "trip_time", "crit_gen", "crit_dist", "stop_time", "diff_peak", "diff_end", "wall_time", "worker",
+           "cached", "error"]
+
+#parameters of the machine types, that the outcome of a case depends on (see PowerFactoryBackend.ModelKey)
+TypAttrs = ["h","sgn","ugn","xl","xd","xq","xds","xqs","xdss","xqss","tds","tqs","tdss","tqss","rstr","dpu"]
+
+#parameters of the simulation events of the study case, that the outcome of a case depends on (see PowerFactoryBackend.ModelKey)
+EvtAttrs = ["outserv","time","i_shc","R_f","X_f","i_switch","i_allph","variable","value","dtime"]
+
+#backend of the worker process, set up once by InitWorker
+WorkerBackend = None
+
+#backends
+
+class PowerFactoryBackend:
+    '''Runs the contingencies in a powerfactory session. Setup opens the warm session of the project and of the study case
+       StudyCase (the active one by default, see OOSSession) and instruments the grid with the angle adders and the
+       out-of-step detector. Run sets the events of the contingency, runs the RMS simulation and evaluates the recorded
+       comulative angles with DetectCritGeneratorTrajectory. The events of the study case are restored after every run, so
+       the contingencies don't influence each other.'''
+
+    def __init__(self, project: str, GridName: str, PFPath: str = None, OOSFrmName: str = "OOSFrm", topology: str = "chain",
+                 TripAngle: float = 180, AlarmAngle: float = None, horizon: float = 0, StudyCase: str = None):
+        self.project = project
+        self.GridName = GridName
+        self.StudyCase = StudyCase
+        self.PFPath = PFPath
+        self.OOSFrmName = OOSFrmName
+        self.topology = topology
+        self.TripAngle = TripAngle
+        self.AlarmAngle = AlarmAngle
+        self.horizon = horizon
+        self.session = None
+        self.registry = None
+        self.app = None
+
+    def Setup(self):
+        import OOSRegistry
+
+        self.session = OOSSession.OpenSession(OOSSession.PFSession(self.project, self.GridName, self.StudyCase, self.PFPath))
+        self.app = self.session.app
+
+        self.registry = OOSRegistry.GeneratorRegistry(self.app)
+        self.sGenAng = OutOfStep.CreateComAngBatch(self.registry, self.session.dyn_folder, self.session.grid)
+        OutOfStep.CreateOOSDet(self.OOSFrmName, self.session.dyn_folder, self.session.grid, self.registry, self.topology, True,
+                               self.TripAngle, self.AlarmAngle, self.horizon)
+        OutOfStep.EnableComElm(self.OOSFrmName, self.session.grid)
+
+        self.oComInc = self.session.oComInc
+        self.oComSim = self.session.oComSim
+        self.oRes = self.oComInc.GetAttribute("p_resvar")
+        OutOfStep.AddComAngToRes(self.oRes, self.registry)
+        self.events = {i.loc_name: i for i in self.oComInc.GetAttribute("p_event").GetContents()}
+
+    def Run(self, case: dict):
+        import OOSReplay
+
+        #original values of the changed event attributes and of the end time, structure of each entry: (object, attribute, value)
+        originals = []
+        try:
+            for EvtName,attrs in case.get("events",{}).items():
+                if EvtName not in self.events:
+                    raise KeyError("Event "+EvtName+" doesn't exist in the study case.")
+                for attr,value in attrs.items():
+                    originals.append((self.events[EvtName],attr,self.events[EvtName].GetAttribute(attr)))
+                    self.events[EvtName].SetAttribute(attr,value)
+            if "tstop" in case:
+                originals.append((self.oComSim,"tstop",self.oComSim.GetAttribute("tstop")))
+                self.oComSim.SetAttribute("tstop",case["tstop"])
+
+            self.oComInc.Execute()
+            self.oComSim.Execute()
+            tstop = self.oComSim.GetAttribute("tstop")
+            result = OutOfStep.DetectCritGeneratorTrajectory(self.registry, self.oRes, self.TripAngle)
+        finally:
+            for obj,attr,value in reversed(originals):
+                obj.SetAttribute(attr,value)
+
+        #a simulation that ended before tstop was stopped by the detector, also by its predictive trip (horizon), that the
+        #angles alone don't show. The EvtStop is executed 0.01 s after the trigger.
+        tripped = result["tripped"] or float(result["t"][-1]) < tstop-OOSReplay.DelayTime/2
+        if result["tripped"]:
+            trip_time = result["trip_time"]
+        else:
+            trip_time = float(result["t"][-1])-OOSReplay.DelayTime if tripped else None
+
+        return({"stable": not tripped,
+                "trip_time": trip_time,
+                "crit_gen": result["crit_gen"].loc_name,
+                "crit_dist": result["crit_dist"],
+                "stop_time": float(result["t"][-1]),
+                "diff_peak": float(result["diff"].max()),
+                "diff_end": float(result["diff"][-1]),
+                "t": result["t"],
+                "angles": result["com_angles"]})
+
+    def ModelKey(self):
+        '''This function returns the description of the instrumented model, that the outcome of a case depends on besides
+           the case itself: the project and grid, the in-service machines with the parameters of their types, the events
+           of the study case (class, target and parameters, before the case changes them) and the configuration of the
+           detector.'''
+
+        sGens = []
+        for Gen,AngFrm in self.sGenAng:
+            Typ = Gen.GetAttribute("typ_id")
+            sGens.append([Gen.GetFullName(),Typ.GetFullName()]+[TypParam(Typ,i) for i in TypAttrs])
+        sEvents = []
+        for EvtName in sorted(self.events):
+            Evt = self.events[EvtName]
+            Target = TypParam(Evt,"p_target")
+            sEvents.append([EvtName,Evt.GetClassName(),Target.GetFullName() if Target else None]+
+                           [TypParam(Evt,i) for i in EvtAttrs])
+        return({"project": self.project,
+                "grid": self.GridName,
+                "generators": sGens,
+                "events": sEvents,
+                "detector": [self.topology,self.TripAngle,self.AlarmAngle,self.horizon]})
+
+    def Close(self):
+        #the session stays open (warm) for the next analyses in this process
+        self.session = None
+        self.registry = None
+        self.app = None
+
+class StandInBackend:
+    '''Local stand-in for the PowerFactoryBackend, that needs no powerfactory license. Setup instruments a grid of n machines
+       in the in-memory powerfactory stand-in (OOSFakePF), the same way as the PowerFactoryBackend does. Run simulates every
+       machine as a single machine connected to an infinite bus (classical model, 50 Hz, step 0.01 s) and replays the out
+       of step detection on the rotor angles with OOSReplay. The events of a contingency are:
+           fault - time (s), p_target (the name of the faulted machine, or a list of names) and depth (the share of the
+           electrical power that is still transmitted during the fault, 0 by default),
+           clear - time (s) of the fault clearance.
+       Requires numpy.'''
+
+    def __init__(self, n: int = 3, Pm: float = 0.8, Pmax: float = 2.0, tstop: float = 5.0, OOSFrmName: str = "OOSFrm",
+                 topology: str = "chain", TripAngle: float = 180, AlarmAngle: float = None, horizon: float = 0):
+        self.n = n
+        self.Pm = Pm
+        self.Pmax = Pmax
+        self.tstop = tstop
+        self.OOSFrmName = OOSFrmName
+        self.topology = topology
+        self.TripAngle = TripAngle
+        self.AlarmAngle = AlarmAngle
+        self.horizon = horizon
+        self.session = None
+        self.registry = None
+        self.app = None
+
+    def Setup(self):
+        import OOSRegistry
+
+        self.session = OOSSession.FakeSession(self.n).Open()
+        self.app = self.session.app
+        OutOfStep.InvalidateCaches()
+        self.registry = OOSRegistry.GeneratorRegistry(self.app)
+        self.sGenAng = OutOfStep.CreateComAngBatch(self.registry, self.session.dyn_folder, self.session.grid)
+        OutOfStep.CreateOOSDet(self.OOSFrmName, self.session.dyn_folder, self.session.grid, self.registry, self.topology, True,
+                               self.TripAngle, self.AlarmAngle, self.horizon)
+        self.names = list(self.registry.names)
+        self.H = list(self.registry.H)
+        self.Sn = list(self.registry.Sn)
+
+    def Run(self, case: dict):
+        import OOSReplay
+
+        events = case.get("events",{})
+        fault = events.get("fault",{})
+        targets = fault.get("p_target",[])
+        targets = [targets] if type(targets) == str else list(targets)
+        for i in targets:
+            if i not in self.names:
+                raise KeyError("Machine "+i+" doesn't exist in the stand-in grid.")
+
+        t,angles = StandInAngles(self.H, [i in targets for i in self.names], fault.get("time",0.1),
+                                 events.get("clear",{}).get("time",math.inf), case.get("tstop",self.tstop),
+                                 self.Pm, self.Pmax, fault.get("depth",0.0))
+        result = OOSReplay.ReplayOOS(t, angles, self.H, self.Sn, self.names, True, self.TripAngle, self.AlarmAngle,
+                                     self.horizon)
+        istop = int(round(result["stop_time"]/OOSReplay.DelayTime))
+
+        return({"stable": not result["tripped"],
+                "trip_time": result["trip_time"],
+                "crit_gen": result["crit_gen"],
+                "crit_dist": result["crit_dist"],
+                "stop_time": result["stop_time"],
+                "diff_peak": result["diff"],
+                "diff_end": result["diff_end"],
+                "t": t[:istop+1],
+                "angles": OOSReplay.UnwrapAngles(angles[:istop+1])})
+
+    def ModelKey(self):
+        '''This function returns the description of the stand-in model, that the outcome of a case depends on.'''
+
+        return({"names": self.names,
+                "H": self.H,
+                "Sn": self.Sn,
+                "model": [self.Pm,self.Pmax,self.tstop],
+                "detector": [self.topology,self.TripAngle,self.AlarmAngle,self.horizon]})
+
+    def Close(self):
+        self.session = None
+        self.registry = None
+        self.app = None
+
+def StandInAngles(H: list, faulted: list, FaultTime: float, ClearTime: float, tstop: float, Pm: float = 0.8,
+                  Pmax: float = 2.0, depth: float = 0.0, f: float = 50, dt: float = 0.01):
+    '''This function simulates the rotor angles of machines connected to an infinite bus (classical model, no damping) and
+       returns the time vector and the (time x machines) rotor angles in rad, wrapped between -pi and pi as powerfactory
+       reports them. The electrical power of the faulted machines drops to depth*Pmax*sin(delta) between FaultTime and
+       ClearTime.'''
+
+    import numpy as np
+
+    H = np.asarray(H, dtype=float)
+    faulted = np.asarray(faulted, dtype=bool)
+    assert H.shape == faulted.shape, "H and faulted should have the same number of entries."
+    assert Pm < Pmax, "Pm should be smaller than Pmax, so that the machines have an operating point."
+
+    steps = int(round(tstop/dt))
+    t = np.arange(steps+1)*dt
+    angles = np.empty((steps+1,len(H)))
+    delta = np.full(len(H), math.asin(Pm/Pmax))
+    omega = np.zeros(len(H))
+    angles[0] = delta
+    for k in range(steps):
+        infault = FaultTime <= t[k] < ClearTime
+        Pe = Pmax*np.sin(delta)*np.where(faulted & infault, depth, 1.0)
+        omega += dt*math.pi*f/H*(Pm-Pe)
+        delta += dt*omega
+        angles[k+1] = delta
+
+    return t,np.angle(np.exp(1j*angles))
+
+def TypParam(Typ, name: str):
+    '''This function returns the given parameter of a machine type (or another object, e.g. an event), or None if it doesn't
+       have it.'''
+
+    try:
+        return(Typ.GetAttribute(name))
+    except AttributeError:
+        return(None)
+
+#worker functions
+
+def InitWorker(backend):
+    '''This function sets up the backend of a worker process once, it is closed when the worker exits.'''
+
+    global WorkerBackend
+    WorkerBackend = backend
+    WorkerBackend.Setup()
+    multiprocessing.util.Finalize(None, WorkerBackend.Close, exitpriority=10)
+
+def RunWorkerCase(case: dict):
+    '''This function runs one contingency on the backend of the worker process.'''
+
+    return(RunCase(WorkerBackend, case))
+
+def RunCase(backend, case: dict):
+    '''This function runs one contingency on the given backend and returns its row of the screening table. Errors of a
+       single case are reported in the error column instead of stopping the screening. Entries of the result of the backend
+       that aren't Columns (e.g. the trajectories t and angles) are not added to the row.'''
+
+    assert type(case) == dict, "case should be dict not "+str(type(case))
+
+    row = {i: None for i in Columns}
+    row["case"] = case.get("name")
+    row["worker"] = os.getpid()
+    start = time.perf_counter()
+    try:
+        result = backend.Run(case)
+        row.update({k: v for k,v in result.items() if k in row})
+    except Exception as e:
+        row["error"] = type(e).__name__+": "+str(e)
+    row["wall_time"] = time.perf_counter()-start
+    return(row)
+
+#main functions
+
+class ScreeningPool:
+    '''A pool of simulation sessions that stays set up between successive batches of contingencies. With workers = 0 the
+       contingencies are run in this process on the backend itself, otherwise they are dispatched to a pool of worker
+       processes (as many as there are cores, if workers is None), each with its own copy of the backend, that is set up
+       once per worker. It should be used as a context manager, or closed with Close().'''
+
+    def __init__(self, backend, workers: int = None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        assert workers >= 0, "workers should not be negative."
+
+        self.backend = backend
+        self.workers = workers
+        self.pool = None
+        if workers == 0:
+            backend.Setup()
+        else:
+            self.pool = concurrent.futures.ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"), InitWorker,
+                                                               (backend,))
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Run(self, cases: list):
+        '''This function runs the given contingencies and returns their rows of the screening table, in the order of the
+           contingencies.'''
+
+        if self.pool is None:
+            return([RunCase(self.backend, i) for i in cases])
+        return(list(self.pool.map(RunWorkerCase, cases)))
+
+    def Close(self):
+        if self.pool is None:
+            self.backend.Close()
+        else:
+            self.pool.shutdown()
+
+def RunScreening(cases: list, backend, workers: int = None):
+    '''This function runs the given contingencies on a ScreeningPool and returns the screening table, one row (dictionary
+       with the Columns) per contingency, in the order of the contingencies. With workers = 0 the contingencies are run in
+       this process, otherwise there are at most as many workers as cases.'''
+
+    assert type(cases) == list, "cases should be list not "+str(type(cases))
+    cases = [dict(case, name=case.get("name","case"+str(i+1))) for i,case in enumerate(cases)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 0:
+        workers = max(1,min(workers,len(cases)))
+    with ScreeningPool(backend, workers) as pool:
+        return(pool.Run(cases))
+
+def ScreeningSummary(rows: list):
+    '''This function returns the number of stable, unstable and failed cases of the screening table and the unstable cases
+       by critical generator.'''
+
+    summary = {"cases": len(rows), "stable": 0, "unstable": 0, "errors": 0, "crit_gen": {}}
+    for i in rows:
+        if i["error"] is not None:
+            summary["errors"] += 1
+        elif i["stable"]:
+            summary["stable"] += 1
+        else:
+            summary["unstable"] += 1
+            summary["crit_gen"][i["crit_gen"]] = summary["crit_gen"].get(i["crit_gen"],0) + 1
+    return(summary)
+
+def WriteTable(rows: list, path: str):
+    '''This function writes the screening table to a .csv file.'''
+
+    with open(path,"w",newline="") as f:
+        writer = csv.DictWriter(f, Columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,268 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Persistent powerfactory sessions. Starting the powerfactory engine and activating the project take most of the
+time of short studies, so a session starts the engine lazily (on first use, not on import) and keeps it warm, with the project
+and the study case already active, for successive analyses in the same process. The grid, the dynamic model folder and the
+RMS simulation commands are looked up once per activation. The SessionPool holds one warm session per worker process and runs
+functions on them. The FakeSession provides the same interface on the in-memory stand-in OOSFakePF, for tests.
+
+usage:
+    session = OOSSession.OpenSession(OOSSession.PFSession("Test systems\\Nine-bus System", "Nine-bus System",
+                                                          PFPath="C:\\Program Files\\DIgSILENT\\PowerFactory 2024 Preview\\Python\\3.12"))
+    sGenAng = OutOfStep.CreateComAngBatch(session.Generators(), session.dyn_folder, session.grid)
+    session.oComInc.Execute()
+'''
+
+import concurrent.futures
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+
+#powerfactory application of this process, started by GetApplication
+Application = None
+
+#open sessions of this process by their key, see OpenSession
+Sessions = {}
+
+#session of the worker process, opened once by InitSessionWorker
+WorkerSession = None
+
+#support functions
+
+def GetApplication(PFPath: str = None):
+    '''This function returns the powerfactory application of this process. Powerfactory is only imported and started on the
+       first call, PFPath (the folder of powerfactory.pyd) is added to the python path if it is given.'''
+
+    global Application
+    if Application is None:
+        if PFPath is not None and PFPath not in sys.path:
+            sys.path.append(PFPath)
+        import powerfactory
+
+        Application = powerfactory.GetApplicationExt()
+        if Application is None:
+            raise Exception("Powerfactory couldn't be started.")
+    return(Application)
+
+def FindObject(folder, name: str, ClassName: str = "*"):
+    '''This function returns the object with the given name and class in the given folder (searched recursively), or None.'''
+
+    for i in folder.GetContents(name+"."+ClassName, 1):
+        if i.loc_name == name:
+            return(i)
+    return(None)
+
+#sessions
+
+class PFSession:
+    '''Warm powerfactory session of a project, a grid (optional) and a study case (optional, the active study case of the
+       project by default). Nothing is started before Open, so a session can be created (and pickled to the workers of a
+       SessionPool) without powerfactory. Open starts the engine, if it isn't running yet, and activates the project and the
+       study case, if they aren't active yet. After Open the session holds:
+       app - the powerfactory application,
+       project, study_case - the active project and study case,
+       grid - the grid GridName (None, if GridName is None),
+       dyn_folder - the dynamic models library of the project,
+       oComInc, oComSim - the commands for the initialisation and the RMS simulation of the study case.'''
+
+    def __init__(self, project: str, GridName: str = None, StudyCase: str = None, PFPath: str = None):
+        self.project_name = project
+        self.GridName = GridName
+        self.StudyCase = StudyCase
+        self.PFPath = PFPath
+        self.app = None
+        self.project = None
+        self.study_case = None
+        self.grid = None
+        self.dyn_folder = None
+        self.oComInc = None
+        self.oComSim = None
+
+    def __enter__(self):
+        return(self.Open())
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Key(self):
+        '''This function returns the key of the session, sessions with the same key share the same warm session (see
+           OpenSession).'''
+
+        return((type(self).__name__,self.project_name,self.GridName,self.StudyCase))
+
+    def Attach(self):
+        '''This function returns the application of the session.'''
+
+        return(GetApplication(self.PFPath))
+
+    def IsActive(self):
+        '''This function returns whether the project and the study case of the session are still the active ones.'''
+
+        if self.app is None or self.project is None:
+            return(False)
+        if self.app.GetActiveProject() != self.project:
+            return(False)
+        return(self.app.GetActiveStudyCase() == self.study_case)
+
+    def Open(self):
+        '''This function attaches the session to the application and activates its project and study case, if they aren't
+           active already. It returns the session.'''
+
+        if self.app is None:
+            self.app = self.Attach()
+        if self.IsActive():
+            return(self)
+
+        if self.app.ActivateProject(self.project_name) == 1:
+            raise Exception("Project "+self.project_name+" couldn't be activated.")
+        self.project = self.app.GetActiveProject()
+
+        if self.StudyCase is not None:
+            case = FindObject(self.app.GetProjectFolder("study"), self.StudyCase, "IntCase")
+            if case is None:
+                raise Exception("Study case "+self.StudyCase+" doesn't exist in project "+self.project_name)
+            if case.Activate() == 1:
+                raise Exception("Study case "+self.StudyCase+" couldn't be activated.")
+        self.study_case = self.app.GetActiveStudyCase()
+
+        self.dyn_folder = self.app.GetProjectFolder("blk")
+        self.grid = None
+        if self.GridName is not None:
+            for i in self.app.GetProjectFolder("netdat").GetContents():
+                if i.loc_name == self.GridName:
+                    self.grid = i
+            if self.grid is None:
+                raise Exception("Grid "+self.GridName+" doesn't exist in project "+self.project_name)
+        self.oComInc = self.app.GetFromStudyCase("ComInc")
+        self.oComSim = self.app.GetFromStudyCase("ComSim")
+        return(self)
+
+    def Generators(self):
+        '''This function returns the list of all in-service synchronous machines of the active study case.'''
+
+        return(list(self.app.GetCalcRelevantObjects("*.ElmSym",includeOutOfService = 0)))
+
+    def Close(self):
+        '''This function releases the objects of the session, the application stays running for the other sessions.'''
+
+        Sessions.pop(self.Key(),None)
+        self.app = None
+        self.project = None
+        self.study_case = None
+        self.grid = None
+        self.dyn_folder = None
+        self.oComInc = None
+        self.oComSim = None
+
+class FakeSession(PFSession):
+    '''Session on the in-memory powerfactory stand-in (OOSFakePF), with a grid of n machines, for tests. The stand-in
+       application is created on the first Open, after waiting startup seconds to imitate the start of the engine, and is
+       kept by the session. latency is the delay of every API call (see OOSFakePF.FakeApp).'''
+
+    def __init__(self, n: int = 3, GridName: str = "Grid", startup: float = 0.0, latency: float = 0.0):
+        PFSession.__init__(self, "Project", GridName, None)
+        self.n = n
+        self.startup = startup
+        self.latency = latency
+        self.fake = None
+
+    def Key(self):
+        return(PFSession.Key(self)+(self.n,))
+
+    def Attach(self):
+        import OOSFakePF
+
+        if self.fake is None:
+            time.sleep(self.startup)
+            self.fake = OOSFakePF.FakeApp(self.latency)
+            OOSFakePF.CreateFakeGrid(self.fake, self.n, self.GridName)
+        return(self.fake)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.update(app=None, project=None, study_case=None, grid=None, dyn_folder=None, oComInc=None, oComSim=None,
+                     fake=None)
+        return(state)
+
+#worker functions
+
+def InitSessionWorker(session):
+    '''This function opens the session of a worker process once, it is closed when the worker exits.'''
+
+    global WorkerSession
+    WorkerSession = OpenSession(session)
+    multiprocessing.util.Finalize(None, CloseSessions, exitpriority=10)
+
+def RunSessionWorker(args: tuple):
+    '''This function runs func(session, item) on the session of the worker process.'''
+
+    func,item = args
+    return(func(OpenSession(WorkerSession), item))
+
+#main functions
+
+def OpenSession(session):
+    '''This function returns the open session of this process with the same key as the given session (see PFSession.Key),
+       opening the given session if there is none yet. The returned session is reactivated, if another project or study case
+       was activated since.'''
+
+    key = session.Key()
+    if key not in Sessions:
+        Sessions[key] = session
+    return(Sessions[key].Open())
+
+def CloseSessions():
+    '''This function closes all open sessions of this process.'''
+
+    for i in list(Sessions.values()):
+        i.Close()
+
+class SessionPool:
+    '''A pool of warm sessions that stays open between successive analyses. With workers = 0 the functions run in this
+       process on the session itself, otherwise they are dispatched to a pool of worker processes (as many as there are
+       cores, if workers is None), each of which opens its own copy of the session once. It should be used as a context
+       manager, or closed with Close().'''
+
+    def __init__(self, session, workers: int = None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        assert workers >= 0, "workers should not be negative."
+
+        self.session = session
+        self.workers = workers
+        self.pool = None
+        if workers == 0:
+            OpenSession(session)
+        else:
+            self.pool = concurrent.futures.ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"),
+                                                               InitSessionWorker, (session,))
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Map(self, func, items: list):
+        '''This function returns [func(session, item) for item in items], with func run on the warm sessions of the pool. func
+           should be a module level function (so it can be pickled to the workers).'''
+
+        if self.pool is None:
+            return([func(OpenSession(self.session), i) for i in items])
+        return(list(self.pool.map(RunSessionWorker, [(func,i) for i in items])))
+
+    def Close(self):
+        '''This function closes the pool. With workers = 0 the open session of this process with the key of the session is
+           closed, if there still is one, without opening it again, otherwise the worker processes are shut down (and their
+           sessions closed).'''
+
+        if self.pool is None:
+            session = Sessions.get(self.session.Key())
+            if session is not None:
+                session.Close()
+        else:
+            self.pool.shutdown()
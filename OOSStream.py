@@ -0,0 +1,315 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Streaming out of step detection. The StreamingDetector consumes one vector of rotor angles per time step (from a
+co-simulation hook, a PMU replay or a result file iterator) and follows the DSL blocks created by the OutOfStep module, the
+same way as OOSReplay does for whole trajectories: the angles are unwrapped like in the comulative angle adder, the detector
+trips like the out-of-step detection block and the critical generator is the one furthest from the centre of inertia angle.
+The comulative angles and the centre of inertia angle are updated incrementally, no history is kept, so every sample costs
+O(n) time and the memory doesn't grow with the length of the feed. Requires numpy.
+
+usage:
+    detector = OOSStream.StreamingDetector(names, H, Sn, AlarmAngle=120, on_trip=lambda t,pair,diff: print(t,pair))
+    for t,angles in OOSStream.IterCSV("case_001.csv"):
+        if not detector.Update(t, angles):
+            break
+    print(detector.Result())
+'''
+
+import collections
+import json
+
+import numpy as np
+
+import OOSReplay
+
+#support functions
+
+def IterCSV(path: str):
+    '''This function yields the time and the vector of rotor angles of every line of an exported .csv file (see
+       OOSReplay.LoadAngles), one line at a time.'''
+
+    with open(path) as f:
+        f.readline()
+        for line in f:
+            line = line.strip()
+            if line == "":
+                continue
+            values = np.array(line.split(","), dtype=float)
+            yield values[0],values[1:]
+
+def CSVNames(path: str):
+    '''This function returns the generator names from the header of an exported .csv file.'''
+
+    with open(path) as f:
+        return(f.readline().strip().split(",")[1:])
+
+#main functions
+
+class StreamingDetector:
+    '''Out of step detector, that is updated one time step at a time. The settings TripAngle, AlarmAngle and horizon are the
+       same as those of the out-of-step detection block (see OutOfStep.CreateOOSDetBlockTyp). The callbacks are called:
+       on_alarm(t, diff) - when the angle difference first exceeds AlarmAngle,
+       on_trip(t, pair, diff) - when the detector triggers, pair are the names of the generators with the max and min angle,
+       on_crit(t, old, new, dist) - when another generator becomes the one furthest from the centre of inertia angle.
+       If stop is False, the samples after the simulation would have been stopped are processed as well (e.g. for live feeds,
+       that the detector doesn't stop).'''
+
+    def __init__(self, names: list, H = None, Sn = None, unwrap: bool = True, TripAngle: float = OOSReplay.TripAngle,
+                 AlarmAngle: float = None, horizon: float = 0, on_alarm = None, on_trip = None, on_crit = None,
+                 stop: bool = True):
+        assert len(names) > 1, "There should be more than one generator."
+
+        self.names = list(names)
+        self.n = len(self.names)
+        self.weights = OOSReplay.InertiaWeights(H, Sn, self.n)
+        self.wsum = self.weights.sum()
+        self.unwrap = unwrap
+        self.TripAngle = TripAngle
+        self.AlarmAngle = AlarmAngle
+        self.horizon = horizon
+        self.on_alarm = on_alarm
+        self.on_trip = on_trip
+        self.on_crit = on_crit
+        self.stop = stop
+        self.Reset()
+
+    def Reset(self):
+        '''This function resets the detector to its state before the first sample.'''
+
+        self.last = None
+        self.com_angles = np.zeros(self.n)
+        self.coi = 0.0
+        self.samples = 0
+        self.t = None
+        self.diff = 0.0
+        #differences of the last horizon seconds for the predictive trip, structure of each entry: (time, difference)
+        self.diffs = collections.deque()
+        self.diff_max = -np.inf
+        self.pair = None
+        self.crit = None
+        self.crit_dist = 0.0
+        self.alarm_time = None
+        self.trip_time = None
+        self.trip_pair = None
+        self.trip_diff = None
+        self.stopped = False
+
+    def Update(self, t: float, angles):
+        '''This function processes the rotor angles in rad (or comulative angles, if unwrap is False) of one time step. It
+           returns False once the simulation would have been stopped by the detector (0.01 s after the trip), the samples
+           after that are ignored.'''
+
+        if self.stopped:
+            return(False)
+        t = float(t)
+        if self.stop and self.trip_time is not None and t >= self.trip_time+OOSReplay.DelayTime-1e-9:
+            self.stopped = True
+
+        angles = np.asarray(angles, dtype=float)
+        assert angles.shape == (self.n,), "angles should have "+str(self.n)+" entries not "+str(angles.shape)
+
+        if not self.unwrap:
+            step = angles-self.com_angles
+        elif self.last is None:
+            step = np.zeros(self.n)
+        else:
+            step = angles-self.last
+            step[step > OOSReplay.JumpLimit] -= 2*np.pi
+            step[step < -OOSReplay.JumpLimit] += 2*np.pi
+        self.last = angles
+        self.com_angles += step
+        self.coi += step @ self.weights / self.wsum
+        self.samples += 1
+        self.t = t
+
+        imax = int(np.argmax(self.com_angles))
+        imin = int(np.argmin(self.com_angles))
+        self.diff = float(self.com_angles[imax]-self.com_angles[imin])*180/np.pi
+        self.diff_max = max(self.diff_max,self.diff)
+        self.pair = (self.names[imax],self.names[imin])
+
+        dist = np.abs(self.com_angles-self.coi)*OOSReplay.RadToDeg
+        icrit = int(np.argmax(dist))
+        self.crit_dist = float(dist[icrit])
+        if self.names[icrit] != self.crit:
+            old = self.crit
+            self.crit = self.names[icrit]
+            if self.on_crit is not None and old is not None:
+                self.on_crit(t, old, self.crit, self.crit_dist)
+
+        if self.AlarmAngle is not None and self.alarm_time is None and self.diff > self.AlarmAngle:
+            self.alarm_time = t
+            if self.on_alarm is not None:
+                self.on_alarm(t, self.diff)
+
+        if self.trip_time is None:
+            if self.horizon > 0:
+                #the difference horizon seconds ago (at least one step), or the first one
+                self.diffs.append((t,self.diff))
+                while len(self.diffs) > 1 and self.diffs[1][0] <= t-max(self.horizon,OOSReplay.DelayTime)+1e-9:
+                    self.diffs.popleft()
+                d_diff = self.diffs[0][1]
+                trig = self.diff+max(self.diff-d_diff,0) > self.TripAngle
+            else:
+                trig = self.diff > self.TripAngle
+            if trig:
+                self.trip_time = t
+                self.trip_pair = self.pair
+                self.trip_diff = self.diff
+                if self.on_trip is not None:
+                    self.on_trip(t, self.pair, self.diff)
+
+        return(not self.stopped)
+
+    def Feed(self, samples):
+        '''This function processes the (time, angles) samples of an iterable, until it is exhausted or the detector stops the
+           simulation, and returns the result.'''
+
+        for t,angles in samples:
+            if not self.Update(t, angles):
+                break
+        return(self.Result())
+
+    def Result(self):
+        '''This function returns the result of the samples processed so far, as a dictionary with the same entries as
+           OOSReplay.ReplayOOS.'''
+
+        assert self.samples > 0, "No samples were processed yet."
+
+        tripped = self.trip_time is not None
+        return({"tripped": tripped,
+                "trip_time": self.trip_time,
+                "stop_time": self.t,
+                "pair": self.trip_pair,
+                "diff": self.trip_diff if tripped else self.diff_max,
+                "diff_end": self.diff,
+                "crit_gen": self.crit,
+                "crit_dist": self.crit_dist,
+                "alarm_time": self.alarm_time})
+
+class TriggeredCapture:
+    '''Captures the comulative angles around the trip (or the alarm) of a StreamingDetector. The last pre seconds of the
+       comulative angles are kept in a float32 ring buffer, and once the detector triggers, the next post seconds are added
+       to it. Only that window is written to a file (see Flush), instead of the whole trajectory. dt is the expected time
+       step, which sets the size of the buffers. The other arguments are given to the StreamingDetector. If path is given,
+       the window is written to it as soon as it is complete.'''
+
+    def __init__(self, names: list, H = None, Sn = None, pre: float = 1.0, post: float = 0.5, dt: float = OOSReplay.DelayTime,
+                 trigger: str = "trip", path: str = None, **kwargs):
+        assert trigger in ["trip","alarm"], "trigger should be 'trip' or 'alarm' not "+str(trigger)
+        assert pre >= 0 and post >= 0, "pre and post should not be negative."
+        if trigger == "alarm":
+            assert kwargs.get("AlarmAngle") is not None, "AlarmAngle should be given for the trigger 'alarm'."
+
+        self.detector = StreamingDetector(names, H, Sn, stop=False, **kwargs)
+        self.names = self.detector.names
+        self.pre = int(round(pre/dt))+1
+        self.post = int(round(post/dt))
+        self.trigger = trigger
+        self.path = path
+        self.Reset()
+
+    def Reset(self):
+        '''This function empties the buffers and resets the detector.'''
+
+        self.detector.Reset()
+        self.ring = np.zeros((self.pre,self.detector.n), dtype=np.float32)
+        self.ring_t = np.zeros(self.pre)
+        self.count = 0
+        self.after = np.zeros((self.post,self.detector.n), dtype=np.float32)
+        self.after_t = np.zeros(self.post)
+        self.nafter = 0
+        self.trigger_time = None
+        self.window = None
+
+    def Update(self, t: float, angles):
+        '''This function processes the rotor angles of one time step. It returns False once the window is complete.'''
+
+        if self.window is not None:
+            return(False)
+
+        self.detector.Update(t, angles)
+        if self.trigger_time is None:
+            self.ring[self.count%self.pre] = self.detector.com_angles
+            self.ring_t[self.count%self.pre] = self.detector.t
+            self.count += 1
+            self.trigger_time = self.detector.trip_time if self.trigger == "trip" else self.detector.alarm_time
+        elif self.nafter < self.post:
+            self.after[self.nafter] = self.detector.com_angles
+            self.after_t[self.nafter] = self.detector.t
+            self.nafter += 1
+
+        if self.trigger_time is not None and self.nafter == self.post:
+            self.Close()
+            return(False)
+        return(True)
+
+    def Feed(self, samples):
+        '''This function processes the (time, angles) samples of an iterable, until it is exhausted or the window is complete,
+           and returns the window (see Window).'''
+
+        for t,angles in samples:
+            if not self.Update(t, angles):
+                break
+        return(self.Close())
+
+    def Close(self):
+        '''This function completes the window with the samples captured so far (e.g. when the feed ends before post seconds
+           after the trigger), writes it to path if it was given and returns it. It returns None, if the detector didn't
+           trigger.'''
+
+        if self.window is None and self.trigger_time is not None:
+            start = max(0,self.count-self.pre)
+            order = [i%self.pre for i in range(start,self.count)]
+            self.window = {"t": np.concatenate([self.ring_t[order],self.after_t[:self.nafter]]),
+                           "angles": np.asfortranarray(np.concatenate([self.ring[order],self.after[:self.nafter]])),
+                           "names": np.asarray(self.names),
+                           "trigger": self.trigger,
+                           "trigger_time": self.trigger_time}
+            if self.path is not None:
+                self.Flush(self.path)
+        return(self.window)
+
+    def Flush(self, path: str):
+        '''This function writes the captured window to a file. A .npz file holds the arrays t, angles, names, trigger and
+           trigger_time. For a .npy file, the angles are written to it and the other arrays to path + ".json". The angles are
+           stored as a (time x generators) float32 array in Fortran order, so that the samples of a generator are contiguous
+           and a .npy file can be memory-mapped (see LoadCapture).'''
+
+        assert self.window is not None, "The window isn't complete, call Close() first."
+
+        if path.endswith(".npz"):
+            np.savez(path, t=self.window["t"], angles=self.window["angles"], names=self.window["names"],
+                     trigger=self.window["trigger"], trigger_time=self.window["trigger_time"])
+        elif path.endswith(".npy"):
+            np.save(path, self.window["angles"])
+            with open(path+".json","w") as f:
+                json.dump({"t": self.window["t"].tolist(),
+                           "names": [str(i) for i in self.window["names"]],
+                           "trigger": self.window["trigger"],
+                           "trigger_time": self.window["trigger_time"]}, f)
+        else:
+            raise ValueError("Unsupported file type of "+path+", expected .npz or .npy")
+
+def LoadCapture(path: str, mmap: bool = True):
+    '''This function loads a window written by TriggeredCapture.Flush and returns it as a dictionary with t, angles (the
+       comulative angles, time x generators), names, trigger and trigger_time. The angles of a .npy file are memory-mapped
+       if mmap is True, so only the parts that are used are read. The window can be replayed with
+       OOSReplay.ReplayOOS(t, angles, unwrap=False).'''
+
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return({"t": data["t"],
+                    "angles": data["angles"],
+                    "names": [str(i) for i in data["names"]],
+                    "trigger": str(data["trigger"]),
+                    "trigger_time": float(data["trigger_time"])})
+    if path.endswith(".npy"):
+        with open(path+".json") as f:
+            meta = json.load(f)
+        meta["t"] = np.asarray(meta["t"])
+        meta["angles"] = np.load(path, mmap_mode="r" if mmap else None)
+        return(meta)
+    raise ValueError("Unsupported file type of "+path+", expected .npz or .npy")
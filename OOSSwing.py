@@ -0,0 +1,302 @@
+'''
+Author: Matjaz Skrlec
+date: 18. 10. 2026
+version: 1.0
+description: Fast pre-screening of contingencies with a classical multimachine model (constant voltage behind the transient
+reactance, constant impedance loads, no damping by default). Many contingencies are integrated at once as one batch of
+reduced admittance matrices, the machines use the same H and Sn as DetectCritGenerator and the cases are tripped with the same
+180 degree criterion as the out-of-step detection block. The result of every case has the same format as OOSReplay.ReplayOOS,
+so clearly stable and clearly unstable cases can be sorted out in milliseconds and only the borderline cases have to be
+simulated in powerfactory. Requires numpy.
+
+A contingency is a dictionary with:
+    name - the name of the case,
+    fault_bus - the name of the bus with the three-phase fault,
+    fault_time - the time of the fault in seconds (0.1 by default),
+    clear_time - the time at which the fault is cleared in seconds,
+    trip - the names of the branches that are switched off when the fault is cleared (optional),
+    Zf - the fault impedance in p.u. (optional, a bolted fault by default).
+'''
+
+import numpy as np
+
+import OOSReplay
+
+#step of the integration [s], the angles are recorded with the delay time of the angle adder (OOSReplay.DelayTime)
+DefaultStep = 0.002
+
+#admittance of a bolted fault [p.u.]
+FaultAdmittance = 1e6
+
+#support functions
+
+class SwingSystem:
+    '''Network and machine data of the classical model. The buses are given by name, the branches as (name, from bus, to bus,
+       R, X, B) in p.u. on the base power Sb (B is the total line charging). The pre-fault operating point is given with the
+       complex bus voltages V and the complex power of the machines Sgen (generator convention) and loads Sload, the loads are
+       modelled as constant impedances. H (s) and Sn (MVA) are the inertia constants and rated powers of the machines, as
+       read by DetectCritGenerator, xd the transient reactances in p.u. on the base power Sb.'''
+
+    def __init__(self, buses: list, branches: list, names: list, gen_buses: list, H, Sn, xd, V, Sgen, Sload = None,
+                 D = None, f: float = 50, Sb: float = OOSReplay.Sb):
+        self.buses = list(buses)
+        self.bus_index = {b: i for i,b in enumerate(self.buses)}
+        self.branches = list(branches)
+        self.branch_index = {b[0]: i for i,b in enumerate(self.branches)}
+        self.names = list(names)
+        self.n = len(self.names)
+        self.gen_buses = np.asarray([self.bus_index[i] for i in gen_buses])
+        self.H = np.asarray(H, dtype=float)
+        self.Sn = np.asarray(Sn, dtype=float)
+        self.xd = np.asarray(xd, dtype=float)
+        self.V = np.asarray(V, dtype=complex)
+        self.Sgen = np.asarray(Sgen, dtype=complex)
+        self.Sload = np.zeros(len(self.buses), dtype=complex) if Sload is None else np.asarray(Sload, dtype=complex)
+        self.D = np.zeros(self.n) if D is None else np.asarray(D, dtype=float)
+        self.f = f
+        self.Sb = Sb
+
+        assert self.n > 1, "There should be more than one machine."
+        for i in [self.H,self.Sn,self.xd,self.Sgen,self.D]:
+            assert i.shape == (self.n,), "The machine data should have "+str(self.n)+" entries not "+str(i.shape)
+        assert self.V.shape == (len(self.buses),), "V should have an entry for every bus."
+
+        #machine internal voltages and mechanical power from the pre-fault operating point
+        Vg = self.V[self.gen_buses]
+        self.E = Vg+1j*self.xd*np.conj(self.Sgen/Vg)
+        self.Pm = (self.E*np.conj((self.E-Vg)/(1j*self.xd))).real
+        self.delta0 = np.angle(self.E)
+        #inertia on the base power, M = 2*H*Sn/Sb/ws
+        self.M = 2*self.H*self.Sn/self.Sb/(2*np.pi*self.f)
+
+    def Ybus(self, tripped: list = ()):
+        '''This function returns the bus admittance matrix with the loads and without the given branches.'''
+
+        Y = np.zeros((len(self.buses),len(self.buses)), dtype=complex)
+        for name,fbus,tbus,R,X,B in self.branches:
+            if name in tripped:
+                continue
+            i,j = self.bus_index[fbus],self.bus_index[tbus]
+            y = 1/complex(R,X)
+            Y[i,i] += y+1j*B/2
+            Y[j,j] += y+1j*B/2
+            Y[i,j] -= y
+            Y[j,i] -= y
+        Y[np.diag_indices(len(self.buses))] += np.conj(self.Sload)/np.abs(self.V)**2
+        return(Y)
+
+    def Reduce(self, Y):
+        '''This function returns the admittance matrix between the machine internal nodes, with all buses eliminated.'''
+
+        ygen = 1/(1j*self.xd)
+        Ybb = Y.copy()
+        Ybb[self.gen_buses,self.gen_buses] += ygen
+        Ybg = np.zeros((len(self.buses),self.n), dtype=complex)
+        Ybg[self.gen_buses,np.arange(self.n)] = -ygen
+        return(np.diag(ygen)-Ybg.T @ np.linalg.solve(Ybb, Ybg))
+
+    def CaseMatrices(self, case: dict):
+        '''This function returns the reduced admittance matrices of a contingency before, during and after the fault.'''
+
+        assert case["fault_bus"] in self.bus_index, "Bus "+str(case["fault_bus"])+" doesn't exist."
+        for i in case.get("trip",[]):
+            assert i in self.branch_index, "Branch "+str(i)+" doesn't exist."
+
+        Y = self.Ybus()
+        Yf = Y.copy()
+        k = self.bus_index[case["fault_bus"]]
+        Yf[k,k] += FaultAdmittance if case.get("Zf") is None else 1/case["Zf"]
+        return self.Reduce(Y),self.Reduce(Yf),self.Reduce(self.Ybus(case.get("trip",[])))
+
+def MachineData(sGens):
+    '''This function returns the names, the inertia constants and the rated powers of the given machines, a list of machines
+       (or of [Generator, Frame] entries) or a GeneratorRegistry (see OOSRegistry), from which the in-service machines are
+       taken. The data is read from the machine types the same way as in DetectCritGenerator (see OutOfStep.GetTypData),
+       the registry returns it from its columns.'''
+
+    import OutOfStep
+
+    if hasattr(sGens,"InService"):
+        idx = sGens.InService()
+        return list(sGens.names[idx]),sGens.H[idx].tolist(),sGens.Sn[idx].tolist()
+
+    assert type(sGens) == list, "sGens should be list or GeneratorRegistry not "+str(type(sGens))
+    sGens = [i[0] if type(i) == list else i for i in sGens]
+    TypData = [OutOfStep.GetTypData(i) for i in sGens]
+    return [i.loc_name for i in sGens],[i[0] for i in TypData],[i[1] for i in TypData]
+
+def ModelSystem(sGens, buses: list, branches: list, gen_buses: list, xd, V, Sgen, Sload = None, D = None, f: float = 50,
+                Sb: float = OOSReplay.Sb):
+    '''This function returns the SwingSystem of the given machines of a powerfactory model (see MachineData), with their
+       names, inertia constants and rated powers read from the model. gen_buses, xd, Sgen (and D) are given in the order of
+       the machines, the rest is the same as for SwingSystem.'''
+
+    names,H,Sn = MachineData(sGens)
+    return(SwingSystem(buses, branches, names, gen_buses, H, Sn, xd, V, Sgen, Sload, D, f, Sb))
+
+def NineBusSystem(sGens = None):
+    '''This function returns the nine-bus system of the bundled example (the WSCC nine-bus system, on 100 MVA) with the
+       inertia constants and rated powers of its machine types. If the machines of the nine-bus model (or its
+       GeneratorRegistry) are given, the inertia constants and rated powers of G1, G2 and G3 are read from their types
+       instead (see MachineData).'''
+
+    buses = ["Bus"+str(i) for i in range(1,10)]
+    branches = [("Trf 1-4","Bus1","Bus4",0.0,0.0576,0.0),
+                ("Trf 2-7","Bus2","Bus7",0.0,0.0625,0.0),
+                ("Trf 3-9","Bus3","Bus9",0.0,0.0586,0.0),
+                ("Line 4-5","Bus4","Bus5",0.010,0.085,0.176),
+                ("Line 4-6","Bus4","Bus6",0.017,0.092,0.158),
+                ("Line 5-7","Bus5","Bus7",0.032,0.161,0.306),
+                ("Line 6-9","Bus6","Bus9",0.039,0.170,0.358),
+                ("Line 7-8","Bus7","Bus8",0.0085,0.072,0.149),
+                ("Line 8-9","Bus8","Bus9",0.0119,0.1008,0.209)]
+    Vm = [1.040,1.025,1.025,1.026,0.996,1.013,1.026,1.016,1.032]
+    Va = [0.0,9.3,4.7,-2.2,-4.0,-3.7,3.7,0.7,2.0]
+    V = np.asarray(Vm)*np.exp(1j*np.radians(Va))
+    Sload = np.zeros(9, dtype=complex)
+    Sload[[4,5,7]] = [1.25+0.5j,0.9+0.3j,1.0+0.35j]
+    H = [9.551,3.92,2.766]
+    Sn = [247.5,192.0,128.0]
+
+    if sGens is not None:
+        data = {name: (h,sn) for name,h,sn in zip(*MachineData(sGens))}
+        missing = [i for i in ["G1","G2","G3"] if i not in data]
+        if missing:
+            raise KeyError("Machines "+", ".join(missing)+" of the nine-bus system are not among the given machines.")
+        H = [data[i][0] for i in ["G1","G2","G3"]]
+        Sn = [data[i][1] for i in ["G1","G2","G3"]]
+
+    return(SwingSystem(buses, branches, ["G1","G2","G3"], ["Bus1","Bus2","Bus3"],
+                       H = H,
+                       Sn = Sn,
+                       xd = [0.0608,0.1198,0.1813],
+                       V = V,
+                       Sgen = [0.716+0.27j,1.63+0.067j,0.85-0.109j],
+                       Sload = Sload))
+
+#main functions
+
+def SimulateBatch(system: SwingSystem, cases: list, tstop: float = 3.0, dt: float = DefaultStep,
+                  TripAngle: float = OOSReplay.TripAngle):
+    '''This function integrates all given contingencies at once (modified Euler) and returns the time vector and the
+       (cases x time x machines) rotor angles relative to their pre-fault values in rad (as the comulative angles of the angle
+       adders), recorded every 0.01 s, and the number of recorded steps of every case. A case is no longer integrated once its
+       stop time (0.01 s after the angles are more than TripAngle degrees apart) has passed, the integration ends when all
+       cases stopped.'''
+
+    assert type(cases) == list, "cases should be list not "+str(type(cases))
+    rec = int(round(OOSReplay.DelayTime/dt))
+    assert rec >= 1 and abs(rec*dt-OOSReplay.DelayTime) < 1e-12, "dt should divide the delay time of 0.01 s."
+
+    B,n = len(cases),system.n
+    mats = [system.CaseMatrices(i) for i in cases]
+    Ypre = np.stack([i[0] for i in mats])
+    Yf = np.stack([i[1] for i in mats])
+    Ypost = np.stack([i[2] for i in mats])
+    tf = np.asarray([i.get("fault_time",0.1) for i in cases])[:,None,None]
+    tc = np.asarray([i["clear_time"] for i in cases])[:,None,None]
+
+    absE = np.abs(system.E)
+    def accel(t, delta, omega):
+        Y = np.where(t < tf, Ypre, np.where(t < tc, Yf, Ypost))
+        E = absE*np.exp(1j*delta)
+        Pe = (E*np.conj(np.einsum("bij,bj->bi", Y, E))).real
+        return((system.Pm-Pe-system.D*omega)/system.M)
+
+    T = int(round(tstop/OOSReplay.DelayTime))+1
+    t = np.arange(T)*OOSReplay.DelayTime
+    angles = np.zeros((B,T,n), dtype=np.float32)
+    steps = np.full(B, T)
+    delta = np.tile(system.delta0,(B,1))
+    omega = np.zeros((B,n))
+    active = np.ones(B, dtype=bool)
+    trip_step = np.full(B, -1)
+
+    for k in range(1,T):
+        #the faults are switched exactly on the recording steps, the sub-steps are evaluated in between
+        for j in range(rec):
+            ts = t[k-1]+j*dt
+            a1 = accel(ts, delta, omega)
+            d1 = delta+dt*omega
+            o1 = omega+dt*a1
+            a2 = accel(ts+dt, d1, o1)
+            delta = np.where(active[:,None], delta+dt/2*(omega+o1), delta)
+            omega = np.where(active[:,None], omega+dt/2*(a1+a2), omega)
+        angles[:,k] = delta-system.delta0
+
+        #the comulative angles of the angle adders start at 0, as the recorded angles
+        spread = np.degrees(angles[:,k].max(axis=1)-angles[:,k].min(axis=1))
+        new = active & (trip_step < 0) & (spread > TripAngle)
+        trip_step[new] = k
+        stop = active & (trip_step >= 0) & (k >= trip_step+1)
+        steps[stop] = k+1
+        active &= ~stop
+        if not active.any():
+            break
+
+    return t,angles,steps
+
+def SimulateCases(system: SwingSystem, cases: list, tstop: float = 3.0, dt: float = DefaultStep,
+                  TripAngle: float = OOSReplay.TripAngle, AlarmAngle: float = None):
+    '''This function simulates the given contingencies with SimulateBatch and returns one result per case, in the format of
+       OOSReplay.ReplayOOS, with the name of the case and whether it was stable.'''
+
+    t,angles,steps = SimulateBatch(system, cases, tstop, dt, TripAngle)
+    results = []
+    for i,case in enumerate(cases):
+        res = OOSReplay.ReplayOOS(t[:steps[i]], angles[i,:steps[i]], system.H, system.Sn, system.names, False, TripAngle,
+                                  AlarmAngle)
+        res["name"] = case.get("name","case"+str(i+1))
+        res["stable"] = not res["tripped"]
+        results.append(res)
+    return(results)
+
+def Prescreen(system: SwingSystem, cases: list, margin: float = 0.02, tstop: float = 3.0, dt: float = DefaultStep):
+    '''This function classifies the contingencies as "stable", "unstable" or "borderline". Every case is simulated with its
+       clearing time and with the clearing time moved margin seconds later and earlier, all in one batch. A case is stable
+       if it is stable even with the later clearance, unstable if it is unstable even with the earlier clearance and
+       borderline otherwise, only the borderline cases need a detailed simulation. It returns the results of the cases (see
+       SimulateCases) with the classification in "class".'''
+
+    shifted = []
+    for i in cases:
+        shifted.append(i)
+        shifted.append(dict(i, clear_time=i["clear_time"]+margin))
+        shifted.append(dict(i, clear_time=max(i.get("fault_time",0.1),i["clear_time"]-margin)))
+    res = SimulateCases(system, shifted, tstop, dt)
+
+    results = []
+    for i in range(len(cases)):
+        nominal,later,earlier = res[3*i:3*i+3]
+        if later["stable"]:
+            nominal["class"] = "stable"
+        elif not earlier["stable"]:
+            nominal["class"] = "unstable"
+        else:
+            nominal["class"] = "borderline"
+        results.append(nominal)
+    return(results)
+
+def ValidateNineBus(ClearTimes = None, tstop: float = 3.0, system: SwingSystem = None):
+    '''This function simulates the three-phase fault at Bus7 of the bundled nine-bus example (at 0.1 s, cleared without
+       switching off any branch) for the given clearing times and checks, that the cases get unstable from a single clearing
+       time on and that G2 is the critical generator of the unstable cases, as in the example. A ValueError is raised if they
+       don't. The system is NineBusSystem(), if it isn't given. It returns the results and the last stable clearing time.'''
+
+    if ClearTimes is None:
+        ClearTimes = [0.1+0.01*i for i in range(1,41)]
+    if system is None:
+        system = NineBusSystem()
+    cases = [{"name": "Bus7@"+str(round(i,3)), "fault_bus": "Bus7", "fault_time": 0.1, "clear_time": i} for i in ClearTimes]
+    results = SimulateCases(system, cases, tstop)
+
+    stable = [i["stable"] for i in results]
+    if stable != sorted(stable, reverse=True):
+        raise ValueError("The stability of the cases should change only once with the clearing time, it is "+
+                         ", ".join([i["name"]+(" stable" if i["stable"] else " unstable") for i in results]))
+    for i in results:
+        if not i["stable"] and i["crit_gen"] != "G2":
+            raise ValueError("G2 should be the critical generator of "+i["name"]+" not "+i["crit_gen"])
+
+    cct = max([c for c,s in zip(ClearTimes,stable) if s], default=None)
+    return results,cct
@@ -7,8 +7,86 @@ Out of step means, that the rotor between two generators is seperated by more th
 whick helps detecting, which generator is the critical generator.
 '''
 
+import hashlib
+import json
+
 #support functions
 
+#name index of the grids and folders this module looks up objects in, keyed by the full name of the container.
+#Structure of each entry: full name: {loc_name: object}
+NameIndex = {}
+
+#BlockTyps of the folders, by the hash of their inputs, outputs and equations, keyed by the full name of the folder.
+#Structure of each entry: full name: {hash: BlkDef}
+TemplateRegistry = {}
+
+#slot layouts of the out-of-step detectors updated by this module, keyed by the full name of the Frame (see GetOOSDetLayout)
+OOSDetLayoutCache = {}
+
+#inertia constant and rated power of the machine types read by the trajectory functions. Structure of each entry:
+#full name of the type: (H, Sn)
+TypDataCache = {}
+
+def GetNameIndex(container):
+    '''This function returns the name index of the given grid or folder. The index is built with a single GetContents call
+       the first time it is needed and is kept up to date by the objects this module creates and deletes.'''
+
+    key = container.GetFullName()
+    index = NameIndex.get(key)
+    if index is None:
+        index = {}
+        for i in container.GetContents():
+            index.setdefault(i.loc_name, i)
+        NameIndex[key] = index
+    return(index)
+
+def InvalidateNameIndex(container = None):
+    '''This function drops the name index of the given grid or folder, or of all of them if no container is given. It should
+       be called after objects were created, renamed or deleted outside of this module.'''
+
+    if container is None:
+        NameIndex.clear()
+    else:
+        NameIndex.pop(container.GetFullName(), None)
+
+def InvalidateCaches():
+    '''This function drops all name indexes, template registries, detector layouts and machine type data of this module. It
+       should be called when switching to another project.'''
+
+    NameIndex.clear()
+    TemplateRegistry.clear()
+    OOSDetLayoutCache.clear()
+    TypDataCache.clear()
+
+def CreateIndexedObject(container, ClassName: str, name: str):
+    '''This function creates an object in the given grid or folder and adds it to the name index of the container.'''
+
+    obj = container.CreateObject(ClassName,name)
+    index = NameIndex.get(container.GetFullName())
+    if index is not None:
+        index.setdefault(name, obj)
+    return(obj)
+
+def CopyIndexedObject(container, obj, name: str):
+    '''This function copies an object into the given grid or folder and adds the copy to the name index of the container.'''
+
+    copy = container.AddCopy(obj,name)
+    index = NameIndex.get(container.GetFullName())
+    if index is not None:
+        index.setdefault(name, copy)
+    return(copy)
+
+def DeleteIndexedObject(container, obj):
+    '''This function deletes an object from the given grid or folder and removes it from the name index of the container.
+       The entry is removed by the name of the object, because powerfactory returns a new wrapper of the same object on every
+       access, so the indexed wrapper is not the same python object as the given one.'''
+
+    name = obj.loc_name
+    if obj.Delete() == 0:
+        index = NameIndex.get(container.GetFullName())
+        if index is not None:
+            index.pop(name, None)
+
 def CreateBlkDef(name: str, folder):
     
     '''This function creates a model type in the designated folder'''
@@ -16,31 +94,114 @@ def CreateBlkDef(name: str, folder):
     assert type(name) == str, "name should be string not "+ str(type(name))
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
     
-    return(folder.CreateObject("BlkDef",name))
+    return(CreateIndexedObject(folder,"BlkDef",name))
+
+def TemplateHash(sInput: list, sOutput: list, sAddEquat: list):
+    '''This function returns the hash of the inputs, outputs and equations of a BlockTyp.'''
+
+    content = json.dumps([[str(i) for i in sInput],[str(i) for i in sOutput],[str(i) for i in sAddEquat]])
+    return(hashlib.sha1(content.encode()).hexdigest())
+
+def BlkTypHash(BlkTyp):
+    '''This function returns the hash of the content of the given BlockTyp (see TemplateHash), which doesn't depend on the
+       name or the location of the BlockTyp.'''
+
+    return(TemplateHash(BlkTyp.GetAttribute("sInput"),BlkTyp.GetAttribute("sOutput"),BlkTyp.GetAttribute("sAddEquat")))
+
+def GetTemplateRegistry(folder):
+    '''This function returns the BlockTyps (with equations) in the given folder by the hash of their inputs, outputs and
+       equations. The registry is built once per folder and then taken from TemplateRegistry.'''
 
-def CreateOOSDetBlockTyp(name: str, folder):
-    '''This function creates the BlockTyp that detects if machines are out-of-step'''
+    key = folder.GetFullName()
+    registry = TemplateRegistry.get(key)
+    if registry is None:
+        registry = {}
+        for i in folder.GetContents("*.BlkDef"):
+            sAddEquat = i.GetAttribute("sAddEquat")
+            if sAddEquat:
+                registry.setdefault(TemplateHash(i.GetAttribute("sInput"),i.GetAttribute("sOutput"),sAddEquat),i)
+        TemplateRegistry[key] = registry
+    return(registry)
+
+def InvalidateTemplateRegistry(folder = None):
+    '''This function drops the template registry of the given folder, or of all of them if no folder is given. It should be
+       called after BlockTyps were edited or deleted outside of this module.'''
+
+    if folder is None:
+        TemplateRegistry.clear()
+    else:
+        TemplateRegistry.pop(folder.GetFullName(), None)
+
+def GetBlkDefTemplate(name: str, folder, sInput: list, sOutput: list, sAddEquat: list):
+    '''This function returns the BlockTyp with the given inputs, outputs and equations from the given folder. If no such
+       BlockTyp exists it is created with the given name, or with the name followed by the hash of its content, if a
+       different BlockTyp with the name already exists.'''
 
     assert type(name) == str, "name should be string not "+ str(type(name))
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
 
+    key = TemplateHash(sInput,sOutput,sAddEquat)
+    registry = GetTemplateRegistry(folder)
+    if key in registry:
+        return(registry[key])
+
+    if CheckIfTypExists(name, folder, False)[0]:
+        name = name+"_"+key[:8]
+
+    BlkTyp = CreateBlkDef(name, folder)
+    BlkTyp.SetAttribute("sOutput",sOutput)
+    BlkTyp.SetAttribute("sInput",sInput)
+    BlkTyp.SetAttribute("sAddEquat",sAddEquat)
+    registry[key] = BlkTyp
+
+    return(BlkTyp)
+
+def CreateOOSDetBlockTyp(name: str, folder, TripAngle: float = 180, AlarmAngle: float = None, horizon: float = 0):
+    '''This function creates the BlockTyp that detects if machines are out-of-step, an identical existing BlockTyp is reused.
+       The simulation is stopped when the difference between the max and min angle exceeds TripAngle (in degrees). If
+       AlarmAngle is given, an alarm is raised (alarm = 1 and a message in the output window) when the difference exceeds it.
+       If horizon (in seconds) is bigger than 0, the simulation is also stopped when the difference, projected horizon seconds
+       ahead with its rate of change over the last horizon seconds, exceeds TripAngle. The rate is taken over a time and not
+       over a step, so it doesn't depend on the step size of the simulation (horizon should be longer than the step).'''
+
+    assert type(name) == str, "name should be string not "+ str(type(name))
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert TripAngle > 0, "TripAngle should be bigger than 0."
+    assert AlarmAngle is None or 0 < AlarmAngle < TripAngle, "AlarmAngle should be between 0 and TripAngle."
+    assert horizon >= 0, "horizon should not be negative."
+
+    trip = "{:g}".format(TripAngle)
+
     equation_list = ["inc(diff)=0",\
                      "inc(angmax)=0",\
                      "inc(angmin)=0",\
-                     "inc(trig)=-1",\
-                     "diff = (angmax-angmin)*180/pi()",\
-                     "trig = select(diff>180,1,-1)",\
-                     "event(1,trig,'create=EvtStop name=stopdsl dtime=0.01')"]
+                     "inc(trig)=-1"]
+    if AlarmAngle is not None:
+        equation_list.append("inc(alarm)=-1")
+
+    equation_list.append("diff = (angmax-angmin)*180/pi()")
+
+    if horizon > 0:
+        #the difference is projected ahead only while it is growing, its growth over the last horizon seconds is the
+        #projected growth over the next horizon seconds
+        equation_list = equation_list + ["d_diff = delay(diff,"+"{:g}".format(horizon)+")",\
+                                         "proj = diff+max(diff-d_diff,0)",\
+                                         "trig = select(proj>"+trip+",1,-1)"]
+    else:
+        equation_list.append("trig = select(diff>"+trip+",1,-1)")
+
+    if AlarmAngle is not None:
+        equation_list = equation_list + ["alarm = select(diff>"+"{:g}".format(AlarmAngle)+",1,-1)",\
+                                         "output(alarm>0,'Out of step alarm, angle difference diff=###.## deg')"]
 
-    OOSDetTyp = CreateBlkDef(name, folder)
-    OOSDetTyp.SetAttribute("sOutput",["diff"])
-    OOSDetTyp.SetAttribute("sInput",["angmax,angmin"])
-    OOSDetTyp.SetAttribute("sAddEquat",equation_list)
+    equation_list.append("event(1,trig,'create=EvtStop name=stopdsl dtime=0.01')")
+
+    OOSDetTyp = GetBlkDefTemplate(name, folder, ["angmax,angmin"], ["diff"], equation_list)
 
     return(OOSDetTyp)
 
 def CreateBlkMaxTyp(folder):
-    '''This function creates the BlockTyp that returns the bigger of two values'''
+    '''This function creates the BlockTyp that returns the bigger of two values, an identical existing BlockTyp is reused'''
 
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
 
@@ -49,15 +210,12 @@ def CreateBlkMaxTyp(folder):
                      "inc(ang2)=0",\
                      "angmax=max(ang1,ang2)"]
 
-    BlkMaxTyp = CreateBlkDef("BlkMaxTyp",folder)
-    BlkMaxTyp.SetAttribute("sOutput",["angmax"])
-    BlkMaxTyp.SetAttribute("sInput",["ang1,ang2"])
-    BlkMaxTyp.SetAttribute("sAddEquat",equation_list)
+    BlkMaxTyp = GetBlkDefTemplate("BlkMaxTyp", folder, ["ang1,ang2"], ["angmax"], equation_list)
 
     return(BlkMaxTyp)
 
 def CreateBlkMinTyp(folder):
-    '''This function creates the BlockTyp that returns the smaller of two values'''
+    '''This function creates the BlockTyp that returns the smaller of two values, an identical existing BlockTyp is reused'''
 
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
 
@@ -66,26 +224,126 @@ def CreateBlkMinTyp(folder):
                      "inc(ang2)=0",\
                      "angmin=min(ang1,ang2)"]
 
-    BlkMinTyp = CreateBlkDef("BlkMinTyp",folder)
-    BlkMinTyp.SetAttribute("sOutput",["angmin"])
-    BlkMinTyp.SetAttribute("sInput",["ang1,ang2"])
-    BlkMinTyp.SetAttribute("sAddEquat",equation_list)
+    BlkMinTyp = GetBlkDefTemplate("BlkMinTyp", folder, ["ang1,ang2"], ["angmin"], equation_list)
 
     return(BlkMinTyp)
 
-def CreateOOSDetFrameTyp(FrmName: str, OOSBlkName: str,folder, n: int):
-    '''This function creates the FrameType for the out-of-step detector'''
+def CreateBlkMaxMinTyp(name: str, folder, n: int):
+    '''This function creates the BlockTyp that returns the biggest and the smallest of n values in one set of equations, an
+       identical existing BlockTyp is reused'''
+
+    assert type(name) == str, "name should be string not "+ str(type(name))
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert n > 1, "n should be bigger than 1."
+
+    inputs = ["ang"+str(i+1) for i in range(n)]
+
+    equation_list = ["inc(angmax)=0","inc(angmin)=0"]
+    for i in inputs:
+        equation_list.append("inc("+i+")=0")
+
+    #the max/min expressions are evaluated as a balanced tree of intermediate variables
+    def source(src, prefix):
+        if src[0] == "ang":
+            return inputs[src[1]]
+        return prefix+str(src[1])
+
+    nodes = OOSDetReduction(n,"tree")
+    for k,node in enumerate(nodes, start=1):
+        mx = "angmax" if k == len(nodes) else "mx"+str(k)
+        mn = "angmin" if k == len(nodes) else "mn"+str(k)
+        equation_list.append(mx+"=max("+source(node[0],"mx")+","+source(node[1],"mx")+")")
+        equation_list.append(mn+"=min("+source(node[0],"mn")+","+source(node[1],"mn")+")")
+
+    BlkMaxMinTyp = GetBlkDefTemplate(name, folder, [",".join(inputs)], ["angmax,angmin"], equation_list)
+
+    return(BlkMaxMinTyp)
+
+def OOSDetReduction(n: int, topology: str):
+    '''This function returns the order in which the max/min blocks of the out-of-step detector combine the angles.
+       Every entry is one block (numbered from 1) with its two inputs, given as ("ang", angle index) or
+       ("blk", block number). The last block returns the overall max/min.'''
+
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert n > 1, "n should be bigger than 1."
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
+
+    if topology == "chain":
+        nodes = [[("ang",0),("ang",1)]]
+        for j in range(2,n):
+            nodes.append([("ang",j),("blk",j-1)])
+        return(nodes)
+
+    #balanced binary tree, the odd element of a layer is passed on to the next layer
+    nodes = []
+    layer = [("ang",i) for i in range(n)]
+    while len(layer) > 1:
+        next_layer = []
+        for i in range(0,len(layer)-1,2):
+            nodes.append([layer[i],layer[i+1]])
+            next_layer.append(("blk",len(nodes)))
+        if len(layer)%2 == 1:
+            next_layer.append(layer[-1])
+        layer = next_layer
+    return(nodes)
+
+def OOSDetTopologyInfo(n: int, topology: str = "chain"):
+    '''This function reports how many objects the out-of-step detector with n angles consists of and how deep
+       its max/min graph is for the given topology.'''
+
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert n > 1, "n should be bigger than 1."
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
+
+    if topology == "single":
+        depth = 1
+        elm_dsl = 2
+        slots = n+2
+        signals = n+2
+    else:
+        nodes = OOSDetReduction(n,topology)
+        levels = {}
+        for k,node in enumerate(nodes, start=1):
+            levels[k] = 1 + max([levels[src[1]] if src[0] == "blk" else 0 for src in node])
+        depth = levels[len(nodes)]
+        elm_dsl = 2*(n-1)+1
+        slots = n+2*(n-1)+1
+        signals = 4*(n-1)+2
+
+    return({"topology": topology,
+            "n": n,
+            "depth": depth,
+            "ElmDsl": elm_dsl,
+            "BlkSlot": slots,
+            "BlkSig": signals})
+
+def CreateSig(FrmTyp, name: str, nodfrom, inodfrom: int, nodto, inodto: int, iconto: int = 1):
+    '''This function creates a signal between two slots of the given FrameTyp'''
+
+    sig = FrmTyp.CreateObject("BlkSig",name)
+    sig.SetAttribute("pnodfrom",nodfrom)
+    sig.SetAttribute("inodfrom",inodfrom)
+    sig.SetAttribute("pnodto",nodto)
+    sig.SetAttribute("iconto",iconto)
+    sig.SetAttribute("inodto",inodto)
+    return(sig)
+
+def CreateOOSDetFrameTyp(FrmName: str, OOSBlkName: str,folder, n: int, topology: str = "chain", TripAngle: float = 180,
+                         AlarmAngle: float = None, horizon: float = 0):
+    '''This function creates the FrameType for the out-of-step detector. The topology sets how the max/min
+       values are evaluated: "chain" (n-1 max and min blocks in series), "tree" (n-1 max and min blocks in a
+       balanced tree of depth ceil(log2(n))) or "single" (one block with n inputs). TripAngle, AlarmAngle and horizon
+       configure the out-of-step detection block, see CreateOOSDetBlockTyp.'''
 
     assert type(FrmName) == str, "Frame name should be string not"+ str(type(FrmName))
     assert type(OOSBlkName) == str, "Out of step detection block name should be string not"+ str(type(OOSBlkName))
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
     assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
 
     OOSDetFrmTyp = CreateBlkDef(FrmName,folder)
-    OOSDetBlkTyp = CreateOOSDetBlockTyp(OOSBlkName,folder)
-
-    BlkMaxTyp = CreateBlkMaxTyp(folder)
-    BlkMinTyp = CreateBlkMinTyp(folder)
+    OOSDetBlkTyp = CreateOOSDetBlockTyp(OOSBlkName,folder,TripAngle,AlarmAngle,horizon)
 
     #create angle slots
     angle_slots = []
@@ -94,6 +352,26 @@ def CreateOOSDetFrameTyp(FrmName: str, OOSBlkName: str,folder, n: int):
         curr_ang_slot.SetAttribute("sOutput",["xphi"])
         angle_slots.append(curr_ang_slot)
 
+    if topology == "single":
+        BlkMaxMinTyp = CreateBlkMaxMinTyp("BlkMaxMinTyp"+str(n),folder,n)
+
+        maxmin_slot = OOSDetFrmTyp.CreateObject("BlkSlot","maxmin")
+        maxmin_slot.SetAttribute("pDsl",BlkMaxMinTyp)
+
+        OOSdetBlk_slot = OOSDetFrmTyp.CreateObject("BlkSlot","OOSdetBlk")
+        OOSdetBlk_slot.SetAttribute("pDsl",OOSDetBlkTyp)
+
+        for i in range(n):
+            CreateSig(OOSDetFrmTyp,"ang"+str(i+1),angle_slots[i],0,maxmin_slot,i)
+
+        CreateSig(OOSDetFrmTyp,"angmax",maxmin_slot,0,OOSdetBlk_slot,0)
+        CreateSig(OOSDetFrmTyp,"angmin",maxmin_slot,1,OOSdetBlk_slot,1)
+
+        return OOSDetFrmTyp,OOSDetBlkTyp,BlkMaxMinTyp,None
+
+    BlkMaxTyp = CreateBlkMaxTyp(folder)
+    BlkMinTyp = CreateBlkMinTyp(folder)
+
     #create max slots
     max_slots = []
     for i in range(1,n):
@@ -112,84 +390,203 @@ def CreateOOSDetFrameTyp(FrmName: str, OOSBlkName: str,folder, n: int):
     OOSdetBlk_slot = OOSDetFrmTyp.CreateObject("BlkSlot","OOSdetBlk")
     OOSdetBlk_slot.SetAttribute("pDsl",OOSDetBlkTyp)
 
-    #first ocnnection layer
-    sig1_1 = OOSDetFrmTyp.CreateObject("BlkSig","ang1_1")
-    sig1_1.SetAttribute("pnodfrom",angle_slots[0])
-    sig1_1.SetAttribute("inodfrom",0)
-    sig1_1.SetAttribute("pnodto",max_slots[0])
-    sig1_1.SetAttribute("iconto",1)
-    sig1_1.SetAttribute("inodto",0)
-
-    sig1_2 = OOSDetFrmTyp.CreateObject("BlkSig","ang1_2")
-    sig1_2.SetAttribute("pnodfrom",angle_slots[0])
-    sig1_2.SetAttribute("inodfrom",0)
-    sig1_2.SetAttribute("pnodto",min_slots[0])
-    sig1_2.SetAttribute("iconto",1)
-    sig1_2.SetAttribute("inodto",0)
-
-    sig2_1 = OOSDetFrmTyp.CreateObject("BlkSig","ang2_1")
-    sig2_1.SetAttribute("pnodfrom",angle_slots[1])
-    sig2_1.SetAttribute("inodfrom",0)
-    sig2_1.SetAttribute("pnodto",max_slots[0])
-    sig2_1.SetAttribute("iconto",1)
-    sig2_1.SetAttribute("inodto",1)
-
-    sig2_2 = OOSDetFrmTyp.CreateObject("BlkSig","ang2_2")
-    sig2_2.SetAttribute("pnodfrom",angle_slots[1])
-    sig2_2.SetAttribute("inodfrom",0)
-    sig2_2.SetAttribute("pnodto",min_slots[0])
-    sig2_2.SetAttribute("iconto",1)
-    sig2_2.SetAttribute("inodto",1)
-
-    #middle connection layers
-    for i,j in zip(angle_slots[2:],range(2,n)):
-        curr_sig1 = OOSDetFrmTyp.CreateObject("BlkSig","ang"+str(j+1)+"_1")
-        curr_sig1.SetAttribute("pnodfrom",i)
-        curr_sig1.SetAttribute("inodfrom",0)
-        curr_sig1.SetAttribute("pnodto",max_slots[j-1])
-        curr_sig1.SetAttribute("iconto",1)
-        curr_sig1.SetAttribute("inodto",0)
-
-        curr_sig2 = OOSDetFrmTyp.CreateObject("BlkSig","ang"+str(j+1)+"_2")
-        curr_sig2.SetAttribute("pnodfrom",i)
-        curr_sig2.SetAttribute("inodfrom",0)
-        curr_sig2.SetAttribute("pnodto",min_slots[j-1])
-        curr_sig2.SetAttribute("iconto",1)
-        curr_sig2.SetAttribute("inodto",0)
-
-        curr_max_sig = OOSDetFrmTyp.CreateObject("BlkSig","angmax"+str(j-1))
-        curr_max_sig.SetAttribute("pnodfrom",max_slots[j-2])
-        curr_max_sig.SetAttribute("inodfrom",0)
-        curr_max_sig.SetAttribute("pnodto",max_slots[j-1])
-        curr_max_sig.SetAttribute("iconto",1)
-        curr_max_sig.SetAttribute("inodto",1)
-
-        curr_min_sig = OOSDetFrmTyp.CreateObject("BlkSig","angmin"+str(j-1))
-        curr_min_sig.SetAttribute("pnodfrom",min_slots[j-2])
-        curr_min_sig.SetAttribute("inodfrom",0)
-        curr_min_sig.SetAttribute("pnodto",min_slots[j-1])
-        curr_min_sig.SetAttribute("iconto",1)
-        curr_min_sig.SetAttribute("inodto",1)
+    #connect the angles and max/min blocks, signals are named after the slot they come from
+    for k,node in enumerate(OOSDetReduction(n,topology), start=1):
+        for inodto,src in enumerate(node):
+            if src[0] == "ang":
+                CreateSig(OOSDetFrmTyp,"ang"+str(src[1]+1)+"_1",angle_slots[src[1]],0,max_slots[k-1],inodto)
+                CreateSig(OOSDetFrmTyp,"ang"+str(src[1]+1)+"_2",angle_slots[src[1]],0,min_slots[k-1],inodto)
+            else:
+                CreateSig(OOSDetFrmTyp,"angmax"+str(src[1]),max_slots[src[1]-1],0,max_slots[k-1],inodto)
+                CreateSig(OOSDetFrmTyp,"angmin"+str(src[1]),min_slots[src[1]-1],0,min_slots[k-1],inodto)
 
     #last signal layer
-    sig_ang_max = OOSDetFrmTyp.CreateObject("BlkSig","angmax")
-    sig_ang_max.SetAttribute("pnodfrom",max_slots[-1])
-    sig_ang_max.SetAttribute("inodfrom",0)
-    sig_ang_max.SetAttribute("pnodto",OOSdetBlk_slot)
-    sig_ang_max.SetAttribute("iconto",1)
-    sig_ang_max.SetAttribute("inodto",0)
-
-    sig_ang_min = OOSDetFrmTyp.CreateObject("BlkSig","angmin")
-    sig_ang_min.SetAttribute("pnodfrom",min_slots[-1])
-    sig_ang_min.SetAttribute("inodfrom",0)
-    sig_ang_min.SetAttribute("pnodto",OOSdetBlk_slot)
-    sig_ang_min.SetAttribute("iconto",1)
-    sig_ang_min.SetAttribute("inodto",1)
+    CreateSig(OOSDetFrmTyp,"angmax",max_slots[-1],0,OOSdetBlk_slot,0)
+    CreateSig(OOSDetFrmTyp,"angmin",min_slots[-1],0,OOSdetBlk_slot,1)
     
     return OOSDetFrmTyp,OOSDetBlkTyp,BlkMaxTyp,BlkMinTyp
 
+def GetOOSDetFrameTyp(folder, n: int, topology: str = "chain", TripAngle: float = 180, AlarmAngle: float = None,
+                      horizon: float = 0):
+    '''This function returns the FrameType for the out-of-step detector with n angles and the given topology, with its
+       BlockTyps. The FrameType is named after the topology, n and the hash of the content of its BlockTyps (not of their
+       names), so that an existing one is reused, also in a copy of the project, and only created if it doesn't exist yet.
+       TripAngle, AlarmAngle and horizon configure the out-of-step detection block, see CreateOOSDetBlockTyp.'''
+
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
+
+    OOSBlkTypName = "OODBlkTyp"
+
+    OOSDetBlkTyp = CreateOOSDetBlockTyp(OOSBlkTypName,folder,TripAngle,AlarmAngle,horizon)
+    if topology == "single":
+        BlkMaxTyp = CreateBlkMaxMinTyp("BlkMaxMinTyp"+str(n),folder,n)
+        BlkMinTyp = None
+        sBlkTyps = [OOSDetBlkTyp,BlkMaxTyp]
+    else:
+        BlkMaxTyp = CreateBlkMaxTyp(folder)
+        BlkMinTyp = CreateBlkMinTyp(folder)
+        sBlkTyps = [OOSDetBlkTyp,BlkMaxTyp,BlkMinTyp]
+
+    key = hashlib.sha1(json.dumps([topology,n]+[BlkTypHash(i) for i in sBlkTyps]).encode()).hexdigest()
+    FrmTypName = "OOSFrmTyp_"+topology+str(n)+"_"+key[:8]
+
+    FrmTypBool, OOSDetFrmTyp = CheckIfTypExists(FrmTypName, folder, False)
+    if not FrmTypBool:
+        OOSDetFrmTyp = CreateOOSDetFrameTyp(FrmTypName, OOSBlkTypName, folder, n, topology, TripAngle, AlarmAngle, horizon)[0]
+
+    return OOSDetFrmTyp,OOSDetBlkTyp,BlkMaxTyp,BlkMinTyp
+
+def CreateMaxMinSlots(FrmTyp, folder, srcmax: list, srcmin: list, topology: str):
+    '''This function creates the slots and signals in the given FrameTyp, that evaluate the max of the srcmax and the min of
+       the srcmin values. Every source is given as (slot, output index). It returns the sources of the max and the min value.
+       If both lists hold the same sources, the topology "single" evaluates both in one block with one input per source,
+       otherwise it gets one input per entry of both lists (the max of all of them is the max of srcmax, if every srcmin
+       value is smaller than a srcmax value).'''
+
+    assert len(srcmax) == len(srcmin), "srcmax and srcmin should have the same number of entries."
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
+
+    n = len(srcmax)
+    if n == 1:
+        return srcmax[0],srcmin[0]
+
+    if topology == "single":
+        srcs = srcmax if srcmax == srcmin else srcmax+srcmin
+        BlkMaxMinTyp = CreateBlkMaxMinTyp("BlkMaxMinTyp"+str(len(srcs)),folder,len(srcs))
+        maxmin_slot = FrmTyp.CreateObject("BlkSlot","maxmin")
+        maxmin_slot.SetAttribute("pDsl",BlkMaxMinTyp)
+        for i,src in enumerate(srcs):
+            CreateSig(FrmTyp,"in"+str(i+1),src[0],src[1],maxmin_slot,i)
+        return (maxmin_slot,0),(maxmin_slot,1)
+
+    BlkMaxTyp = CreateBlkMaxTyp(folder)
+    BlkMinTyp = CreateBlkMinTyp(folder)
+
+    max_slots = []
+    for i in range(1,n):
+        curr_max_slot = FrmTyp.CreateObject("BlkSlot","max_"+str(i))
+        curr_max_slot.SetAttribute("pDsl",BlkMaxTyp)
+        max_slots.append(curr_max_slot)
+
+    min_slots = []
+    for i in range(1,n):
+        curr_min_slot = FrmTyp.CreateObject("BlkSlot","min_"+str(i))
+        curr_min_slot.SetAttribute("pDsl",BlkMinTyp)
+        min_slots.append(curr_min_slot)
+
+    for k,node in enumerate(OOSDetReduction(n,topology), start=1):
+        for inodto,src in enumerate(node):
+            if src[0] == "ang":
+                CreateSig(FrmTyp,"in"+str(src[1]+1)+"_1",srcmax[src[1]][0],srcmax[src[1]][1],max_slots[k-1],inodto)
+                CreateSig(FrmTyp,"in"+str(src[1]+1)+"_2",srcmin[src[1]][0],srcmin[src[1]][1],min_slots[k-1],inodto)
+            else:
+                CreateSig(FrmTyp,"angmax"+str(src[1]),max_slots[src[1]-1],0,max_slots[k-1],inodto)
+                CreateSig(FrmTyp,"angmin"+str(src[1]),min_slots[src[1]-1],0,min_slots[k-1],inodto)
+
+    return (max_slots[-1],0),(min_slots[-1],0)
+
+def CreateMaxMinBlks(Frm, TypFolder, n: int, topology: str, distinct: bool):
+    '''This function creates the max/min blocks of a Frame whose FrameTyp was created with CreateMaxMinSlots for n sources
+       and returns them in the order of their slots. distinct tells whether the max and min sources were different.'''
+
+    if n == 1:
+        return([])
+
+    if topology == "single":
+        m = 2*n if distinct else n
+        MaxMinBlk = Frm.CreateObject("ElmDsl","maxmin")
+        MaxMinBlk.SetAttribute("typ_id",CreateBlkMaxMinTyp("BlkMaxMinTyp"+str(m),TypFolder,m))
+        return([MaxMinBlk])
+
+    BlkMaxTyp = CreateBlkMaxTyp(TypFolder)
+    BlkMinTyp = CreateBlkMinTyp(TypFolder)
+    MaxBlkLst = []
+    MinBlkLst = []
+    for i in range(1,n):
+        CurrMaxBlk = Frm.CreateObject("ElmDsl","max"+str(i))
+        CurrMaxBlk.SetAttribute("typ_id",BlkMaxTyp)
+        MaxBlkLst.append(CurrMaxBlk)
+    for i in range(1,n):
+        CurrMinBlk = Frm.CreateObject("ElmDsl","min"+str(i))
+        CurrMinBlk.SetAttribute("typ_id",BlkMinTyp)
+        MinBlkLst.append(CurrMinBlk)
+    return(MaxBlkLst+MinBlkLst)
+
+def GetOOSAreaFrameTyp(folder, n: int, topology: str = "tree"):
+    '''This function returns the FrameType of the area sub-detector with n angles. It has no out-of-step detection block,
+       its outputs are the max and the min angle of the area. An existing one with the same name is reused.'''
+
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert type(n) == int, "n should be intiger not "+str(type(n))
+    assert n > 0, "There should be at least one angle in the area."
+
+    key = hashlib.sha1(json.dumps(["area",topology,n]).encode()).hexdigest()
+    FrmTypName = "OOSAreaFrmTyp_"+topology+str(n)+"_"+key[:8]
+
+    FrmTypBool, AreaFrmTyp = CheckIfTypExists(FrmTypName, folder, False)
+    if FrmTypBool:
+        return(AreaFrmTyp)
+
+    AreaFrmTyp = CreateBlkDef(FrmTypName,folder)
+    AreaFrmTyp.SetAttribute("sOutput",["angmax,angmin"])
+
+    angle_slots = []
+    for i in range(n):
+        curr_ang_slot = AreaFrmTyp.CreateObject("BlkSlot","angle_"+str(i))
+        curr_ang_slot.SetAttribute("sOutput",["xphi"])
+        angle_slots.append(curr_ang_slot)
+
+    srcs = [(i,0) for i in angle_slots]
+    srcmax,srcmin = CreateMaxMinSlots(AreaFrmTyp, folder, srcs, srcs, topology)
+
+    #signals to the outputs of the frame
+    CreateSig(AreaFrmTyp,"angmax",srcmax[0],srcmax[1],AreaFrmTyp,0,2)
+    CreateSig(AreaFrmTyp,"angmin",srcmin[0],srcmin[1],AreaFrmTyp,1,2)
+
+    return(AreaFrmTyp)
+
+def GetOOSTopFrameTyp(folder, m: int, topology: str = "tree", TripAngle: float = 180, AlarmAngle: float = None,
+                      horizon: float = 0):
+    '''This function returns the FrameType of the top-level detector of a hierarchical out-of-step detector with m areas. It
+       evaluates the max of the area max angles and the min of the area min angles and holds the out-of-step detection
+       block (see CreateOOSDetBlockTyp). An existing one with the same name is reused.'''
+
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert type(m) == int, "m should be intiger not "+str(type(m))
+    assert m > 0, "There should be at least one area."
+
+    OOSBlkTypName = "OODBlkTyp"
+    OOSDetBlkTyp = CreateOOSDetBlockTyp(OOSBlkTypName,folder,TripAngle,AlarmAngle,horizon)
+
+    key = hashlib.sha1(json.dumps(["top",topology,m,BlkTypHash(OOSDetBlkTyp)]).encode()).hexdigest()
+    FrmTypName = "OOSTopFrmTyp_"+topology+str(m)+"_"+key[:8]
+
+    FrmTypBool, TopFrmTyp = CheckIfTypExists(FrmTypName, folder, False)
+    if FrmTypBool:
+        return TopFrmTyp,OOSDetBlkTyp
+
+    TopFrmTyp = CreateBlkDef(FrmTypName,folder)
+
+    area_slots = []
+    for i in range(m):
+        curr_area_slot = TopFrmTyp.CreateObject("BlkSlot","area_"+str(i))
+        curr_area_slot.SetAttribute("sOutput",["angmax,angmin"])
+        area_slots.append(curr_area_slot)
+
+    srcmax,srcmin = CreateMaxMinSlots(TopFrmTyp, folder, [(i,0) for i in area_slots], [(i,1) for i in area_slots], topology)
+
+    OOSdetBlk_slot = TopFrmTyp.CreateObject("BlkSlot","OOSdetBlk")
+    OOSdetBlk_slot.SetAttribute("pDsl",OOSDetBlkTyp)
+
+    CreateSig(TopFrmTyp,"angmax",srcmax[0],srcmax[1],OOSdetBlk_slot,0)
+    CreateSig(TopFrmTyp,"angmin",srcmin[0],srcmin[1],OOSdetBlk_slot,1)
+
+    return TopFrmTyp,OOSDetBlkTyp
+
 def CreateComAngBlkTyp(name: str, folder):
-    '''This function creates the BlockTyp that returns the actual rotor angle of machines.'''
+    '''This function creates the BlockTyp that returns the actual rotor angle of machines, an identical existing BlockTyp is reused.'''
 
     assert type(name) == str, "name should be string not "+ str(type(name))
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
@@ -205,35 +602,57 @@ def CreateComAngBlkTyp(name: str, folder):
                      "com_angle = add_diff + d_com_angle",\
                      "d_com_angle = delay(com_angle,0.01)"]
     
-    angle_adder = CreateBlkDef(name,folder)
-    angle_adder.SetAttribute("sInput",["ang"])
-    angle_adder.SetAttribute("sAddEquat",equation_list)
-    angle_adder.SetAttribute("sOutput",["com_angle"])
+    angle_adder = GetBlkDefTemplate(name, folder, ["ang"], ["com_angle"], equation_list)
 
     return(angle_adder)
 
-def CreateComAngFrmTyp(FrmName: str, ComAngBlkName: str, folder):
-    '''This function creates the FrameTyp that returns the actual rotor angle of machines.'''
+def CreateComAngSpeedBlkTyp(name: str, folder, fnom: float = 50):
+    '''This function creates the BlockTyp that returns the comulative rotor angle of machines by integrating their speed
+       deviation (speed in p.u., fnom the nominal frequency in Hz), an identical existing BlockTyp is reused. It needs no
+       delay buffers and doesn't depend on the step size of the simulation.'''
+
+    assert type(name) == str, "name should be string not "+ str(type(name))
+    assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert fnom > 0, "fnom should be bigger than 0."
+
+    equation_list = ["inc(speed)=1",\
+                     "inc(x_ang)=0",\
+                     "inc(com_angle)=0",\
+                     "x_ang. = (speed-1)*2*pi()*"+"{:g}".format(fnom),\
+                     "com_angle = x_ang"]
+
+    angle_integrator = GetBlkDefTemplate(name, folder, ["speed"], ["com_angle"], equation_list)
+
+    return(angle_integrator)
+
+def CreateComAngFrmTyp(FrmName: str, ComAngBlkName: str, folder, method: str = "delay", fnom: float = 50):
+    '''This function creates the FrameTyp that returns the actual rotor angle of machines. With the method "delay" the rotor
+       angle (xphi) of the machine is unwrapped with the delay buffers of CreateComAngBlkTyp, with the method "speed" the speed
+       (xspeed) of the machine is integrated by CreateComAngSpeedBlkTyp.'''
 
     assert type(FrmName) == str, "Frame name should be string not"+ str(type(FrmName))
     assert type(ComAngBlkName) == str, "Angle adder block name should be string not"+ str(type(ComAngBlkName))
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert method in ["delay","speed"], "method should be 'delay' or 'speed' not "+str(method)
 
     ComAngFrmTyp = CreateBlkDef(FrmName, folder)
-    ComAngBlkTyp = CreateComAngBlkTyp(ComAngBlkName, folder)
+    if method == "speed":
+        ComAngBlkTyp = CreateComAngSpeedBlkTyp(ComAngBlkName, folder, fnom)
+    else:
+        ComAngBlkTyp = CreateComAngBlkTyp(ComAngBlkName, folder)
 
     ComAngFrmTyp.SetAttribute("sOutput",["xphi"])
 
     #create angle (generator) slot
     ang_slot = ComAngFrmTyp.CreateObject("BlkSlot","machine")
-    ang_slot.SetAttribute("sOutput",["xphi"])
+    ang_slot.SetAttribute("sOutput",["xspeed" if method == "speed" else "xphi"])
 
     #create comulative angle adder slot
     ComAng_slot = ComAngFrmTyp.CreateObject("BlkSlot","OOSdetBlk")
     ComAng_slot.SetAttribute("pDsl",ComAngBlkTyp)
 
     #signal from angle to logic
-    sig1 = ComAngFrmTyp.CreateObject("BlkSig","ang")
+    sig1 = ComAngFrmTyp.CreateObject("BlkSig","speed" if method == "speed" else "ang")
     sig1.SetAttribute("pnodfrom",ang_slot)
     sig1.SetAttribute("inodfrom",0)
     sig1.SetAttribute("pnodto",ComAng_slot)
@@ -257,11 +676,11 @@ def CheckIfElmExists(ElmName: str, Grid, iprint: bool):
     assert Grid.GetClassName() == "ElmNet", "Grid should be 'ElmNet' type."
     assert type(iprint) == bool, "iprint is of type "+str(type(iprint))+', when it should be of type bool'
 
-    for i in Grid.GetContents():
-        if i.loc_name == ElmName:
-            if(iprint):
-                print("Elemnt with name "+ElmName+" already exists in grid "+Grid.loc_name)
-            return(True, i)
+    i = GetNameIndex(Grid).get(ElmName)
+    if i is not None:
+        if(iprint):
+            print("Elemnt with name "+ElmName+" already exists in grid "+Grid.loc_name)
+        return(True, i)
     if(iprint):
         print("Elemnt with name "+ElmName+" doesn't exists in grid "+Grid.loc_name)
     return(False, 0)
@@ -273,11 +692,11 @@ def CheckIfTypExists(TypName: str, folder, iprint: bool):
     assert folder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
     assert type(iprint) == bool, "iprint is of type "+str(type(iprint))+', when it should be of type bool'
 
-    for i in folder.GetContents():
-        if i.loc_name == TypName:
-            if(iprint):
-                print("Emenent type with name "+TypName+" already exists in folder "+folder.loc_name)
-            return(True, i)
+    i = GetNameIndex(folder).get(TypName)
+    if i is not None:
+        if(iprint):
+            print("Emenent type with name "+TypName+" already exists in folder "+folder.loc_name)
+        return(True, i)
     if(iprint):
         print("Element type with name "+TypName+" doesn't exists in folder "+folder.loc_name)
     return(False, 0)
@@ -298,6 +717,262 @@ def CheckIfComElmEnabled(oFrm, iprint: bool):
         return(False)
 
 
+def SlotSrc(SlotName: str):
+    '''This function returns the source entry ("ang", i), ("blk", k) or ("min", k) of the out-of-step detector slot with the
+       given name (angle_i, max_k, min_k), other slots are returned as (name,).'''
+
+    if SlotName.startswith("angle_"):
+        return(("ang",int(SlotName[6:])))
+    if SlotName.startswith("max_"):
+        return(("blk",int(SlotName[4:])))
+    if SlotName.startswith("min_"):
+        return(("min",int(SlotName[4:])))
+    return((SlotName,))
+
+def GetOOSDetLayout(Frm, topology: str = "chain"):
+    '''This function returns the slot layout of the given out-of-step detector Frame. The layout is read from the FrameTyp once
+       and then taken from OOSDetLayoutCache, the functions that update the detector keep it up to date. The given topology is
+       only used for detectors with two angles, whose layout is the same for "chain" and "tree". Structure of the layout:
+       topology - "chain", "tree" or "single",
+       Frm, FrmTyp - the Frame and its FrameTyp,
+       slots, pelm - the slot names in the order of the FrameTyp and the matching pelm entries of the Frame,
+       SlotObjs, sigs - the slots and signals of the FrameTyp by name,
+       angles - the full name of the element in every angle slot, by angle index,
+       nodes - the two inputs of every max/min block, by block number (see OOSDetReduction),
+       parent - the block number and input of the block every angle and block is connected to,
+       root - the block number of the block connected to the out-of-step detection block,
+       inputs - the angle indices by input of the max/min block, for the "single" topology,
+       types - the BlockTyps of the max/min blocks.'''
+
+    key = Frm.GetFullName()
+    layout = OOSDetLayoutCache.get(key)
+    if layout is not None:
+        return(layout)
+
+    FrmTyp = Frm.GetAttribute("typ_id")
+    pelm = list(Frm.GetAttribute("pelm"))
+
+    slots = []
+    SlotObjs = {}
+    sigs = {}
+    for i in FrmTyp.GetContents():
+        ClassName = i.GetClassName()
+        if ClassName == "BlkSlot":
+            slots.append(i.loc_name)
+            SlotObjs[i.loc_name] = i
+        elif ClassName == "BlkSig":
+            sigs[i.loc_name] = i
+
+    assert len(slots) == len(pelm), "The pelm list of "+Frm.loc_name+" doesn't match the slots of its Frame type."
+
+    nodes = {}
+    parent = {}
+    inputs = {}
+    root = None
+    for name,sig in sigs.items():
+        src = SlotSrc(sig.GetAttribute("pnodfrom").loc_name)
+        dst = SlotSrc(sig.GetAttribute("pnodto").loc_name)
+        inodto = sig.GetAttribute("inodto")
+        if dst[0] == "blk":
+            nodes.setdefault(dst[1],[None,None])[inodto] = src
+            parent[src] = (dst[1],inodto)
+        elif dst[0] == "maxmin":
+            inputs[inodto] = src[1]
+        elif dst[0] == "OOSdetBlk" and src[0] == "blk":
+            root = src[1]
+
+    angles = {}
+    for name,elm in zip(slots,pelm):
+        src = SlotSrc(name)
+        if src[0] == "ang":
+            angles[src[1]] = elm.GetFullName()
+
+    if "maxmin" in SlotObjs:
+        topology = "single"
+        types = {"maxmin": SlotObjs["maxmin"].GetAttribute("pDsl")}
+    else:
+        #chain blocks have an angle on the first and the previous block on the second input
+        chain = all(i[0][0] == "ang" for i in nodes.values())
+        if not chain or len(nodes) > 1:
+            topology = "chain" if chain else "tree"
+        types = {"max": SlotObjs["max_"+str(root)].GetAttribute("pDsl"),
+                 "min": SlotObjs["min_"+str(root)].GetAttribute("pDsl")}
+
+    layout = {"topology": topology,
+              "Frm": Frm,
+              "FrmTyp": FrmTyp,
+              "slots": slots,
+              "pelm": pelm,
+              "SlotObjs": SlotObjs,
+              "sigs": sigs,
+              "angles": angles,
+              "nodes": nodes,
+              "parent": parent,
+              "root": root,
+              "inputs": inputs,
+              "types": types}
+    OOSDetLayoutCache[key] = layout
+    return(layout)
+
+def InvalidateOOSDetLayout(Frm = None):
+    '''This function drops the cached slot layout of the given out-of-step detector Frame, or of all of them if no Frame is
+       given. It should be called after a detector was edited outside of this module.'''
+
+    if Frm is None:
+        OOSDetLayoutCache.clear()
+    else:
+        OOSDetLayoutCache.pop(Frm.GetFullName(), None)
+
+def AddLayoutSlot(layout, name: str, elm, pDsl = None):
+    '''This function creates a slot in the FrameTyp of the layout and adds the given element to the pelm list.'''
+
+    slot = layout["FrmTyp"].CreateObject("BlkSlot",name)
+    if pDsl is None:
+        slot.SetAttribute("sOutput",["xphi"])
+    else:
+        slot.SetAttribute("pDsl",pDsl)
+    layout["slots"].append(name)
+    layout["pelm"].append(elm)
+    layout["SlotObjs"][name] = slot
+    return(slot)
+
+def RemoveLayoutSlot(layout, name: str, DeleteElm: bool):
+    '''This function deletes a slot from the FrameTyp of the layout and removes its entry from the pelm list. If DeleteElm is
+       True, the element in the slot is deleted too.'''
+
+    i = layout["slots"].index(name)
+    elm = layout["pelm"][i]
+    del layout["slots"][i]
+    del layout["pelm"][i]
+    DeleteIndexedObject(layout["FrmTyp"], layout["SlotObjs"].pop(name))
+    if DeleteElm:
+        DeleteIndexedObject(layout["Frm"], elm)
+
+def AddLayoutSig(layout, name: str, nodfrom: str, inodfrom: int, nodto: str, inodto: int):
+    '''This function creates a signal between the slots with the given names in the FrameTyp of the layout.'''
+
+    layout["sigs"][name] = CreateSig(layout["FrmTyp"], name, layout["SlotObjs"][nodfrom], inodfrom,
+                                     layout["SlotObjs"][nodto], inodto)
+
+def RemoveLayoutSig(layout, name: str):
+    '''This function deletes the signal with the given name from the FrameTyp of the layout.'''
+
+    DeleteIndexedObject(layout["FrmTyp"], layout["sigs"].pop(name))
+
+def MoveLayoutSigs(layout, src, nodto: int, inodto: int):
+    '''This function connects the max and min signals of the given angle or block to the max/min block nodto.'''
+
+    if src[0] == "ang":
+        names = ["ang"+str(src[1]+1)+"_1","ang"+str(src[1]+1)+"_2"]
+    else:
+        names = ["angmax"+str(src[1]),"angmin"+str(src[1])]
+    for name,SlotName in zip(names,["max_"+str(nodto),"min_"+str(nodto)]):
+        layout["sigs"][name].SetAttribute("pnodto",layout["SlotObjs"][SlotName])
+        layout["sigs"][name].SetAttribute("inodto",inodto)
+    layout["parent"][src] = (nodto,inodto)
+
+def AddOOSDetAngle(layout, AngFrm, AngName: str):
+    '''This function adds an angle to the out-of-step detector of the layout, with one new angle slot and (except for the
+       "single" topology) one new max and min block. The element AngFrm is given with its full name AngName.'''
+
+    i = max(layout["angles"])+1
+    AddLayoutSlot(layout, "angle_"+str(i), AngFrm)
+    layout["angles"][i] = AngName
+
+    if layout["topology"] == "single":
+        n = len(layout["inputs"])
+        AddLayoutSig(layout, "ang"+str(i+1), "angle_"+str(i), 0, "maxmin", n)
+        layout["inputs"][n] = i
+        return
+
+    k = max(layout["nodes"])+1
+    Frm = layout["Frm"]
+    MaxBlk = Frm.CreateObject("ElmDsl","max"+str(k))
+    MaxBlk.SetAttribute("typ_id",layout["types"]["max"])
+    MinBlk = Frm.CreateObject("ElmDsl","min"+str(k))
+    MinBlk.SetAttribute("typ_id",layout["types"]["min"])
+    AddLayoutSlot(layout, "max_"+str(k), MaxBlk, layout["types"]["max"])
+    AddLayoutSlot(layout, "min_"+str(k), MinBlk, layout["types"]["min"])
+
+    if layout["topology"] == "chain":
+        #the new block takes the new angle and the previous last block and feeds the out-of-step detection block
+        root = layout["root"]
+        layout["nodes"][k] = [("ang",i),("blk",root)]
+        AddLayoutSig(layout, "angmax"+str(root), "max_"+str(root), 0, "max_"+str(k), 1)
+        AddLayoutSig(layout, "angmin"+str(root), "min_"+str(root), 0, "min_"+str(k), 1)
+        layout["parent"][("blk",root)] = (k,1)
+        layout["sigs"]["angmax"].SetAttribute("pnodfrom",layout["SlotObjs"]["max_"+str(k)])
+        layout["sigs"]["angmin"].SetAttribute("pnodfrom",layout["SlotObjs"]["min_"+str(k)])
+        layout["root"] = k
+        AddLayoutSig(layout, "ang"+str(i+1)+"_1", "angle_"+str(i), 0, "max_"+str(k), 0)
+        AddLayoutSig(layout, "ang"+str(i+1)+"_2", "angle_"+str(i), 0, "min_"+str(k), 0)
+        layout["parent"][("ang",i)] = (k,0)
+        return
+
+    #tree: the angle closest to the out-of-step detection block is split into a new block with the new angle
+    def depth(src):
+        d = 0
+        while src in layout["parent"]:
+            src = ("blk",layout["parent"][src][0])
+            d += 1
+        return(d)
+    leaf = min([("ang",j) for j in layout["angles"] if j != i], key=depth)
+    q,pos = layout["parent"][leaf]
+    layout["nodes"][k] = [leaf,("ang",i)]
+    layout["nodes"][q][pos] = ("blk",k)
+    MoveLayoutSigs(layout, leaf, k, 0)
+    AddLayoutSig(layout, "ang"+str(i+1)+"_1", "angle_"+str(i), 0, "max_"+str(k), 1)
+    AddLayoutSig(layout, "ang"+str(i+1)+"_2", "angle_"+str(i), 0, "min_"+str(k), 1)
+    layout["parent"][("ang",i)] = (k,1)
+    AddLayoutSig(layout, "angmax"+str(k), "max_"+str(k), 0, "max_"+str(q), pos)
+    AddLayoutSig(layout, "angmin"+str(k), "min_"+str(k), 0, "min_"+str(q), pos)
+    layout["parent"][("blk",k)] = (q,pos)
+
+def RemoveOOSDetAngle(layout, i: int):
+    '''This function removes the angle with index i from the out-of-step detector of the layout, with its angle slot and
+       (except for the "single" topology) one max and min block. It returns True if another angle was moved to index i.'''
+
+    del layout["angles"][i]
+
+    if layout["topology"] == "single":
+        #the angle on the last input takes the place of the removed one, so no other input has to be renumbered
+        n = len(layout["inputs"])
+        j = layout["inputs"][n-1]
+        if j != i:
+            pos = layout["slots"].index("angle_"+str(i))
+            layout["pelm"][pos] = layout["pelm"][layout["slots"].index("angle_"+str(j))]
+            layout["angles"][i] = layout["angles"].pop(j)
+        del layout["inputs"][n-1]
+        RemoveLayoutSig(layout, "ang"+str(j+1))
+        RemoveLayoutSlot(layout, "angle_"+str(j), False)
+        return(j != i)
+
+    #the block of the removed angle is replaced by its other input
+    p,pos = layout["parent"].pop(("ang",i))
+    other = layout["nodes"][p][1-pos]
+    RemoveLayoutSig(layout, "ang"+str(i+1)+"_1")
+    RemoveLayoutSig(layout, "ang"+str(i+1)+"_2")
+    RemoveLayoutSlot(layout, "angle_"+str(i), False)
+
+    if p == layout["root"]:
+        RemoveLayoutSig(layout, "angmax"+str(other[1]))
+        RemoveLayoutSig(layout, "angmin"+str(other[1]))
+        del layout["parent"][other]
+        layout["sigs"]["angmax"].SetAttribute("pnodfrom",layout["SlotObjs"]["max_"+str(other[1])])
+        layout["sigs"]["angmin"].SetAttribute("pnodfrom",layout["SlotObjs"]["min_"+str(other[1])])
+        layout["root"] = other[1]
+    else:
+        q,qpos = layout["parent"].pop(("blk",p))
+        RemoveLayoutSig(layout, "angmax"+str(p))
+        RemoveLayoutSig(layout, "angmin"+str(p))
+        layout["nodes"][q][qpos] = other
+        MoveLayoutSigs(layout, other, q, qpos)
+
+    del layout["nodes"][p]
+    RemoveLayoutSlot(layout, "max_"+str(p), True)
+    RemoveLayoutSlot(layout, "min_"+str(p), True)
+    return(False)
+
 #main functions
 
 
@@ -339,33 +1014,48 @@ def DisableComElm(FrmName: str,Grid):
         print("Composite model doesn't exists in grid "+Grid.loc_name)
     return(oFrm)
 
-def CreateOOSDet(FrmName: str, TypFolder, grid, sAngles):
-    '''This function creates the Frame for the out-of-step detector'''
+def CreateOOSDet(FrmName: str, TypFolder, grid, sAngles, topology: str = "chain", update: bool = False, TripAngle: float = 180,
+                 AlarmAngle: float = None, horizon: float = 0):
+    '''This function creates the Frame for the out-of-step detector. The topology ("chain", "tree" or "single") sets
+       how the max/min angles are evaluated, see CreateOOSDetFrameTyp and OOSDetTopologyInfo. If the Frame already exists
+       and update is True, it is updated to the given angles with UpdateOOSDet. The simulation is stopped when the angles
+       differ by more than TripAngle degrees, the optional alarm angle and predictive trip horizon are described in
+       CreateOOSDetBlockTyp.'''
 
     assert type(FrmName) == str, "Frame name should be string not "+str(type(FrmName))
     assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
     assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+    sAngles = GetAngleList(sAngles)
     assert type(sAngles) == list, "sGens should be list not "+str(type(sAngles))
     assert len(sAngles) > 1, "There should be mroe than one generator operating in the power system."
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
 
     exist_bool, Frm = CheckIfElmExists(FrmName,grid,False)
 
     if exist_bool:
+        if update:
+            return(UpdateOOSDet(FrmName,TypFolder,grid,sAngles,topology,TripAngle,AlarmAngle,horizon))
         print("Given frame name "+FrmName+" already exists, not creating a new frame.")
         return(Frm)
 
     n = len(sAngles)
-    FrmTypName = "OOSFrmTyp"
-    OOSBlkTypName = "OODBlkTyp"
 
-    OOSDetFrmTyp,OOSDetBlkTyp,BlkMaxTyp,BlkMinTyp = CreateOOSDetFrameTyp(FrmTypName, OOSBlkTypName, TypFolder, n)
+    OOSDetFrmTyp,OOSDetBlkTyp,BlkMaxTyp,BlkMinTyp = GetOOSDetFrameTyp(TypFolder, n, topology, TripAngle, AlarmAngle, horizon)
 
-    OOSDetFrm = grid.CreateObject("ElmComp",FrmName)
+    OOSDetFrm = CreateIndexedObject(grid,"ElmComp",FrmName)
     OOSDetFrm.SetAttribute("typ_id",OOSDetFrmTyp)
 
     OOSDetBlk = OOSDetFrm.CreateObject("ElmDsl","OOSDetBlk")
     OOSDetBlk.SetAttribute("typ_id",OOSDetBlkTyp)
 
+    if topology == "single":
+        #BlkMaxTyp holds the max/min block type with n inputs
+        MaxMinBlk = OOSDetFrm.CreateObject("ElmDsl","maxmin")
+        MaxMinBlk.SetAttribute("typ_id",BlkMaxTyp)
+        pelm_list = sAngles + [MaxMinBlk, OOSDetBlk]
+        OOSDetFrm.SetAttribute("pelm",pelm_list)
+        return(OOSDetFrm)
+
     #create blocks for max evaluation
     MaxBlkLst = []
     for i in range(1,n):
@@ -388,11 +1078,241 @@ def CreateOOSDet(FrmName: str, TypFolder, grid, sAngles):
 
     return(OOSDetFrm)
 
+def UpdateOOSDet(FrmName: str, TypFolder, grid, sAngles, topology: str = "chain", TripAngle: float = 180,
+                 AlarmAngle: float = None, horizon: float = 0):
+    '''This function updates an existing out-of-step detector to monitor the given angles. The angles are compared with the
+       ones in the detector and only the slots, blocks and signals of the angles that changed are added or removed, angles
+       that were replaced by others keep their slots. If TripAngle, AlarmAngle or horizon differ from the ones of the
+       detector, its out-of-step detection block gets the BlockTyp of the given ones (see CreateOOSDetBlockTyp). If the
+       detector doesn't exist, it is created with the given topology.'''
+
+    assert type(FrmName) == str, "Frame name should be string not "+str(type(FrmName))
+    assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+    sAngles = GetAngleList(sAngles)
+    assert type(sAngles) == list, "sGens should be list not "+str(type(sAngles))
+
+    exist_bool, Frm = CheckIfElmExists(FrmName,grid,False)
+
+    if not exist_bool:
+        return(CreateOOSDet(FrmName,TypFolder,grid,sAngles,topology,False,TripAngle,AlarmAngle,horizon))
+
+    layout = GetOOSDetLayout(Frm,topology)
+
+    requested = {}
+    for i in sAngles:
+        requested.setdefault(i.GetFullName(),i)
+    assert len(requested) > 1, "There should be mroe than one generator operating in the power system."
+
+    current = {name: i for i,name in layout["angles"].items()}
+    removed = [name for name in current if name not in requested]
+    added = [[name,obj] for name,obj in requested.items() if name not in current]
+
+    #FrameTypes shared by several detectors (see GetOOSDetFrameTyp) are copied before their slots are changed
+    if len(removed) != len(added) and layout["FrmTyp"].loc_name.startswith("OOSFrmTyp_"):
+        TypName = FrmName+"Typ"
+        i = 1
+        while CheckIfTypExists(TypName, TypFolder, False)[0]:
+            TypName = FrmName+"Typ"+str(i)
+            i += 1
+        FrmTyp = CopyIndexedObject(TypFolder, layout["FrmTyp"], TypName)
+        Frm.SetAttribute("typ_id",FrmTyp)
+        InvalidateOOSDetLayout(Frm)
+        layout = GetOOSDetLayout(Frm,layout["topology"])
+
+    #angles that were replaced by others keep their slots
+    for OldName,(name,obj) in zip(removed,added):
+        i = current.pop(OldName)
+        layout["pelm"][layout["slots"].index("angle_"+str(i))] = obj
+        layout["angles"][i] = name
+    for name in removed[len(added):]:
+        i = current.pop(name)
+        if RemoveOOSDetAngle(layout,i):
+            current[layout["angles"][i]] = i
+    for name,obj in added[len(removed):]:
+        AddOOSDetAngle(layout,obj,name)
+
+    if layout["topology"] == "single" and len(removed) != len(added):
+        n = len(layout["angles"])
+        BlkMaxMinTyp = CreateBlkMaxMinTyp("BlkMaxMinTyp"+str(n), TypFolder, n)
+        layout["SlotObjs"]["maxmin"].SetAttribute("pDsl",BlkMaxMinTyp)
+        layout["pelm"][layout["slots"].index("maxmin")].SetAttribute("typ_id",BlkMaxMinTyp)
+        layout["types"]["maxmin"] = BlkMaxMinTyp
+
+    if removed or added:
+        Frm.SetAttribute("pelm",layout["pelm"])
+
+    #a shared FrameType is swapped for the shared one with the new thresholds, which has the same layout
+    OOSDetBlkTyp = CreateOOSDetBlockTyp("OODBlkTyp",TypFolder,TripAngle,AlarmAngle,horizon)
+    retyped = layout["SlotObjs"]["OOSdetBlk"].GetAttribute("pDsl") != OOSDetBlkTyp
+    if retyped:
+        if layout["FrmTyp"].loc_name.startswith("OOSFrmTyp_"):
+            FrmTyp = GetOOSDetFrameTyp(TypFolder, len(layout["angles"]), layout["topology"], TripAngle, AlarmAngle,
+                                       horizon)[0]
+            Frm.SetAttribute("typ_id",FrmTyp)
+            InvalidateOOSDetLayout(Frm)
+            layout = GetOOSDetLayout(Frm,layout["topology"])
+        else:
+            layout["SlotObjs"]["OOSdetBlk"].SetAttribute("pDsl",OOSDetBlkTyp)
+        layout["pelm"][layout["slots"].index("OOSdetBlk")].SetAttribute("typ_id",OOSDetBlkTyp)
+
+    replaced = min(len(removed),len(added))
+    print("Updated out of step detector "+FrmName+": added "+str(len(added)-replaced)+", removed "+str(len(removed)-replaced)+\
+          " and replaced "+str(replaced)+" angles"+(", changed the detection thresholds." if retyped else "."))
+
+    return(Frm)
+
+def AreasByGrid(sGenAng: list):
+    '''This function groups the angle adders of sGenAng (see CreateComAngBatch) by the grid of their machine and returns a
+       list of [grid, angle adders] entries, in the order in which the grids first appear. sGenAng can also be a
+       GeneratorRegistry (see OOSRegistry), whose grid column is used.'''
+
+    if not isinstance(sGenAng, list):
+        return(sGenAng.Areas())
+
+    areas = {}
+    for Gen,AngFrm in sGenAng:
+        grid = Gen.GetAttribute("cpGrid") or Gen.GetParent()
+        areas.setdefault(grid.GetFullName(),[grid,[]])[1].append(AngFrm)
+    return(list(areas.values()))
+
+def CreateOOSArea(FrmName: str, TypFolder, grid, sAngles: list, topology: str = "tree"):
+    '''This function creates the sub-detector Frame of one area, that outputs the max and min angle of the given angles.'''
+
+    AreaFrm = CreateIndexedObject(grid,"ElmComp",FrmName)
+    AreaFrm.SetAttribute("typ_id",GetOOSAreaFrameTyp(TypFolder, len(sAngles), topology))
+    AreaFrm.SetAttribute("pelm",sAngles+CreateMaxMinBlks(AreaFrm, TypFolder, len(sAngles), topology, False))
+    return(AreaFrm)
+
+def UpdateOOSArea(FrmName: str, TypFolder, grid, sAngles: list, topology: str = "tree"):
+    '''This function updates the sub-detector Frame of one area to the given angles, or creates it if it doesn't exist.
+       Only this Frame is changed: if the number of angles is the same only its angles are replaced, otherwise it gets the
+       FrameType for the new number of angles and its max/min blocks are created anew.'''
+
+    assert type(sAngles) == list, "sAngles should be list not "+str(type(sAngles))
+    assert len(sAngles) > 0, "There should be at least one angle in the area."
+
+    exist_bool, AreaFrm = CheckIfElmExists(FrmName,grid,False)
+    if not exist_bool:
+        return(CreateOOSArea(FrmName, TypFolder, grid, sAngles, topology))
+
+    n = len(sAngles)
+    AreaFrmTyp = GetOOSAreaFrameTyp(TypFolder, n, topology)
+    pelm = list(AreaFrm.GetAttribute("pelm"))
+    if AreaFrm.GetAttribute("typ_id") == AreaFrmTyp:
+        if [i.GetFullName() for i in pelm[:n]] != [i.GetFullName() for i in sAngles]:
+            AreaFrm.SetAttribute("pelm",sAngles+pelm[n:])
+        return(AreaFrm)
+
+    for i in AreaFrm.GetContents("*.ElmDsl"):
+        DeleteIndexedObject(AreaFrm, i)
+    AreaFrm.SetAttribute("typ_id",AreaFrmTyp)
+    AreaFrm.SetAttribute("pelm",sAngles+CreateMaxMinBlks(AreaFrm, TypFolder, n, topology, False))
+    return(AreaFrm)
+
+def CreateOOSDetHierarchical(FrmName: str, TypFolder, grid, sAreas: list, topology: str = "tree", update: bool = False,
+                             TripAngle: float = 180, AlarmAngle: float = None, horizon: float = 0):
+    '''This function creates a hierarchical out-of-step detector. sAreas is a list of [area grid, angles] entries (see
+       AreasByGrid), or a GeneratorRegistry (see OOSRegistry) whose machines are grouped by their grid. Every area gets a
+       sub-detector Frame (FrmName_gridname, in the area grid), that outputs the max and min angle of the area, and the
+       top-level Frame FrmName in grid combines them and stops the simulation the same way as the Frame of CreateOOSDet. The
+       max of the area max angles and the min of the area min angles are the max and min of all angles, so the detector trips
+       exactly when the flat one does. If the detector already exists and update is True, only the areas whose angles changed
+       are updated (see UpdateOOSArea) and the top-level Frame only if the areas changed. The sub-detectors of the areas that
+       are not given anymore are deleted.'''
+
+    assert type(FrmName) == str, "Frame name should be string not "+str(type(FrmName))
+    assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+    if hasattr(sAreas,"Areas"):
+        sAreas = sAreas.Areas()
+    assert type(sAreas) == list, "sAreas should be list not "+str(type(sAreas))
+    assert len(sAreas) > 0, "There should be at least one area."
+    assert sum([len(i[1]) for i in sAreas]) > 1, "There should be mroe than one generator operating in the power system."
+    assert topology in ["chain","tree","single"], "topology should be 'chain', 'tree' or 'single' not "+str(topology)
+
+    exist_bool, TopFrm = CheckIfElmExists(FrmName,grid,False)
+    if exist_bool and not update:
+        print("Given frame name "+FrmName+" already exists, not creating a new frame.")
+        return(TopFrm)
+
+    sAreaFrms = []
+    for AreaGrid,sAngles in sAreas:
+        sAreaFrms.append(UpdateOOSArea(FrmName+"_"+AreaGrid.loc_name, TypFolder, AreaGrid, list(sAngles), topology))
+
+    m = len(sAreaFrms)
+    TopFrmTyp,OOSDetBlkTyp = GetOOSTopFrameTyp(TypFolder, m, topology, TripAngle, AlarmAngle, horizon)
+
+    if exist_bool:
+        pelm = list(TopFrm.GetAttribute("pelm"))
+        #the sub-detectors of the areas that are gone are deleted
+        names = [i.GetFullName() for i in sAreaFrms]
+        for i in pelm:
+            if i.GetClassName() == "ElmComp" and i.GetFullName() not in names:
+                InvalidateNameIndex(i)
+                DeleteIndexedObject(i.GetParent(), i)
+        if TopFrm.GetAttribute("typ_id") == TopFrmTyp:
+            if [i.GetFullName() for i in pelm[:m]] != names:
+                TopFrm.SetAttribute("pelm",sAreaFrms+pelm[m:])
+            return(TopFrm)
+        for i in TopFrm.GetContents("*.ElmDsl"):
+            DeleteIndexedObject(TopFrm, i)
+    else:
+        TopFrm = CreateIndexedObject(grid,"ElmComp",FrmName)
+
+    TopFrm.SetAttribute("typ_id",TopFrmTyp)
+    OOSDetBlk = TopFrm.CreateObject("ElmDsl","OOSDetBlk")
+    OOSDetBlk.SetAttribute("typ_id",OOSDetBlkTyp)
+    TopFrm.SetAttribute("pelm",sAreaFrms+CreateMaxMinBlks(TopFrm, TypFolder, m, topology, True)+[OOSDetBlk])
+
+    return(TopFrm)
+
+def GetTypData(Gen):
+    '''This function returns the inertia constant H and the rated power Sn of the given machine. The values are read once
+       per machine type and then taken from TypDataCache.'''
+
+    Typ = Gen.GetAttribute("typ_id")
+    key = Typ.GetFullName()
+    if key not in TypDataCache:
+        TypDataCache[key] = (Typ.GetAttribute("h"),Typ.GetAttribute("sgn"))
+    return(TypDataCache[key])
+
+def InvalidateTypDataCache():
+    '''This function clears the cached machine type data, it should be called after the machine types were edited.'''
+
+    TypDataCache.clear()
+
+def GetAngleList(sAngles):
+    '''This function returns the list of angle adder Frames of sAngles, which is a list of Frames or a GeneratorRegistry (see
+       OOSRegistry).'''
+
+    if isinstance(sAngles, list):
+        return(sAngles)
+    return(sAngles.Frames())
+
+def GetGenAngData(sGenAng, cached: bool = True):
+    '''This function returns the machines, the comulative angle adder blocks, the inertia constants and the rated powers of
+       sGenAng, which is a list of [Generator, Frame] entries (see CreateComAngBatch) or a GeneratorRegistry (see OOSRegistry).
+       The registry returns them from its columns, for the lists they are read from the objects. If cached is False, the
+       type data of the lists is read from the machine types, not from TypDataCache.'''
+
+    if not isinstance(sGenAng, list):
+        return(sGenAng.AngleData())
+
+    sGens = [i[0] for i in sGenAng]
+    sBlks = [i[1].GetContents()[0] for i in sGenAng]
+    if cached:
+        TypData = [GetTypData(i) for i in sGens]
+    else:
+        TypData = [[i.GetAttribute("typ_id").GetAttribute("h"),i.GetAttribute("typ_id").GetAttribute("sgn")] for i in sGens]
+    return(sGens,sBlks,[i[0] for i in TypData],[i[1] for i in TypData])
+
 def DetectCritGenerator(sGenAng: list):
     '''This function detects the generator whose rotor angle is furthest away from the center of inertia angle. It should be noted,
        that this function only works, if an RMS simulation was conducted, previous to calling it.'''
 
-    assert type(sGenAng) == list, "sGenAng is of type"+str(type(sGenAng))+", when it should be of type list."
+    assert type(sGenAng) == list or hasattr(sGenAng,"AngleData"), "sGenAng is of type"+str(type(sGenAng))+\
+           ", when it should be of type list or GeneratorRegistry."
 
     
     Sb = 100
@@ -400,15 +1320,12 @@ def DetectCritGenerator(sGenAng: list):
     del_num = 0
     #Structure of each Gen info entry: [Generator,H,Sn,delta]
     GenInfo = []
-    for i in sGenAng: 
-        curr_H = i[0].GetAttribute("typ_id").GetAttribute("h")
-        curr_Sn = i[0].GetAttribute("typ_id").GetAttribute("sgn")
-        curr_adder = i[1].GetContents()[0]
+    for Gen,curr_adder,curr_H,curr_Sn in zip(*GetGenAngData(sGenAng,False)): 
         curr_del = curr_adder.GetAttribute("c:com_angle")*180/3.14
         curr_H_sys = curr_H*curr_Sn/Sb
         H_COI = H_COI + curr_H_sys
         del_num = del_num + curr_del*curr_H_sys
-        GenInfo.append([i[0],curr_H,curr_Sn,curr_del])
+        GenInfo.append([Gen,curr_H,curr_Sn,curr_del])
 
     del_COI = del_num/H_COI
 
@@ -422,22 +1339,127 @@ def DetectCritGenerator(sGenAng: list):
 
     return(max_dist_gen)
 
-def CreateComAng(FrmName: str, TypFolder, grid, Gen): 
-    '''This function creates the Frame for the comulative angle adder'''
+def AddComAngToRes(oRes, sGenAng: list):
+    '''This function adds the comulative angles of the given angle adders to the result file, so that
+       DetectCritGeneratorTrajectory can read them after the RMS simulation.'''
+
+    assert oRes.GetClassName() == "ElmRes", "oRes should be ElmRes type."
+    assert type(sGenAng) == list or hasattr(sGenAng,"AngleData"), "sGenAng is of type"+str(type(sGenAng))+\
+           ", when it should be of type list or GeneratorRegistry."
+
+    for i in GetGenAngData(sGenAng)[1]:
+        oRes.AddVariable(i,"c:com_angle")
+
+def ReadResColumns(oRes, sObjs: list, var: str):
+    '''This function reads the time and the given variable of all given objects from the result file. Whole columns are read
+       at once where the powerfactory version supports it (GetColumnValues), otherwise or if the bulk read fails value by value.'''
+
+    oRes.Load()
+    nrows = oRes.GetNumberOfRows()
+    cols = [-1] + [oRes.FindColumn(i,var) for i in sObjs]
+    assert min(cols[1:]) >= 0, "Variable "+var+" of some objects is not recorded in result file "+oRes.loc_name
+
+    bulk = hasattr(oRes,"GetColumnValues")
+    data = []
+    for col in cols:
+        err = 1
+        if bulk:
+            err,values = oRes.GetColumnValues(col)
+        if err:
+            values = [oRes.GetValue(row,col)[1] for row in range(nrows)]
+        data.append(values)
+    return(data)
+
+def ReadComAngTrajectory(sGenAng: list, oRes):
+    '''This function reads the time vector and the (time x generators) comulative angles of all angle adders in sGenAng (a
+       list of [Generator, Frame] entries or a GeneratorRegistry) from the result file oRes, and returns them with the
+       machines and the inertia constants and rated powers of the generators. Requires numpy.'''
+
+    import numpy as np
+
+    assert type(sGenAng) == list or hasattr(sGenAng,"AngleData"), "sGenAng is of type"+str(type(sGenAng))+\
+           ", when it should be of type list or GeneratorRegistry."
+    assert oRes.GetClassName() == "ElmRes", "oRes should be ElmRes type."
+
+    sGens,sBlks,H,Sn = GetGenAngData(sGenAng)
+    data = ReadResColumns(oRes,sBlks,"c:com_angle")
+    t = np.asarray(data[0], dtype=float)
+    com_angles = np.asarray(data[1:], dtype=float).T
+
+    return t,com_angles,sGens,np.asarray(H, dtype=float),np.asarray(Sn, dtype=float)
+
+def DetectCritGeneratorTrajectory(sGenAng: list, oRes, TripAngle: float = 180):
+    '''This function detects the critical generator over the whole trajectory of an RMS simulation. The comulative angles of
+       all angle adders are read from the result file oRes at once (see AddComAngToRes), the distances to the centre of inertia
+       angle are calculated for every time step. It returns a dictionary with:
+       crit_gen, crit_dist - the generator furthest from the centre of inertia angle at the trip instant and its distance in degrees,
+       tripped - whether any two angles were more than TripAngle degrees apart,
+       trip_time - the time at which any two angles were more than TripAngle degrees apart (the last time step if they never were),
+       t - the time vector, com_angles - the (time x generators) comulative angles in rad,
+       diff - the difference between the max and min angle in degrees for every time step,
+       dist - the (time x generators) distances to the centre of inertia angle in degrees,
+       ranking - the (time x generators) indices of the generators in sGenAng, sorted by distance from the biggest one.
+       Requires numpy.'''
+
+    import numpy as np
+    import OOSReplay
+
+    t,com_angles,sGens,H,Sn = ReadComAngTrajectory(sGenAng, oRes)
+    dist = OOSReplay.DistToCOI(com_angles, OOSReplay.InertiaWeights(H, Sn, len(sGens)))
+    ranking = np.argsort(-dist, axis=1, kind="stable")
+
+    imax,imin,diff = OOSReplay.AngleSpread(com_angles)
+    trig = np.flatnonzero(diff > TripAngle)
+    itrip = int(trig[0]) if trig.size > 0 else len(t)-1
+    icrit = int(ranking[itrip,0])
+
+    return({"crit_gen": sGens[icrit],
+            "crit_dist": float(dist[itrip,icrit]),
+            "tripped": trig.size > 0,
+            "trip_time": float(t[itrip]),
+            "t": t,
+            "com_angles": com_angles,
+            "diff": diff,
+            "dist": dist,
+            "ranking": ranking})
+
+def DetectCoherentGroups(sGenAng: list, oRes, GapAngle: float = 90, TripAngle: float = 180):
+    '''This function clusters the generators into coherent groups over the whole trajectory of an RMS simulation, from the
+       comulative angles recorded in the result file oRes (see AddComAngToRes). Two generators are coherent, if their angles
+       are never split by a gap bigger than GapAngle degrees. It returns a dictionary with:
+       groups - the lists of generators of the coherent groups, from the most advanced group on,
+       critical_group - the generators on the smaller inertia side of the largest gap between two angles at the trip instant
+       (when the max and min angle first differ by more than TripAngle degrees),
+       trip_time - the time at which the critical group was evaluated (the trip, or the time of the largest gap),
+       t - the time vector, gap - the largest gap between two angles in degrees for every time step,
+       coi - the (time x groups) centre of inertia angles of the groups in degrees.
+       Requires numpy.'''
+
+    import OOSReplay
+
+    t,com_angles,sGens,H,Sn = ReadComAngTrajectory(sGenAng, oRes)
+    res = OOSReplay.CoherentGroups(com_angles, H, Sn, list(range(len(sGens))), GapAngle, TripAngle=TripAngle)
+
+    return({"groups": [[sGens[i] for i in g] for g in res["groups"]],
+            "critical_group": [sGens[i] for i in res["critical_group"]],
+            "trip_time": float(t[res["ieval"]]),
+            "t": t,
+            "gap": res["gap"],
+            "coi": res["coi"]})
+
+def GetComAngTyps(TypFolder, method: str = "delay"):
+    '''This function returns the FrameTyp and BlockTyp of the comulative angle adder with the given method (see
+       CreateComAngFrmTyp), they are created if they don't exist yet.'''
 
-    assert type(FrmName) == str, "Frame name should be string not "+str(type(FrmName))
     assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
-    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
-    assert Gen.GetClassName() == "ElmSym", "Given Gen is not of type 'ElmSym'."
+    assert method in ["delay","speed"], "method should be 'delay' or 'speed' not "+str(method)
 
-    FrmBool, Frm = CheckIfElmExists(FrmName,grid,False)
-
-    if FrmBool:
-        print("Given frame name "+FrmName+" already exists, not creating a new frame.")
-        return(Frm)
-    
-    FrmTypName = "ComAngFrmTyp"
-    ComAngBlkTypName = "ComAngBlkTyp"
+    if method == "speed":
+        FrmTypName = "ComAngSpeedFrmTyp"
+        ComAngBlkTypName = "ComAngSpeedBlkTyp"
+    else:
+        FrmTypName = "ComAngFrmTyp"
+        ComAngBlkTypName = "ComAngBlkTyp"
 
     FrmTypBool, ComAngFrmTyp = CheckIfTypExists(FrmTypName, TypFolder, False)
     BlkTypBool, ComAngBlkTyp = CheckIfTypExists(ComAngBlkTypName, TypFolder, False)
@@ -449,9 +1471,14 @@ def CreateComAng(FrmName: str, TypFolder, grid, Gen):
             print("Block type with that name already exists, but the Frame type doesn't.")
 
     if (not FrmTypBool) and (not BlkTypBool):
-        ComAngFrmTyp,ComAngBlkTyp = CreateComAngFrmTyp(FrmTypName, ComAngBlkTypName, TypFolder)
+        ComAngFrmTyp,ComAngBlkTyp = CreateComAngFrmTyp(FrmTypName, ComAngBlkTypName, TypFolder, method)
 
-    ComAngFrm = grid.CreateObject("ElmComp",FrmName)
+    return ComAngFrmTyp,ComAngBlkTyp
+
+def CreateComAngElm(FrmName: str, grid, Gen, ComAngFrmTyp, ComAngBlkTyp):
+    '''This function creates the comulative angle adder Frame of the given types in the grid, without any checks.'''
+
+    ComAngFrm = CreateIndexedObject(grid,"ElmComp",FrmName)
     ComAngFrm.SetAttribute("typ_id",ComAngFrmTyp)
 
     ComAngBlk = ComAngFrm.CreateObject("ElmDsl","ComulativeAngleAdder")
@@ -462,9 +1489,65 @@ def CreateComAng(FrmName: str, TypFolder, grid, Gen):
 
     return(ComAngFrm)
 
-    
-            
+def CreateComAng(FrmName: str, TypFolder, grid, Gen, method: str = "delay"): 
+    '''This function creates the Frame for the comulative angle adder, method selects how the angle is built (see
+       CreateComAngFrmTyp).'''
+
+    assert type(FrmName) == str, "Frame name should be string not "+str(type(FrmName))
+    assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+    assert Gen.GetClassName() == "ElmSym", "Given Gen is not of type 'ElmSym'."
+
+    FrmBool, Frm = CheckIfElmExists(FrmName,grid,False)
+
+    if FrmBool:
+        print("Given frame name "+FrmName+" already exists, not creating a new frame.")
+        return(Frm)
+
+    ComAngFrmTyp,ComAngBlkTyp = GetComAngTyps(TypFolder, method)
+
+    return(CreateComAngElm(FrmName, grid, Gen, ComAngFrmTyp, ComAngBlkTyp))
+
+def CreateComAngBatch(sGens: list, TypFolder, grid, FrmPrefix: str = "AngleAdder", method: str = "delay",
+                      iprint: bool = False):
+    '''This function creates the comulative angle adder Frames (named FrmPrefix + generator name) for all given generators at
+       once. The types are resolved only once and generators that already have an angle adder are skipped. method selects
+       how the angle is built (see CreateComAngFrmTyp). It returns a list of [Generator, Frame] entries, that can be given to
+       DetectCritGenerator (and its Frames to CreateOOSDet). sGens can also be a GeneratorRegistry (see OOSRegistry), then
+       the angle adders of its in-service machines are created and their Frames are stored in the registry. If iprint is
+       True, the numbers of the created and existing Frames are printed.'''
+
+    registry = None
+    if hasattr(sGens,"SetFrames"):
+        registry = sGens
+        sGens = registry.Generators()
+    assert type(sGens) == list, "sGens should be list not "+str(type(sGens))
+    assert TypFolder.GetClassName() in ["Intfolder","IntPrjfolder"], "Given folder is not folder."
+    assert grid.GetClassName() == "ElmNet", "grid should be ElmNet type"
+    assert type(FrmPrefix) == str, "FrmPrefix should be string not "+str(type(FrmPrefix))
+
+    index = GetNameIndex(grid)
+
+    sGenAng = []
+    sMissing = []
+    for Gen in sGens:
+        assert Gen.GetClassName() == "ElmSym", "Given Gen is not of type 'ElmSym'."
+        FrmName = FrmPrefix+Gen.loc_name
+        Frm = index.get(FrmName)
+        if Frm is None:
+            sMissing.append(len(sGenAng))
+        sGenAng.append([Gen,Frm])
+
+    if sMissing:
+        ComAngFrmTyp,ComAngBlkTyp = GetComAngTyps(TypFolder, method)
+        for i in sMissing:
+            Gen = sGenAng[i][0]
+            sGenAng[i][1] = CreateComAngElm(FrmPrefix+Gen.loc_name, grid, Gen, ComAngFrmTyp, ComAngBlkTyp)
+
+    if iprint:
+        print("Created "+str(len(sMissing))+" new angle adder frames, "+str(len(sGenAng)-len(sMissing))+" already existed.")
 
- 
+    if registry is not None:
+        registry.SetFrames(sGenAng)
 
-        
+    return(sGenAng)
@@ -0,0 +1,243 @@
+'''
+Evaluation of the Frames that the OutOfStep module builds in the stand-in OOSFakePF, for the tests. Every Frame is evaluated
+through the slots and signals of its FrameTyp and every block with the DSL equations of its BlockTyp, one time step (0.01 s)
+at a time, so the tests check the wiring and the equations of the model instead of the functions that built it. The state
+variables of the differential equations (x. = ...) are integrated with the trapezoidal rule.
+'''
+
+import math
+import re
+
+import numpy as np
+
+#time step of the simulation [s]
+Step = 0.01
+
+#functions of the DSL equations
+Functions = {"max": max, "min": min, "pi": lambda: math.pi, "select": lambda c,a,b: a if c else b}
+
+#support functions
+
+def Names(values: list):
+    '''This function returns the names of a BlockTyp input or output list, like ["ang1,ang2"].'''
+
+    return(",".join(values).split(","))
+
+def DelayExpr(expr: str):
+    return(re.sub(r"delay\((\w+),([^)]*)\)", r"_delay('\1',\2)", expr))
+
+def RandomAngles(n: int, steps: int = 200, seed: int = 0, unstable: int = None):
+    '''This function returns a (time x machines) array of rotor angles in rad, wrapped to [-pi, pi), sampled every 0.01 s,
+       and the comulative angles they were wrapped from (starting at 0). If unstable is given, that machine runs away from
+       the others.'''
+
+    rng = np.random.default_rng(seed)
+    dsteps = rng.normal(0, 0.02, (steps-1, n))
+    if unstable is not None:
+        dsteps[:,unstable] += np.linspace(0, 0.15, steps-1)
+    com = np.vstack([np.zeros(n), np.cumsum(dsteps, axis=0)])
+    start = rng.uniform(-np.pi, np.pi, n)
+    return(np.mod(com+start+np.pi, 2*np.pi)-np.pi, com)
+
+#main functions
+
+class Block:
+    '''DSL block of a BlockTyp. The equations are evaluated in the order in which their variables become known, delay(x,T)
+       returns x of T seconds (at least one step) ago, or of the first step before that time has passed, and on the first
+       step the current value of x or its initial value (inc(x)). A state variable x of a differential equation (x. = ...)
+       starts at its initial value and is integrated over every step with the mean of its derivative at the previous and at
+       the current step, so its derivative can't depend on x itself.'''
+
+    def __init__(self, BlkTyp):
+        self.inputs = Names(BlkTyp.attrs["sInput"])
+        self.outputs = Names(BlkTyp.attrs["sOutput"])
+        self.init = {}
+        self.equations = []
+        self.states = []
+        for eq in BlkTyp.attrs["sAddEquat"]:
+            if eq.startswith("event(") or eq.startswith("output("):
+                continue
+            name,expr = [i.strip() for i in eq.split("=",1)]
+            if name.startswith("inc("):
+                self.init[name[4:-1]] = float(expr)
+            elif name.endswith("."):
+                self.states.append(name[:-1])
+                self.equations.append(("_d_"+name[:-1],DelayExpr(expr)))
+                self.equations.append((name[:-1],"_integrate('"+name[:-1]+"')"))
+            else:
+                self.equations.append((name,DelayExpr(expr)))
+        self.last = None
+        self.history = []
+
+    def Step(self, values: list):
+        '''This function evaluates one time step with the given input values and returns the output values.'''
+
+        assert len(values) == len(self.inputs), "The block has "+str(len(self.inputs))+" inputs, not "+str(len(values))
+        env = dict(Functions)
+        env.update(zip(self.inputs, values))
+        last = self.last
+        initial = [False]
+
+        def delay(name, T):
+            if last is not None:
+                return(self.history[max(len(self.history)-max(1,int(round(T/Step))),0)][name])
+            if name in env:
+                return(env[name])
+            if initial[0]:
+                return(self.init[name])
+            raise KeyError(name)
+
+        def integrate(name):
+            if last is None:
+                return(self.init[name])
+            return(last[name]+Step*(last["_d_"+name]+env["_d_"+name])/2)
+
+        env["_delay"] = delay
+        env["_integrate"] = integrate
+        pending = self.equations
+        while pending:
+            rest = []
+            for name,expr in pending:
+                try:
+                    env[name] = eval(expr, {"__builtins__": {}}, env)
+                except (NameError,KeyError):
+                    rest.append((name,expr))
+            if len(rest) == len(pending):
+                assert not initial[0], "Equations "+str([i[0] for i in rest])+" can't be evaluated."
+                initial[0] = True
+            pending = rest
+        self.last = env
+        self.history.append(env)
+        return([env[i] for i in self.outputs])
+
+class FrameModel:
+    '''Frame of the simulation: its slots are evaluated through the signals of its FrameTyp. The slots with blocks (ElmDsl)
+       are checked to have the BlockTyp of their block, the slots with Frames (ElmComp) are evaluated by the simulation and
+       the slots with machines (ElmSym) output the signal of the machine given by the output of the slot, the rotor angle
+       (xphi) or the speed (xspeed).'''
+
+    def __init__(self, sim, Frm):
+        self.sim = sim
+        self.FrmTyp = Frm.attrs["typ_id"]
+        slots = [i for i in self.FrmTyp.children if i.cls == "BlkSlot"]
+        self.sigs = [i for i in self.FrmTyp.children if i.cls == "BlkSig"]
+        pelm = list(Frm.attrs["pelm"])
+        assert len(slots) == len(pelm), "The pelm list of "+Frm.attrs["loc_name"]+" doesn't match the slots."
+        self.slots = list(zip(slots,pelm))
+        self.elms = {id(i): j for i,j in self.slots}
+        self.blocks = {}
+        for slot,elm in self.slots:
+            if elm.cls == "ElmDsl":
+                assert elm.attrs["typ_id"] is slot.attrs["pDsl"], \
+                       "Block "+elm.attrs["loc_name"]+" doesn't have the type of its slot."
+                self.blocks[slot.attrs["loc_name"]] = Block(elm.attrs["typ_id"])
+
+    def Inputs(self, node, out: dict):
+        '''This function returns the values of the signals to the inputs of the given slot (or to the outputs of the Frame),
+           every input should have exactly one signal.'''
+
+        sigs = sorted([i for i in self.sigs if i.attrs["pnodto"] is node], key=lambda i: i.attrs["inodto"])
+        assert [i.attrs["inodto"] for i in sigs] == list(range(len(sigs))), \
+               "Inputs of "+node.attrs["loc_name"]+" aren't connected once each."
+        return([self.Output(i.attrs["pnodfrom"], out)[i.attrs["inodfrom"]] for i in sigs])
+
+    def Output(self, slot, out: dict):
+        if id(slot) not in out:
+            elm = self.elms[id(slot)]
+            if elm.cls == "ElmSym":
+                out[id(slot)] = [self.sim.signals[slot.attrs["sOutput"][0]][elm.attrs["loc_name"]]]
+            elif elm.cls == "ElmComp":
+                out[id(slot)] = self.sim.Outputs(elm)
+            else:
+                out[id(slot)] = self.blocks[slot.attrs["loc_name"]].Step(self.Inputs(slot, out))
+        return(out[id(slot)])
+
+    def Step(self):
+        '''This function evaluates all slots of the Frame for one time step and returns the outputs of the Frame.'''
+
+        out = {}
+        for slot,elm in self.slots:
+            self.Output(slot, out)
+        return(self.Inputs(self.FrmTyp, out))
+
+    def Variables(self, SlotName: str):
+        '''This function returns the variables of the block in the given slot at the last time step.'''
+
+        return(self.blocks[SlotName].last)
+
+class FakeSimulation:
+    '''Simulation of the given Frame and all Frames in its slots, driven by the rotor angles (and speeds) of the machines.'''
+
+    def __init__(self, Frm):
+        self.Frm = Frm
+        self.models = {}
+        self.signals = {}
+        self.outputs = {}
+
+    def Model(self, Frm):
+        if id(Frm) not in self.models:
+            self.models[id(Frm)] = FrameModel(self, Frm)
+        return(self.models[id(Frm)])
+
+    def Outputs(self, Frm):
+        if id(Frm) not in self.outputs:
+            self.outputs[id(Frm)] = self.Model(Frm).Step()
+        return(self.outputs[id(Frm)])
+
+    def Step(self, angles: dict, speeds: dict = None):
+        '''This function evaluates one time step with the given rotor angles in rad and speeds in p.u. (by machine name) and
+           returns the model of the simulated Frame.'''
+
+        self.signals = {"xphi": angles, "xspeed": speeds or {}}
+        self.outputs = {}
+        self.Outputs(self.Frm)
+        return(self.Model(self.Frm))
+
+    def Run(self, names: list, angles, SlotName: str = "OOSdetBlk", speeds = None):
+        '''This function runs the simulation over the (time x machines) arrays of rotor angles (and speeds) and returns the
+           variables of the block in the given slot of the simulated Frame at every time step.'''
+
+        if speeds is None:
+            speeds = np.ones(np.shape(angles))
+        return([dict(self.Step(dict(zip(names,[float(i) for i in row])),dict(zip(names,[float(i) for i in w])))
+                     .Variables(SlotName)) for row,w in zip(angles,speeds)])
+
+class FakeResults:
+    '''Result file (ElmRes) with the given variable of the given objects recorded every time step, as the (time x objects)
+       array values. If bulk is False it can only be read value by value (GetValue), as in older powerfactory versions, and
+       if err is not 0 its whole column reads (GetColumnValues) fail.'''
+
+    def __init__(self, t, sObjs: list, var: str, values, bulk: bool = True, err: int = 0):
+        self.loc_name = "All calculations"
+        self.columns = [np.asarray(t, dtype=float).tolist()] + np.asarray(values, dtype=float).T.tolist()
+        self.sObjs = sObjs
+        self.var = var
+        self.err = err
+        self.reads = {"GetColumnValues": 0, "GetValue": 0}
+        if bulk:
+            self.GetColumnValues = self.ColumnValues
+
+    def GetClassName(self):
+        return("ElmRes")
+
+    def Load(self):
+        return(0)
+
+    def GetNumberOfRows(self):
+        return(len(self.columns[0]))
+
+    def FindColumn(self, obj, var: str):
+        for i,rec in enumerate(self.sObjs):
+            if rec == obj and var == self.var:
+                return(i)
+        return(-1)
+
+    def GetValue(self, row: int, col: int):
+        self.reads["GetValue"] += 1
+        return(0,self.columns[col+1][row])
+
+    def ColumnValues(self, col: int):
+        self.reads["GetColumnValues"] += 1
+        if self.err:
+            return(self.err,[])
+        return(0,list(self.columns[col+1]))
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+import OOSCache
+import OOSScreening
+
+Case = {"name": "unstable", "events": {"fault": {"time": 0.1, "p_target": "G2"}, "clear": {"time": 0.5}}}
+
+def Backend(path, TripAngle: float = 180):
+    backend = OOSCache.CachedBackend(OOSScreening.StandInBackend(3, TripAngle=TripAngle), str(path))
+    backend.Setup()
+    return(backend)
+
+def test_cached_backend_hit_miss(tmp_path):
+    backend = Backend(tmp_path)
+    first = backend.Run(Case)
+    assert not first["cached"] and backend.cache.misses == 1
+
+    #the same case with another name is a hit, with the trajectory stored as float32
+    second = backend.Run(dict(Case, name="again"))
+    assert second["cached"] and backend.cache.hits == 1
+    for key in ["stable","trip_time","crit_gen","crit_dist","stop_time"]:
+        assert second[key] == first[key], key
+    assert second["angles"].dtype == np.float32
+    assert np.allclose(second["angles"], first["angles"], atol=1e-4)
+
+    #another clearing time or another detector is a miss
+    assert not backend.Run({"events": dict(Case["events"], clear={"time": 0.2})})["cached"]
+    assert not Backend(tmp_path, 150).Run(Case)["cached"]
+
+    #the cache is shared with a new backend on the same directory
+    assert Backend(tmp_path).Run(Case)["cached"]
+
+def test_lru_eviction(tmp_path):
+    cache = OOSCache.ResultCache(str(tmp_path))
+    cache.Put("a", {"value": 1})
+    size = cache.Size()
+    cache.MaxBytes = 3.5*size
+    cache.Put("b", {"value": 2})
+    cache.Put("c", {"value": 3})
+    assert cache.Get("a") == {"value": 1}
+
+    #b is the least recently used entry
+    cache.Put("d", {"value": 4})
+    assert sorted(os.listdir(tmp_path)) == ["a.npz","c.npz","d.npz"]
+    assert cache.Size() == sum([os.path.getsize(tmp_path/i) for i in os.listdir(tmp_path)])
+    assert cache.Get("b") is None
+    cache.Put("e", {"value": 5})
+    assert sorted(os.listdir(tmp_path)) == ["a.npz","d.npz","e.npz"]
+
+def test_put_does_not_scan(tmp_path, monkeypatch):
+    cache = OOSCache.ResultCache(str(tmp_path))
+    for i in range(5):
+        cache.Put("k"+str(i), {"value": i})
+    scans = []
+    monkeypatch.setattr(cache, "Entries", lambda: scans.append(1) or [])
+    for i in range(5,20):
+        cache.Put("k"+str(i), {"value": i})
+        assert cache.Get("k"+str(i)) == {"value": i}
+    assert scans == []
+
+def test_atomic_write(tmp_path, monkeypatch):
+    cache = OOSCache.ResultCache(str(tmp_path))
+    cache.Put("a", {"value": 1})
+
+    def fail(f, **arrays):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(OOSCache.np, "savez_compressed", fail)
+    with pytest.raises(OSError):
+        cache.Put("b", {"value": 2})
+    with pytest.raises(OSError):
+        cache.Put("a", {"value": 3})
+    assert os.listdir(tmp_path) == ["a.npz"]
+    assert cache.Get("a") == {"value": 1}
+    assert cache.Get("b") is None
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import OOSReplay
+import OOSStream
+from fakedsl import RandomAngles
+
+def Samples(n: int = 4, steps: int = 300, seed: int = 7):
+    '''This function returns the time vector, the rotor angles and the comulative angles of n machines, of which one runs
+       away from the others, and the names of the machines.'''
+
+    angles,com = RandomAngles(n, steps, seed, unstable=2)
+    return(np.arange(steps)*OOSReplay.DelayTime, angles, com, ["G"+str(i) for i in range(n)])
+
+def Index(t, time: float):
+    return(int(np.argmin(np.abs(t-time))))
+
+@pytest.mark.parametrize("trigger", ["trip","alarm"])
+def test_window_around_trigger(trigger):
+    t,angles,com,names = Samples()
+    ref = OOSReplay.ReplayOOS(t, angles, AlarmAngle=60)
+    k = Index(t, ref["trip_time"] if trigger == "trip" else ref["alarm_time"])
+    assert k > 50
+
+    capture = OOSStream.TriggeredCapture(names, pre=0.5, post=0.2, trigger=trigger, AlarmAngle=60)
+    window = capture.Feed(zip(t, angles))
+    #the ring buffer wrapped around before the trigger, the window is still in time order
+    assert capture.count > capture.pre
+    assert window["trigger_time"] == pytest.approx(t[k])
+    assert np.allclose(window["t"], t[k-50:k+21])
+    assert window["angles"].dtype == np.float32 and window["angles"].flags["F_CONTIGUOUS"]
+    assert np.allclose(window["angles"], com[k-50:k+21], atol=1e-5)
+    assert list(window["names"]) == names
+
+def test_short_windows():
+    t,angles,com,names = Samples()
+    k = Index(t, OOSReplay.ReplayOOS(t, angles)["trip_time"])
+
+    #less than pre seconds before the trigger
+    window = OOSStream.TriggeredCapture(names, pre=10, post=0.1).Feed(zip(t, angles))
+    assert np.allclose(window["t"], t[:k+11])
+
+    #the feed ends before post seconds after the trigger
+    window = OOSStream.TriggeredCapture(names, pre=0.1, post=1).Feed(zip(t[:k+5], angles[:k+5]))
+    assert np.allclose(window["t"], t[k-10:k+5])
+
+    #no trigger, no window
+    capture = OOSStream.TriggeredCapture(names, TripAngle=2000)
+    assert capture.Feed(zip(t, angles)) is None
+    with pytest.raises(AssertionError):
+        capture.Flush("window.npz")
+
+@pytest.mark.parametrize("ext", [".npz",".npy"])
+def test_round_trip(ext, tmp_path):
+    t,angles,com,names = Samples()
+    path = str(tmp_path/("window"+ext))
+    window = OOSStream.TriggeredCapture(names, pre=0.5, post=0.2, path=path).Feed(zip(t, angles))
+
+    loaded = OOSStream.LoadCapture(path)
+    assert np.array_equal(loaded["t"], window["t"])
+    assert np.array_equal(loaded["angles"], window["angles"])
+    assert loaded["angles"].dtype == np.float32
+    assert loaded["names"] == names
+    assert loaded["trigger"] == "trip"
+    assert loaded["trigger_time"] == pytest.approx(window["trigger_time"])
+    if ext == ".npy":
+        assert isinstance(loaded["angles"], np.memmap)
+        assert not isinstance(OOSStream.LoadCapture(path, mmap=False)["angles"], np.memmap)
+
+    #the window replays to the same trip
+    replay = OOSReplay.ReplayOOS(loaded["t"], loaded["angles"], unwrap=False)
+    assert replay["trip_time"] == pytest.approx(window["trigger_time"])
+
+def test_unsupported_file(tmp_path):
+    t,angles,com,names = Samples()
+    capture = OOSStream.TriggeredCapture(names)
+    capture.Feed(zip(t, angles))
+    with pytest.raises(ValueError):
+        capture.Flush(str(tmp_path/"window.csv"))
+    with pytest.raises(ValueError):
+        OOSStream.LoadCapture(str(tmp_path/"window.csv"))
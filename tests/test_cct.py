@@ -0,0 +1,107 @@
+import OOSCCT
+import OOSScreening
+
+Fault = {"name": "G2", "events": {"fault": {"time": 0.1, "p_target": "G2"}}}
+
+class CountingPool:
+    '''ScreeningPool on the stand-in backend, that records the cases of every call of Run.'''
+
+    def __init__(self, workers: int = 1, **kwargs):
+        self.pool = OOSScreening.ScreeningPool(OOSScreening.StandInBackend(3, **kwargs), 0)
+        self.workers = workers
+        self.calls = []
+
+    def Run(self, cases: list):
+        self.calls.append(cases)
+        return(self.pool.Run(cases))
+
+def CriticalTime(pool, fault: dict = Fault):
+    '''This function returns the critical clearing time of the fault on the stand-in, found by simulating every clearing
+       time step. The stand-in switches the fault on the 0.01 s steps, so the CCT is one of them.'''
+
+    for i in range(11,100):
+        row = pool.pool.Run([OOSCCT.ClearingCase(fault, "clear", i*0.01+0.005, 5.0)])[0]
+        if not row["stable"]:
+            return(i*0.01)
+
+def Check(result: dict, cct: float, tol: float):
+    assert result["error"] is None
+    assert result["stable"] <= cct+1e-9 < result["unstable"]
+    assert result["unstable"]-result["stable"] <= tol
+    assert result["cct"] == result["stable"]-0.1
+    assert result["crit_gen"] == "G2"
+
+def test_is_evident():
+    row = {"error": None, "stable": True, "diff_peak": 100.0, "diff_end": 95.0}
+    assert not OOSCCT.IsEvident(row)
+    assert OOSCCT.IsEvident(dict(row, diff_end=85.0))
+    assert OOSCCT.IsEvident(dict(row, diff_end=95.0), margin=2.0)
+    assert OOSCCT.IsEvident(dict(row, stable=False))
+    assert OOSCCT.IsEvident(dict(row, error="KeyError: 'G9'", stable=None))
+
+def test_bisection():
+    pool = CountingPool(1)
+    cct = CriticalTime(pool)
+    assert 0.15 < cct < 0.6
+
+    pool.calls = []
+    result = OOSCCT.CCTSearch([Fault], pool, "clear", 0.1, 0.9, tol=0.005, window=5.0, FaultTime=0.1)[0]
+    Check(result, cct, 0.005)
+    #one clearing time per round after tmin and tmax, the bracket is halved in every round
+    times = [i["events"]["clear"]["time"] for j in pool.calls for i in j]
+    assert len(pool.calls[0]) == 2 and max([len(i) for i in pool.calls[1:]]) == 1
+    assert len(set(times)) == 2+8
+    assert result["runs"] == len(times)
+
+def test_multi_point_rounds():
+    single = CountingPool(1)
+    cct = CriticalTime(single)
+    single.calls = []
+    OOSCCT.CCTSearch([Fault], single, "clear", 0.1, 0.9, tol=0.005, window=5.0)
+
+    multi = CountingPool(3)
+    result = OOSCCT.CCTSearch([Fault], multi, "clear", 0.1, 0.9, tol=0.005, window=5.0, FaultTime=0.1)[0]
+    Check(result, cct, 0.005)
+    assert max([len(i) for i in multi.calls]) == 3
+    assert len(multi.calls) < len(single.calls)
+
+    #the faults are searched in the same rounds
+    faults = [Fault, {"name": "G1", "events": {"fault": {"time": 0.1, "p_target": "G1"}}}]
+    multi.calls = []
+    results = OOSCCT.CCTSearch(faults, multi, "clear", 0.1, 0.9, tol=0.005, window=5.0, FaultTime=0.1)
+    Check(results[0], cct, 0.005)
+    assert results[1]["crit_gen"] == "G1"
+    assert max([len(i) for i in multi.calls]) == 6
+
+def test_window_doubling():
+    pool = CountingPool(1)
+    cct = CriticalTime(pool)
+    pool.calls = []
+    result = OOSCCT.CCTSearch([Fault], pool, "clear", 0.1, 0.9, tol=0.005, window=0.05, FaultTime=0.1)[0]
+    Check(result, cct, 0.005)
+
+    #the cases whose first swing hadn't passed were run again with a doubled window
+    cases = [j for i in pool.calls for j in i]
+    assert len(cases) == result["runs"] > len({i["name"] for i in cases})
+    windows = {round(i["tstop"]-i["events"]["clear"]["time"],6) for i in cases if i["tstop"] < 10.0}
+    assert windows <= {round(0.05*2**i,6) for i in range(8)}
+    assert len(windows) > 1
+
+    #the window doesn't grow above MaxTstop
+    pool.calls = []
+    OOSCCT.CCTSearch([Fault], pool, "clear", 0.1, 0.9, tol=0.05, window=0.05, MaxTstop=0.6)
+    assert max([i["tstop"] for i in pool.calls[-1]]) <= 0.6
+
+def test_bracket_ends():
+    pool = CountingPool(1)
+    unstable,stable,error = OOSCCT.CCTSearch([dict(Fault, name="late"),dict(Fault, name="early"),
+                                              {"name": "missing", "events": {"fault": {"time": 0.1, "p_target": "G9"}}}],
+                                             pool, "clear", 0.1, 0.9, window=5.0)
+    assert unstable["stable"] is not None and unstable["unstable"] is not None
+
+    late = OOSCCT.CCTSearch([Fault], pool, "clear", 0.7, 0.9, window=5.0)[0]
+    assert late["cct"] is None and late["stable"] is None and late["unstable"] == 0.7 and late["runs"] == 2
+    early = OOSCCT.CCTSearch([Fault], pool, "clear", 0.11, 0.13, window=5.0)[0]
+    assert early["unstable"] is None and early["stable"] == 0.13 and early["crit_gen"] is None
+
+    assert error["error"].startswith("KeyError") and error["cct"] is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import OOSReplay
+import OutOfStep
+from fakedsl import FakeResults
+from test_outofstep import Build
+
+def TwoGroups(steps: int = 120, seed: int = 0):
+    '''This function returns comulative angles in rad of 6 machines, of which the first 3 swing away from the other 3
+       together, and the time vector.'''
+
+    rng = np.random.default_rng(seed)
+    runaway = np.linspace(0, 6, steps)**2/6
+    com = np.zeros((steps,6))+rng.normal(0, 0.05, (steps,6))
+    com[:,:3] += runaway[:,None]
+    return(np.arange(steps)*OOSReplay.DelayTime, com)
+
+def FirstAbove(com, TripAngle: float):
+    diff = (com.max(axis=1)-com.min(axis=1))*180/np.pi
+    return(int(np.flatnonzero(diff > TripAngle)[0]))
+
+@pytest.mark.parametrize("TripAngle", [60,180])
+def test_two_groups(TripAngle):
+    t,com = TwoGroups()
+    H = [2,3,4,5,6,7]
+    Sn = [100,110,120,130,140,150]
+    res = OOSReplay.CoherentGroups(com, H, Sn, ["G"+str(i) for i in range(6)], TripAngle=TripAngle)
+    assert res["groups"] == [["G0","G1","G2"],["G3","G4","G5"]]
+    assert res["critical_group"] == ["G0","G1","G2"]
+    assert list(res["labels"]) == [0,0,0,1,1,1]
+    assert res["ieval"] == FirstAbove(com, TripAngle)
+    assert res["coi"].shape == (len(t),2)
+    assert np.all(res["coi"][-1,0] > res["coi"][-1,1])
+
+def test_groups_from_results():
+    app,TypFolder,grid,sGens,sGenAng = Build(6, "chain")
+    t,com = TwoGroups(seed=1)
+    oRes = FakeResults(t, [i[1].GetContents()[0] for i in sGenAng], "c:com_angle", com)
+
+    res = OutOfStep.DetectCoherentGroups(sGenAng, oRes)
+    assert res["groups"] == [sGens[:3],sGens[3:]]
+    assert res["critical_group"] == sGens[:3]
+    assert res["trip_time"] == pytest.approx(t[FirstAbove(com, 180)])
+
+    #the critical group is evaluated at the given trip angle
+    early = OutOfStep.DetectCoherentGroups(sGenAng, oRes, TripAngle=60)
+    assert early["trip_time"] == pytest.approx(t[FirstAbove(com, 60)])
+    assert early["trip_time"] < res["trip_time"]
+    assert early["critical_group"] == sGens[:3]
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+import OOSFakePF
+import OOSReplay
+import OutOfStep
+from fakedsl import FakeResults, FakeSimulation, RandomAngles
+
+def Build(n: int, topology: str, grids: int = 1):
+    '''This function returns a stand-in project with n machines (spread over the given number of grids) and their angle
+       adders, as (app, TypFolder, grid, machines, [Generator, Frame] entries).'''
+
+    OutOfStep.InvalidateCaches()
+    app = OOSFakePF.FakeApp()
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    sGrids = [grid]+[app.folders["netdat"].CreateObject("ElmNet","Area"+str(i)) for i in range(1,grids)]
+    for i,Gen in enumerate(sGens):
+        Gen.SetAttribute("cpGrid", sGrids[i%grids])
+    sGenAng = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid)
+    return app,TypFolder,grid,sGens,sGenAng
+
+def Counts(Frm):
+    FrmTyp = Frm.GetAttribute("typ_id")
+    return({"ElmDsl": len(Frm.GetContents("*.ElmDsl")),
+            "BlkSlot": len(FrmTyp.GetContents("*.BlkSlot")),
+            "BlkSig": len(FrmTyp.GetContents("*.BlkSig"))})
+
+def CheckMaxMin(Frm, sGens, n: int = 3, seed: int = 0):
+    '''This function simulates the detector Frm on random rotor angles of the machines and checks that the inputs of its
+       out-of-step detection block are the max and the min of the comulative angles at every time step.'''
+
+    names = [i.loc_name for i in sGens]
+    angles,com = RandomAngles(len(names), 50, seed)
+    states = FakeSimulation(Frm).Run(names, angles)
+    expected = OOSReplay.UnwrapAngles(angles)
+    assert np.allclose(expected, com)
+    assert np.allclose([i["angmax"] for i in states], expected.max(axis=1))
+    assert np.allclose([i["angmin"] for i in states], expected.min(axis=1))
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+@pytest.mark.parametrize("n", [2,3,5,8])
+def test_detector_wiring(topology, n):
+    app,TypFolder,grid,sGens,sGenAng = Build(n, topology)
+    Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], topology)
+
+    info = OutOfStep.OOSDetTopologyInfo(n, topology)
+    assert Counts(Frm) == {"ElmDsl": info["ElmDsl"], "BlkSlot": info["BlkSlot"], "BlkSig": info["BlkSig"]}
+    CheckMaxMin(Frm, sGens, seed=n)
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_hierarchical_wiring(topology):
+    app,TypFolder,grid,sGens,sGenAng = Build(7, topology, 3)
+    sAreas = OutOfStep.AreasByGrid(sGenAng)
+    assert [len(i[1]) for i in sAreas] == [3,2,2]
+
+    Frm = OutOfStep.CreateOOSDetHierarchical("OOSFrm", TypFolder, grid, sAreas, topology)
+    CheckMaxMin(Frm, sGens)
+
+    #the sub-detector of an area that is not given anymore is deleted on update
+    AreaFrmName = "OOSFrm_"+sAreas[2][0].loc_name+".ElmComp"
+    assert len(sAreas[2][0].GetContents(AreaFrmName)) == 1
+    Frm = OutOfStep.CreateOOSDetHierarchical("OOSFrm", TypFolder, grid, sAreas[:2], topology, True)
+    assert [i.loc_name for i in Frm.GetAttribute("pelm")[:2]] == ["OOSFrm_"+i[0].loc_name for i in sAreas[:2]]
+    assert sAreas[2][0].GetContents(AreaFrmName) == []
+
+def test_shared_frame_type():
+    app,TypFolder,grid,sGens,sGenAng = Build(6, "tree")
+    Frm1 = OutOfStep.CreateOOSDet("OOSFrm1", TypFolder, grid, [i[1] for i in sGenAng], "tree")
+    Frm2 = OutOfStep.CreateOOSDet("OOSFrm2", TypFolder, grid, [i[1] for i in sGenAng[::-1]], "tree")
+    assert Frm1.GetAttribute("typ_id") is Frm2.GetAttribute("typ_id")
+
+    #a second build creates no new types
+    app.ResetCounters()
+    OutOfStep.InvalidateCaches()
+    OutOfStep.CreateOOSDet("OOSFrm3", TypFolder, grid, [i[1] for i in sGenAng], "tree")
+    assert app.created.get("BlkDef",0) == 0
+
+    #the frame type is named after the content of its block types, not after the project they are in
+    other = OOSFakePF.FakeApp()
+    other.project.attrs["loc_name"] = "Other project"
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(other, 6)
+    sGenAng = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid)
+    Frm = OutOfStep.CreateOOSDet("OOSFrm1", TypFolder, grid, [i[1] for i in sGenAng], "tree")
+    assert Frm.GetAttribute("typ_id").loc_name == Frm1.GetAttribute("typ_id").loc_name
+
+def test_com_ang_batch(capsys):
+    app,TypFolder,grid,sGens,sGenAng = Build(4, "chain")
+    assert [i[0] for i in sGenAng] == sGens
+    assert [i[1].loc_name for i in sGenAng] == ["AngleAdder"+i.loc_name for i in sGens]
+    assert capsys.readouterr().out == ""
+
+    #the existing angle adders are found in the name index, only the new machine gets one
+    Gen = grid.CreateObject("ElmSym","G5")
+    Gen.SetAttribute("typ_id",sGens[0].GetAttribute("typ_id"))
+    app.ResetCounters()
+    again = OutOfStep.CreateComAngBatch(sGens+[Gen], TypFolder, grid, iprint=True)
+    assert [i[1] for i in again[:4]] == [i[1] for i in sGenAng]
+    assert app.created == {"ElmComp": 1, "ElmDsl": 1}
+    assert app.calls.get("GetContents",0) == 0
+    assert capsys.readouterr().out.startswith("Created 1 new angle adder frames, 4 already existed.")
+
+def test_name_index():
+    app,TypFolder,grid,sGens,sGenAng = Build(3, "chain")
+    index = OutOfStep.GetNameIndex(grid)
+    assert index["G1"] is sGens[0]
+
+    #the objects created and deleted through the module keep the index up to date, without reading the grid again
+    app.ResetCounters()
+    obj = OutOfStep.CreateIndexedObject(grid, "ElmComp", "Frm")
+    assert OutOfStep.GetNameIndex(grid)["Frm"] is obj
+    OutOfStep.DeleteIndexedObject(grid, obj)
+    assert "Frm" not in OutOfStep.GetNameIndex(grid)
+    assert app.calls.get("GetContents",0) == 0
+
+@pytest.mark.parametrize("bulk,err", [(True,0),(False,0),(True,1)])
+def test_trajectory_from_results(bulk, err):
+    app,TypFolder,grid,sGens,sGenAng = Build(4, "chain")
+    angles,com = RandomAngles(4, 100, 3, unstable=1)
+    t = np.arange(angles.shape[0])*OOSReplay.DelayTime
+    oRes = FakeResults(t, [i[1].GetContents()[0] for i in sGenAng], "c:com_angle", com, bulk, err)
+
+    res = OutOfStep.DetectCritGeneratorTrajectory(sGenAng, oRes)
+    assert np.allclose(res["t"], t)
+    assert np.allclose(res["com_angles"], com)
+    #whole columns are read, unless they can't be or the read fails
+    assert oRes.reads["GetValue"] == (0 if bulk and not err else 5*len(t))
+
+    H = [i.GetAttribute("typ_id").GetAttribute("h") for i in sGens]
+    Sn = [i.GetAttribute("typ_id").GetAttribute("sgn") for i in sGens]
+    replay = OOSReplay.ReplayOOS(t, com, H, Sn, unwrap=False)
+    assert res["tripped"] and replay["tripped"]
+    assert res["trip_time"] == pytest.approx(replay["trip_time"])
+    assert res["crit_gen"] is sGens[1]
+
+    #a lower trip angle trips earlier
+    low = OutOfStep.DetectCritGeneratorTrajectory(sGenAng, oRes, TripAngle=30)
+    assert low["trip_time"] < res["trip_time"]
@@ -0,0 +1,82 @@
+import pytest
+
+import OOSFakePF
+import OOSPlan
+import OutOfStep
+
+def Project(name: str, n: int):
+    '''This function returns a stand-in project with the given name and n machines, as (app, TypFolder, grid, machines).'''
+
+    OutOfStep.InvalidateCaches()
+    app = OOSFakePF.FakeApp()
+    app.project.attrs["loc_name"] = name
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    return app,TypFolder,grid,sGens
+
+def Snapshot(app):
+    '''This function returns the objects of the project with their attributes, by their names relative to the project.'''
+
+    def name(obj):
+        return(obj.GetFullName().split("\\",1)[1])
+
+    objs = {}
+    for i in app.folders["blk"].AllContents()+app.folders["netdat"].AllContents():
+        attrs = {}
+        for key,value in i.attrs.items():
+            if isinstance(value, list):
+                value = [name(j) if isinstance(j, OOSFakePF.FakeDataObject) else j for j in value]
+            elif isinstance(value, OOSFakePF.FakeDataObject):
+                value = name(value)
+            attrs[key] = value
+        objs[name(i)] = attrs
+    return(objs)
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+@pytest.mark.parametrize("method", ["delay","speed"])
+def test_plan_matches_functions_in_other_project(topology, method):
+    app,TypFolder,grid,sGens = Project("Other project", 6)
+    sGenAng = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, method=method)
+    OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], topology, AlarmAngle=120)
+
+    plan = OOSPlan.BuildPlan([i.loc_name for i in sGens], "OOSFrm", topology, AlarmAngle=120, method=method)
+    diff = OOSPlan.DiffPlan(plan, app, TypFolder, grid)
+    assert diff["create"] == []
+    assert diff["update"] == {}
+    assert diff["delete"] == []
+    assert len(diff["equal"]) == len(plan["objects"])
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_apply_plan(topology, tmp_path):
+    plan = OOSPlan.BuildPlan(["G1","G2","G3","G4","G5"], "OOSFrm", topology, TripAngle=150)
+    OOSPlan.SavePlan(plan, str(tmp_path/"plan.json"))
+    plan = OOSPlan.LoadPlan(str(tmp_path/"plan.json"))
+
+    app,TypFolder,grid,sGens = Project("Applied", 5)
+    dry = OOSPlan.ApplyPlan(plan, app, TypFolder, grid, dry_run=True)
+    assert app.created == {}
+    assert dry["calls"]["CreateObject"] == len(plan["objects"])
+    OOSPlan.ApplyPlan(plan, app, TypFolder, grid)
+
+    ref,RefTypFolder,RefGrid,sRefGens = Project("Reference", 5)
+    sGenAng = OutOfStep.CreateComAngBatch(sRefGens, RefTypFolder, RefGrid)
+    OutOfStep.CreateOOSDet("OOSFrm", RefTypFolder, RefGrid, [i[1] for i in sGenAng], topology, TripAngle=150)
+    assert Snapshot(app) == Snapshot(ref)
+
+    #applying the plan again changes nothing
+    app.ResetCounters()
+    again = OOSPlan.ApplyPlan(plan, app, TypFolder, grid)
+    assert again["created"] == {}
+    assert again["updated"] == 0
+    assert app.calls.get("SetAttribute",0) == 0
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_apply_changed_plan(topology):
+    app,TypFolder,grid,sGens = Project("Other project", 8)
+    OOSPlan.ApplyPlan(OOSPlan.BuildPlan([i.loc_name for i in sGens], "OOSFrm", topology), app, TypFolder, grid)
+
+    #fewer machines and another trip angle
+    plan = OOSPlan.BuildPlan([i.loc_name for i in sGens[:5]], "OOSFrm", topology, TripAngle=170)
+    result = OOSPlan.ApplyPlan(plan, app, TypFolder, grid)
+    assert result["deleted"] > 0 or topology == "single"
+    diff = OOSPlan.DiffPlan(plan, app, TypFolder, grid)
+    assert diff["create"] == [] and diff["update"] == {} and diff["delete"] == []
@@ -0,0 +1,44 @@
+import OOSProfile
+import OutOfStep
+from test_outofstep import Build
+
+def test_profile_counts():
+    app,TypFolder,grid,sGens,sGenAng = Build(5, "tree")
+    original = OutOfStep.CreateOOSDet
+    profiler = OOSProfile.APIProfiler()
+    profiler.Install()
+    assert OutOfStep.CreateOOSDet is not original
+    app.ResetCounters()
+    try:
+        Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], "tree")
+    finally:
+        profiler.Uninstall()
+
+    #every API call is recorded once, for an OutOfStep function, and the result is not a proxy
+    summary = profiler.Summary()
+    assert summary["total"]["calls"] == app.CallCount()
+    assert "<user>" not in summary["functions"] and "<listcomp>" not in summary["functions"]
+    assert summary["methods"]["CreateObject"]["calls"] == app.calls["CreateObject"]
+    assert not isinstance(Frm, OOSProfile.ProfiledObject)
+    assert OutOfStep.CreateOOSDet is original
+
+def test_proxy_equality():
+    app,TypFolder,grid,sGens,sGenAng = Build(2, "chain")
+    profiler = OOSProfile.APIProfiler()
+    proxy = profiler.Wrap(sGens[0])
+    assert profiler.Wrap(sGens[0]) is proxy
+
+    #proxies compare and hash like their objects, also after the proxies were dropped
+    profiler.Reset()
+    other = profiler.Wrap(sGens[0])
+    assert other is not proxy
+    assert other == proxy and proxy == sGens[0] and sGens[0] == proxy
+    assert not other != proxy
+    assert proxy != profiler.Wrap(sGens[1]) and proxy != sGens[1]
+    assert len({proxy, other, sGens[0]}) == 1
+    assert {sGens[0]: 1}[other] == 1
+
+    profiler.Install()
+    profiler.Wrap(sGens[1])
+    profiler.Uninstall()
+    assert profiler.proxies == {}
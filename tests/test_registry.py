@@ -0,0 +1,113 @@
+import numpy as np
+
+import OOSFakePF
+import OOSRegistry
+import OutOfStep
+
+class Wrapper:
+    '''A new wrapper of a stand-in object, like the ones powerfactory returns on every access.'''
+
+    def __init__(self, obj):
+        self.__dict__["obj"] = obj
+
+    def __getattr__(self, name: str):
+        return(getattr(self.obj, name))
+
+    def __eq__(self, other):
+        return(self.obj is (other.obj if isinstance(other, Wrapper) else other))
+
+    def __hash__(self):
+        return(id(self.obj))
+
+def Registry(n: int, grids: int = 1):
+    '''This function returns a stand-in project with n machines (spread over the given number of grids) and its registry, as
+       (app, TypFolder, grid, machines, registry).'''
+
+    OutOfStep.InvalidateCaches()
+    app = OOSFakePF.FakeApp()
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    sGrids = [grid]+[app.folders["netdat"].CreateObject("ElmNet","Area"+str(i)) for i in range(1,grids)]
+    for i,Gen in enumerate(sGens):
+        Gen.SetAttribute("cpGrid", sGrids[i%grids])
+    return app,TypFolder,grid,sGens,OOSRegistry.GeneratorRegistry(app)
+
+def test_registry_columns():
+    app,TypFolder,grid,sGens,registry = Registry(5)
+    assert len(registry) == 5
+    assert list(registry.names) == ["G1","G2","G3","G4","G5"]
+    assert list(registry.H) == [i.GetAttribute("typ_id").GetAttribute("h") for i in sGens]
+    assert list(registry.Sn) == [i.GetAttribute("typ_id").GetAttribute("sgn") for i in sGens]
+    assert np.allclose(registry.weights, registry.H*registry.Sn/100)
+
+def test_refresh():
+    app,TypFolder,grid,sGens,registry = Registry(4)
+
+    #a new machine is appended
+    Typ = sGens[0].GetAttribute("typ_id").GetParent().CreateObject("TypSym","TypG5")
+    Typ.SetAttribute("h",7.0)
+    Typ.SetAttribute("sgn",300.0)
+    Gen = grid.CreateObject("ElmSym","G5")
+    Gen.SetAttribute("typ_id",Typ)
+    assert list(registry.Refresh()) == [4]
+    assert len(registry) == 5 and registry.H[4] == 7.0 and registry.Sn[4] == 300.0
+
+    #a machine out of service keeps its entry, but is skipped
+    sGens[1].SetAttribute("outserv",1)
+    app.ResetCounters()
+    assert list(registry.Refresh()) == [1]
+    assert app.calls["GetCalcRelevantObjects"] == 1
+    assert app.calls.get("GetAttribute",0) == 0
+    assert len(registry) == 4 and list(registry.InService()) == [0,2,3,4]
+    assert sGens[1] not in registry.Generators()
+    assert list(registry.Refresh()) == []
+
+    #a machine back in service is read again
+    sGens[1].GetAttribute("typ_id").SetAttribute("h",9.0)
+    OutOfStep.InvalidateTypDataCache()
+    sGens[1].SetAttribute("outserv",0)
+    assert list(registry.Refresh()) == [1]
+    assert len(registry) == 5 and registry.H[1] == 9.0
+
+    #edited types are only read again with types=True
+    sGens[2].GetAttribute("typ_id").SetAttribute("h",1.5)
+    registry.Refresh()
+    assert registry.H[2] != 1.5
+    assert list(registry.Refresh(types=True)) == []
+    assert registry.H[2] == 1.5
+    assert registry.weights[2] == 1.5*registry.Sn[2]/100
+
+def test_set_frames_after_refresh():
+    app,TypFolder,grid,sGens,registry = Registry(4)
+    sGenAng = OutOfStep.CreateComAngBatch(registry, TypFolder, grid)
+    assert registry.GenAng() == sGenAng
+
+    #the machines and Frames are matched by their full names, not by their wrappers
+    registry.gens = OOSRegistry.ObjectArray([Wrapper(i) for i in registry.gens])
+    blocks = registry.AngleData()[1]
+    registry.SetFrames([[Wrapper(Gen),Wrapper(Frm)] for Gen,Frm in sGenAng[::-1]])
+    assert [i.obj if isinstance(i, Wrapper) else i for i in registry.Frames()] == [i[1] for i in sGenAng]
+    assert registry.AngleData()[1] == blocks
+
+    #a Frame of an out-of-service machine is kept for when it is back in service
+    sGens[0].SetAttribute("outserv",1)
+    registry.Refresh()
+    assert registry.Frames() == [i[1] for i in sGenAng[1:]]
+    sGens[0].SetAttribute("outserv",0)
+    registry.Refresh()
+    assert OutOfStep.CreateComAngBatch(registry, TypFolder, grid) == sGenAng
+    assert registry.Frames() == [i[1] for i in sGenAng]
+
+def test_areas():
+    app,TypFolder,grid,sGens,registry = Registry(7, 3)
+    sGenAng = OutOfStep.CreateComAngBatch(registry, TypFolder, grid)
+    sAreas = registry.Areas()
+    assert [i[0].loc_name for i in sAreas] == ["Grid","Area1","Area2"]
+    assert [[j.loc_name for j in i[1]] for i in sAreas] == [["AngleAdderG1","AngleAdderG4","AngleAdderG7"],
+                                                           ["AngleAdderG2","AngleAdderG5"],["AngleAdderG3","AngleAdderG6"]]
+    assert [[i[0],list(i[1])] for i in OutOfStep.AreasByGrid(sGenAng)] == sAreas
+
+    #the areas only hold the in-service machines
+    sGens[1].SetAttribute("outserv",1)
+    sGens[4].SetAttribute("outserv",1)
+    registry.Refresh()
+    assert [i[0].loc_name for i in registry.Areas()] == ["Grid","Area2"]
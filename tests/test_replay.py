@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+import OOSReplay
+import OOSStream
+import OutOfStep
+from fakedsl import FakeSimulation, RandomAngles
+from test_outofstep import Build
+
+def Runaway(steps: int = 200, n: int = 3, unstable: int = 1):
+    '''This function returns the time vector, the rotor angles in rad (wrapped to [-pi, pi) as powerfactory reports them)
+       and the comulative angles of n oscillating machines, of which the unstable one accelerates away from the others. If
+       unstable is None, all machines stay in step.'''
+
+    t = np.arange(steps)*OOSReplay.DelayTime
+    com = 0.3*np.sin(2*np.pi*np.outer(t, np.arange(1,n+1)))
+    if unstable is not None:
+        com[:,unstable] += 20*t**2
+    return(t, np.mod(com+np.pi, 2*np.pi)-np.pi, com)
+
+def RunDSL(TypFolder, grid, sGens, sGenAng, angles, topology: str, TripAngle: float, AlarmAngle: float, horizon: float):
+    '''This function simulates the detector built by CreateOOSDet on the rotor angles and returns the trip time, the angle
+       difference at the trip (the biggest one if it didn't trip) and the alarm time, as reported by its DSL block.'''
+
+    Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], topology, False, TripAngle,
+                                 AlarmAngle, horizon)
+    states = FakeSimulation(Frm).Run([i.loc_name for i in sGens], angles)
+    t = np.arange(len(states))*OOSReplay.DelayTime
+    trig = [i for i,state in enumerate(states) if state["trig"] > 0]
+    alarm = [i for i,state in enumerate(states) if state.get("alarm",-1) > 0]
+    return({"tripped": len(trig) > 0,
+            "trip_time": t[trig[0]] if trig else None,
+            "diff": states[trig[0]]["diff"] if trig else max([i["diff"] for i in states]),
+            "alarm_time": t[alarm[0]] if alarm else None})
+
+def Same(result: dict, dsl: dict):
+    assert result["tripped"] == dsl["tripped"]
+    for key in ["trip_time","alarm_time"]:
+        if dsl[key] is None:
+            assert result[key] is None, key
+        else:
+            assert result[key] == pytest.approx(dsl[key]), key
+    assert result["diff"] == pytest.approx(dsl["diff"])
+
+def test_unwrap_angles():
+    t,angles,com = Runaway()
+    assert np.abs(angles).max() <= np.pi
+    assert np.allclose(OOSReplay.UnwrapAngles(angles), com)
+
+def test_replay_trip():
+    t,angles,com = Runaway()
+    diff = np.degrees(com.max(axis=1)-com.min(axis=1))
+    itrip = int(np.flatnonzero(diff > OOSReplay.TripAngle)[0])
+
+    result = OOSReplay.ReplayOOS(t, angles, names=["A","B","C"])
+    assert result["tripped"]
+    assert result["trip_time"] == pytest.approx(t[itrip])
+    assert result["stop_time"] == pytest.approx(t[itrip]+OOSReplay.DelayTime)
+    assert result["pair"][0] == "B"
+    assert result["diff"] == pytest.approx(diff[itrip])
+    assert result["crit_gen"] == "B"
+
+    #the comulative angles replay the same way
+    assert OOSReplay.ReplayOOS(t, com, names=["A","B","C"], unwrap=False) == pytest.approx(result)
+
+def test_replay_stable():
+    t,angles,com = Runaway(unstable=None)
+    result = OOSReplay.ReplayOOS(t, angles, [2,3,4], [100,200,300])
+    assert not result["tripped"]
+    assert result["trip_time"] is None and result["pair"] is None
+    assert result["stop_time"] == pytest.approx(t[-1])
+    assert result["diff"] == pytest.approx(np.degrees(com.max(axis=1)-com.min(axis=1)).max())
+
+    #the distance to the centre of inertia angle is weighted by H*Sn
+    deg = com[-1]*OOSReplay.RadToDeg
+    dist = np.abs(deg-np.average(deg, weights=[200,600,1200]))
+    assert result["crit_gen"] == "G"+str(np.argmax(dist))
+    assert result["crit_dist"] == pytest.approx(dist.max())
+
+@pytest.mark.parametrize("ext", [".npz",".csv"])
+def test_replay_file(ext, tmp_path):
+    t,angles,com = Runaway()
+    path = str(tmp_path/("angles"+ext))
+    if ext == ".npz":
+        np.savez(path, time=t, angles=angles, names=np.asarray(["A","B","C"]))
+    else:
+        np.savetxt(path, np.column_stack([t,angles]), delimiter=",", header="t,A,B,C", comments="")
+
+    result = OOSReplay.ReplayOOSFile(path)
+    assert result.pop("file") == path
+    assert result == pytest.approx(OOSReplay.ReplayOOS(t, angles, names=["A","B","C"]))
+    with pytest.raises(ValueError):
+        OOSReplay.LoadAngles(str(tmp_path/"angles.txt"))
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+@pytest.mark.parametrize("settings", [(180,None,0),(120,60,0),(150,None,0.2),(150,None,0.05),(2000,None,0)])
+def test_replay_matches_dsl(topology, settings):
+    TripAngle,AlarmAngle,horizon = settings
+    app,TypFolder,grid,sGens,sGenAng = Build(5, topology)
+    angles,com = RandomAngles(5, 300, 7, unstable=2)
+    t = np.arange(angles.shape[0])*OOSReplay.DelayTime
+
+    dsl = RunDSL(TypFolder, grid, sGens, sGenAng, angles, topology, TripAngle, AlarmAngle, horizon)
+    assert dsl["tripped"] == (TripAngle < 2000)
+
+    Same(OOSReplay.ReplayOOS(t, angles, TripAngle=TripAngle, AlarmAngle=AlarmAngle, horizon=horizon), dsl)
+    Same(OOSReplay.ReplayOOS(t, com, unwrap=False, TripAngle=TripAngle, AlarmAngle=AlarmAngle, horizon=horizon), dsl)
+
+    names = [i.loc_name for i in sGens]
+    detector = OOSStream.StreamingDetector(names, TripAngle=TripAngle, AlarmAngle=AlarmAngle, horizon=horizon)
+    Same(detector.Feed(zip(t, angles)), dsl)
+
+def test_replay_crit_gen_matches_detect():
+    app,TypFolder,grid,sGens,sGenAng = Build(4, "chain")
+    angles,com = RandomAngles(4, 100, 3, unstable=1)
+    t = np.arange(angles.shape[0])*OOSReplay.DelayTime
+    H = [i.GetAttribute("typ_id").GetAttribute("h") for i in sGens]
+    Sn = [i.GetAttribute("typ_id").GetAttribute("sgn") for i in sGens]
+    result = OOSReplay.ReplayOOS(t, angles, H, Sn, [i.loc_name for i in sGens])
+    assert result["tripped"]
+
+    #the angle adders are simulated until the simulation stops and their comulative angles read by DetectCritGenerator
+    sims = [FakeSimulation(i[1]) for i in sGenAng]
+    for row in angles[:int(round(result["stop_time"]/OOSReplay.DelayTime))+1]:
+        for sim in sims:
+            sim.Step(dict(zip([i.loc_name for i in sGens],row)))
+    for (Gen,Frm),sim in zip(sGenAng,sims):
+        Frm.GetContents()[0].SetAttribute("c:com_angle",sim.Model(Frm).Variables("OOSdetBlk")["com_angle"])
+    crit = OutOfStep.DetectCritGenerator(sGenAng)
+    assert result["crit_gen"] == crit[0].loc_name
+    assert result["crit_dist"] == pytest.approx(crit[1])
@@ -0,0 +1,40 @@
+import pytest
+
+import OOSReplay
+import OOSScreening
+
+Cases = [{"name": "stable", "events": {"fault": {"time": 0.1, "p_target": "G2"}, "clear": {"time": 0.15}}},
+         {"name": "unstable", "events": {"fault": {"time": 0.1, "p_target": "G2"}, "clear": {"time": 0.5}}},
+         {"name": "missing", "events": {"fault": {"time": 0.1, "p_target": "G9"}}},
+         {"events": {"fault": {"time": 0.1, "p_target": ["G1","G3"]}, "clear": {"time": 0.6}}, "tstop": 2.0}]
+
+@pytest.mark.parametrize("workers", [0,2])
+def test_screening_table(workers):
+    backend = OOSScreening.StandInBackend(3, TripAngle=150)
+    rows = OOSScreening.RunScreening(Cases, backend, workers)
+    assert [i["case"] for i in rows] == ["stable","unstable","missing","case4"]
+    for row in rows:
+        assert sorted(row) == sorted(OOSScreening.Columns)
+
+    stable,unstable,missing,group = rows
+    assert stable["error"] is None and stable["stable"] and stable["trip_time"] is None
+    assert stable["stop_time"] == pytest.approx(5.0)
+
+    assert unstable["error"] is None and not unstable["stable"]
+    assert unstable["crit_gen"] == "G2"
+    assert 0.5 < unstable["trip_time"] < unstable["stop_time"] < 5.0
+    assert unstable["stop_time"] == pytest.approx(unstable["trip_time"]+OOSReplay.DelayTime)
+    assert unstable["diff_peak"] > 150
+
+    assert missing["error"].startswith("KeyError") and missing["stable"] is None
+    assert not group["stable"] and group["crit_gen"] in ["G1","G3"]
+
+    summary = OOSScreening.ScreeningSummary(rows)
+    assert summary == {"cases": 4, "stable": 1, "unstable": 2, "errors": 1, "crit_gen": {"G2": 1, group["crit_gen"]: 1}}
+
+def test_screening_trip_angle():
+    #the same case trips later with a bigger trip angle, and the stand-in stops the simulation at the trip
+    early = OOSScreening.RunScreening(Cases[1:2], OOSScreening.StandInBackend(3, TripAngle=120), 0)[0]
+    late = OOSScreening.RunScreening(Cases[1:2], OOSScreening.StandInBackend(3, TripAngle=240), 0)[0]
+    assert early["trip_time"] < late["trip_time"]
+    assert early["diff_end"] < late["diff_end"]
@@ -0,0 +1,77 @@
+import pytest
+
+import OOSSession
+
+@pytest.fixture(autouse=True)
+def NoSessions():
+    OOSSession.CloseSessions()
+    yield
+    OOSSession.CloseSessions()
+
+def test_session_is_reused():
+    session = OOSSession.OpenSession(OOSSession.FakeSession(3))
+    app = session.app
+    assert [i.loc_name for i in session.Generators()] == ["G1","G2","G3"]
+    assert session.grid.loc_name == "Grid"
+    assert app.calls["ActivateProject"] == 1
+
+    #a session with the same key is the warm one, the project isn't activated again
+    assert OOSSession.OpenSession(OOSSession.FakeSession(3)) is session
+    assert session.app is app
+    assert app.calls["ActivateProject"] == 1
+
+    #another key opens another session
+    other = OOSSession.OpenSession(OOSSession.FakeSession(4))
+    assert other is not session
+    assert len(other.Generators()) == 4
+
+def test_session_is_reactivated():
+    session = OOSSession.OpenSession(OOSSession.FakeSession(3))
+    app = session.app
+    app.study_case = app.folders["study"].CreateObject("IntCase","Other case")
+    assert not session.IsActive()
+    assert OOSSession.OpenSession(OOSSession.FakeSession(3)) is session
+    assert app.calls["ActivateProject"] == 2
+    assert session.IsActive()
+
+def test_session_close():
+    session = OOSSession.OpenSession(OOSSession.FakeSession(3))
+    session.Close()
+    assert OOSSession.Sessions == {}
+    assert session.app is None and session.grid is None
+
+    #a closed session is opened again, the stand-in application is kept
+    fake = session.fake
+    assert OOSSession.OpenSession(session) is session
+    assert session.app is fake
+
+    with OOSSession.FakeSession(5) as other:
+        assert other.grid is not None
+    assert list(OOSSession.Sessions) == [session.Key()]
+
+def test_pool_in_process():
+    session = OOSSession.FakeSession(3)
+    with OOSSession.SessionPool(session, 0) as pool:
+        assert OOSSession.Sessions == {session.Key(): session}
+        assert pool.Map(getattr, ["n","GridName"]) == [3,"Grid"]
+    assert OOSSession.Sessions == {}
+
+    #closing again doesn't open the session
+    pool.Close()
+    assert OOSSession.Sessions == {}
+    assert session.app is None
+    assert session.fake.calls["ActivateProject"] == 1
+
+def test_pool_closes_warm_session():
+    warm = OOSSession.OpenSession(OOSSession.FakeSession(3))
+    pool = OOSSession.SessionPool(OOSSession.FakeSession(3), 0)
+    assert pool.Map(lambda session,item: session, [0]) == [warm]
+    pool.Close()
+    assert OOSSession.Sessions == {}
+    assert warm.app is None
+
+def test_pool_workers():
+    with OOSSession.SessionPool(OOSSession.FakeSession(3), 2) as pool:
+        assert pool.Map(getattr, ["n","GridName","project_name"]) == [3,"Grid","Project"]
+    #the sessions are opened in the workers, not in this process
+    assert OOSSession.Sessions == {}
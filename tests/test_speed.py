@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+import OOSFakePF
+import OOSReplay
+import OutOfStep
+from fakedsl import FakeSimulation
+
+def Smooth(n: int, steps: int = 300):
+    '''This function returns the time vector, the comulative rotor angles in rad of n machines swinging on a smooth
+       trajectory (the last one running away from the others), their rotor angles wrapped to [-pi, pi) and their speeds in
+       p.u., the exact derivative of the angles.'''
+
+    t = np.arange(steps)*OOSReplay.DelayTime
+    a = np.linspace(0.5, 1.5, n)
+    w = np.linspace(3.0, 7.0, n)
+    runaway = np.zeros(n)
+    runaway[-1] = 4.0
+    com = a*np.sin(np.outer(t,w))+runaway*t[:,None]**2
+    speed = 1+(a*w*np.cos(np.outer(t,w))+2*runaway*t[:,None])/(2*np.pi*50)
+    start = np.linspace(-3.0, 3.0, n)
+    return t,com,np.mod(com+start+np.pi, 2*np.pi)-np.pi,speed
+
+def Grid(n: int):
+    OutOfStep.InvalidateCaches()
+    app = OOSFakePF.FakeApp()
+    grid,TypFolder,sGens = OOSFakePF.CreateFakeGrid(app, n)
+    return app,TypFolder,grid,sGens
+
+def test_speed_adder_wiring():
+    app,TypFolder,grid,sGens = Grid(4)
+    sGenAng = OutOfStep.CreateComAngBatch(sGens[:3], TypFolder, grid, method="speed")
+    Frm = sGenAng[0][1]
+    FrmTyp = Frm.GetAttribute("typ_id")
+    assert FrmTyp.loc_name == "ComAngSpeedFrmTyp"
+    assert FrmTyp.GetContents("machine.BlkSlot")[0].GetAttribute("sOutput") == ["xspeed"]
+    BlkTyp = FrmTyp.GetContents("OOSdetBlk.BlkSlot")[0].GetAttribute("pDsl")
+    assert BlkTyp.loc_name == "ComAngSpeedBlkTyp"
+    assert "x_ang. = (speed-1)*2*pi()*50" in BlkTyp.GetAttribute("sAddEquat")
+    assert [i.loc_name for i in FrmTyp.GetContents("*.BlkSig")] == ["speed","xphi"]
+    assert Frm.GetAttribute("pelm") == [sGens[0],Frm.GetContents()[0]]
+    assert Frm.GetContents()[0].GetAttribute("typ_id") is BlkTyp
+
+    #the types are created once and reused by CreateComAng and by the next batch, the existing adders are kept
+    app.ResetCounters()
+    Frm4 = OutOfStep.CreateComAng("AngleAdderG4", TypFolder, grid, sGens[3], method="speed")
+    assert Frm4.GetAttribute("typ_id") is FrmTyp
+    assert OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, method="speed") == sGenAng+[[sGens[3],Frm4]]
+    assert app.created == {"ElmComp": 1, "ElmDsl": 1}
+
+    #the delay adders have their own types
+    sDelay = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, "DelayAdder")
+    assert sDelay[0][1].GetAttribute("typ_id").loc_name == "ComAngFrmTyp"
+    assert app.created.get("BlkDef",0) == 2
+
+def test_speed_adder_matches_delay_adder():
+    app,TypFolder,grid,sGens = Grid(3)
+    names = [i.loc_name for i in sGens]
+    t,com,angles,speed = Smooth(3)
+    sSpeed = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, method="speed")
+    sDelay = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, "DelayAdder")
+
+    integrated = np.asarray([[i["com_angle"] for i in FakeSimulation(Frm).Run(names, angles, speeds=speed)]
+                             for Gen,Frm in sSpeed]).T
+    unwrapped = np.asarray([[i["com_angle"] for i in FakeSimulation(Frm).Run(names, angles, speeds=speed)]
+                            for Gen,Frm in sDelay]).T
+
+    #both adders match their replays, the delay adder unwraps the angles exactly and the speed adder integrates them
+    assert np.allclose(integrated, OOSReplay.SpeedAngles(t, speed))
+    assert np.allclose(unwrapped, OOSReplay.UnwrapAngles(angles))
+    assert np.allclose(unwrapped, com-com[0])
+    assert np.allclose(integrated, unwrapped, atol=2e-3)
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_detector_on_speed_adders(topology):
+    app,TypFolder,grid,sGens = Grid(4)
+    names = [i.loc_name for i in sGens]
+    t,com,angles,speed = Smooth(4)
+    sGenAng = OutOfStep.CreateComAngBatch(sGens, TypFolder, grid, method="speed")
+    Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], topology)
+
+    states = FakeSimulation(Frm).Run(names, angles, speeds=speed)
+    trig = [i for i,state in enumerate(states) if state["trig"] > 0]
+    result = OOSReplay.ReplayOOS(t, OOSReplay.SpeedAngles(t, speed), unwrap=False)
+    assert result["tripped"] and trig
+    assert t[trig[0]] == pytest.approx(result["trip_time"])
+    assert states[trig[0]]["diff"] == pytest.approx(result["diff"])
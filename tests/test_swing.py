@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import OOSSwing
+from test_outofstep import Build
+
+def Cases(ClearTimes: list):
+    return([{"name": "Bus7@"+str(i), "fault_bus": "Bus7", "fault_time": 0.1, "clear_time": i} for i in ClearTimes])
+
+def test_validate_nine_bus():
+    results,cct = OOSSwing.ValidateNineBus()
+    assert 0.2 < cct < 0.5
+    unstable = [i for i in results if not i["stable"]]
+    assert unstable and all([i["crit_gen"] == "G2" for i in unstable])
+    assert all([i["stop_time"] == pytest.approx(i["trip_time"]+0.01) for i in unstable])
+
+def test_validate_nine_bus_errors(monkeypatch):
+    #a system in which another machine is critical
+    system = OOSSwing.NineBusSystem()
+    system.H = np.asarray([9.551,60.0,0.3])
+    system.M = 2*system.H*system.Sn/system.Sb/(2*np.pi*system.f)
+    with pytest.raises(ValueError, match="critical generator"):
+        OOSSwing.ValidateNineBus(system=system)
+
+    #results whose stability changes more than once with the clearing time
+    def results(system, cases, tstop):
+        return([{"name": i["name"], "stable": j, "crit_gen": "G2"} for i,j in zip(cases,[True,False,True])])
+    monkeypatch.setattr(OOSSwing, "SimulateCases", results)
+    with pytest.raises(ValueError, match="only once"):
+        OOSSwing.ValidateNineBus([0.2,0.3,0.4])
+
+def test_batch_is_independent():
+    system = OOSSwing.NineBusSystem()
+    cases = Cases([0.2,0.3,0.45,0.6])
+    batch = OOSSwing.SimulateCases(system, cases)
+    for case,res in zip(cases,batch):
+        single = OOSSwing.SimulateCases(system, [case])[0]
+        assert single["stable"] == res["stable"]
+        assert single["stop_time"] == pytest.approx(res["stop_time"])
+        assert single["crit_dist"] == pytest.approx(res["crit_dist"], rel=1e-5)
+
+def test_prescreen():
+    results,cct = OOSSwing.ValidateNineBus()
+    classes = [i["class"] for i in OOSSwing.Prescreen(OOSSwing.NineBusSystem(), Cases([0.15,cct,cct+0.01,0.6]))]
+    assert classes == ["stable","borderline","borderline","unstable"]
+
+def test_system_from_model():
+    app,TypFolder,grid,sGens,sGenAng = Build(3, "chain")
+    names,H,Sn = OOSSwing.MachineData(sGens)
+    assert names == ["G1","G2","G3"]
+    assert H == [i.GetAttribute("typ_id").GetAttribute("h") for i in sGens]
+    assert Sn == [i.GetAttribute("typ_id").GetAttribute("sgn") for i in sGens]
+    assert OOSSwing.MachineData(sGenAng) == (names,H,Sn)
+
+    system = OOSSwing.NineBusSystem(sGens[::-1])
+    assert system.names == ["G1","G2","G3"]
+    assert list(system.H) == H and list(system.Sn) == Sn
+    reference = OOSSwing.NineBusSystem()
+    assert np.allclose(system.Pm, reference.Pm)
+    assert not np.allclose(system.M, reference.M)
+    with pytest.raises(KeyError):
+        OOSSwing.NineBusSystem(sGens[:2])
+
+    model = OOSSwing.ModelSystem(sGens, reference.buses, reference.branches, ["Bus1","Bus2","Bus3"], reference.xd,
+                                 reference.V, reference.Sgen, reference.Sload)
+    assert model.names == names and list(model.H) == H
+    assert np.allclose(model.Reduce(model.Ybus()), reference.Reduce(reference.Ybus()))
+
+def test_system_from_registry():
+    import OOSRegistry
+
+    app,TypFolder,grid,sGens,sGenAng = Build(4, "chain")
+    registry = OOSRegistry.GeneratorRegistry(app)
+    assert OOSSwing.MachineData(registry) == OOSSwing.MachineData(sGens)
+    sGens[3].SetAttribute("outserv",1)
+    registry.Refresh()
+    assert OOSSwing.MachineData(registry) == OOSSwing.MachineData(sGens[:3])
+    system = OOSSwing.NineBusSystem(registry)
+    assert list(system.H) == list(registry.H[:3])
+    assert OOSSwing.ValidateNineBus(system=system)[1] > 0.1
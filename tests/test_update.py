@@ -0,0 +1,81 @@
+import pytest
+
+import OutOfStep
+from test_outofstep import Build, CheckMaxMin, Counts
+
+def Update(TypFolder, grid, sGenAng, selection: list, topology: str):
+    '''This function updates the detector OOSFrm to the angles of the selected machines and checks its objects, its cached
+       layout and its simulation.'''
+
+    Frm = OutOfStep.UpdateOOSDet("OOSFrm", TypFolder, grid, [sGenAng[i][1] for i in selection], topology)
+    layout = OutOfStep.GetOOSDetLayout(Frm)
+    assert sorted(layout["angles"].values()) == sorted([sGenAng[i][1].GetFullName() for i in selection])
+
+    info = OutOfStep.OOSDetTopologyInfo(len(selection), topology)
+    assert Counts(Frm) == {"ElmDsl": info["ElmDsl"], "BlkSlot": info["BlkSlot"], "BlkSig": info["BlkSig"]}
+
+    #the cached layout is the same as the one read from the model again (a tree can be read back as a chain, if it has the
+    #shape of one)
+    OutOfStep.InvalidateOOSDetLayout(Frm)
+    fresh = OutOfStep.GetOOSDetLayout(Frm, topology)
+    for key in ["slots","angles","nodes","parent","root","inputs"]:
+        assert fresh[key] == layout[key], key
+
+    CheckMaxMin(Frm, [sGenAng[i][0] for i in selection], seed=len(selection))
+    return(Frm)
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_update_add_remove(topology):
+    app,TypFolder,grid,sGens,sGenAng = Build(10, topology)
+    OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng[:5]], topology)
+
+    Update(TypFolder, grid, sGenAng, [0,1,2,3,4,5,6,7], topology)
+    Update(TypFolder, grid, sGenAng, [0,2,4,6,7], topology)
+    Update(TypFolder, grid, sGenAng, [1,2,4,6,8,9], topology)
+    Update(TypFolder, grid, sGenAng, [9,8], topology)
+    Frm = Update(TypFolder, grid, sGenAng, list(range(10)), topology)
+
+    #an update without changes doesn't change the model
+    app.ResetCounters()
+    OutOfStep.UpdateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng], topology)
+    assert app.created == {}
+    assert app.calls.get("SetAttribute",0) == 0
+    assert app.calls.get("Delete",0) == 0
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_update_copies_shared_type(topology):
+    app,TypFolder,grid,sGens,sGenAng = Build(6, topology)
+    Frm1 = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, [i[1] for i in sGenAng[:4]], topology)
+    Frm2 = OutOfStep.CreateOOSDet("OOSFrm2", TypFolder, grid, [i[1] for i in sGenAng[2:]], topology)
+    SharedTyp = Frm1.GetAttribute("typ_id")
+    assert Frm2.GetAttribute("typ_id") is SharedTyp
+    shared = Counts(Frm2)
+
+    #replacing angles keeps the shared type
+    Update(TypFolder, grid, sGenAng, [0,1,2,5], topology)
+    assert Frm1.GetAttribute("typ_id") is SharedTyp
+
+    #adding angles changes a copy of the shared type, the other detector keeps the original
+    Update(TypFolder, grid, sGenAng, [0,1,2,4,5], topology)
+    assert Frm1.GetAttribute("typ_id") is not SharedTyp
+    assert Frm1.GetAttribute("typ_id").loc_name == "OOSFrmTyp"
+    assert Frm2.GetAttribute("typ_id") is SharedTyp
+    assert Counts(Frm2) == shared
+    CheckMaxMin(Frm2, [i[0] for i in sGenAng[2:]])
+
+    #the copy isn't copied again
+    Update(TypFolder, grid, sGenAng, [0,5], topology)
+    assert Frm1.GetAttribute("typ_id").loc_name == "OOSFrmTyp"
+
+@pytest.mark.parametrize("topology", ["chain","tree","single"])
+def test_update_thresholds(topology):
+    app,TypFolder,grid,sGens,sGenAng = Build(5, topology)
+    sAngles = [i[1] for i in sGenAng]
+    Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, sAngles, topology)
+    Frm = OutOfStep.CreateOOSDet("OOSFrm", TypFolder, grid, sAngles[:4], topology, True, 150, 90, 0.1)
+    Ref = OutOfStep.CreateOOSDet("OOSRef", TypFolder, grid, sAngles[:4], topology, False, 150, 90, 0.1)
+
+    OOSDetBlkTyp = Ref.GetContents("OOSDetBlk.ElmDsl")[0].GetAttribute("typ_id")
+    assert Frm.GetContents("OOSDetBlk.ElmDsl")[0].GetAttribute("typ_id") is OOSDetBlkTyp
+    assert Frm.GetAttribute("typ_id").GetContents("OOSdetBlk.BlkSlot")[0].GetAttribute("pDsl") is OOSDetBlkTyp
+    CheckMaxMin(Frm, sGens[:4])